@@ -0,0 +1,67 @@
+"""Predictive opponent AI.
+
+Instead of chasing ``ball.centery`` every frame like ``opponent_ai()``, the
+predictive AI works out where the ball will cross the paddle's x position,
+reflecting it off the top and bottom walls in closed form. The prediction is
+only redone when the ball's path changes (serve, paddle hit, wall bounce);
+every other update just moves the paddle toward the cached target.
+
+Difficulty is expressed as a reaction delay, a random prediction error and
+a maximum paddle speed (see ``PREDICTIVE_AI_LEVELS`` in settings.py).
+"""
+import random
+
+from settings import SCREEN_HEIGHT, BALL_RADIUS, PADDLE_WIDTH, OPPONENT_X
+
+# Ball center x when the ball touches the opponent paddle's front face
+OPPONENT_INTERCEPT_X = OPPONENT_X + PADDLE_WIDTH + BALL_RADIUS
+
+
+def predict_intercept(ball_center_x, ball_center_y, ball_speed_x, ball_speed_y, target_x):
+    """Returns the ball's center y when it reaches target_x, bouncing off the top and bottom walls.
+
+    The path is unfolded into a straight line and folded back into the band
+    the ball center can occupy. Works on plain numbers and on NumPy arrays
+    (ball_speed_x must be non-zero and heading toward target_x).
+    """
+    low = BALL_RADIUS
+    span = SCREEN_HEIGHT - 2 * BALL_RADIUS
+    travel_time = (target_x - ball_center_x) / ball_speed_x
+    unfolded_y = ball_center_y + ball_speed_y * travel_time - low
+    return low + span - abs(unfolded_y % (2 * span) - span)
+
+
+class PredictiveAI:
+    """Moves a paddle toward a predicted intercept point instead of the ball itself."""
+
+    def __init__(self, reaction_delay=0, prediction_noise=0.0, max_speed=7, seed=None):
+        self.reaction_delay = reaction_delay # Updates to wait before reacting to a new ball path
+        self.prediction_noise = prediction_noise # Standard deviation of the aiming error, in pixels
+        self.max_speed = max_speed # Pixels per update
+        self.rng = random.Random(seed)
+        self.target_y = SCREEN_HEIGHT / 2
+        self.error = 0.0
+        self.delay = 0
+
+    def observe(self, ball, ball_speed_x, ball_speed_y, new_path=True):
+        """Re-predicts the target. Call on serves, paddle hits and restarts (new_path) and on wall bounces."""
+        if new_path:
+            self.error = self.rng.gauss(0, self.prediction_noise) if self.prediction_noise else 0.0
+            self.delay = self.reaction_delay
+        if ball_speed_x < 0:
+            self.target_y = predict_intercept(ball.centerx, ball.centery, ball_speed_x, ball_speed_y,
+                                              OPPONENT_INTERCEPT_X) + self.error
+        else:
+            self.target_y = SCREEN_HEIGHT / 2 # Drift back to the center while the ball is away
+
+    def update(self, paddle):
+        """Moves the paddle one update toward the cached target and keeps it on screen."""
+        if self.delay > 0:
+            self.delay -= 1
+            return
+        step = self.target_y - paddle.centery
+        paddle.y += max(-self.max_speed, min(self.max_speed, step))
+        if paddle.top <= 0:
+            paddle.top = 0
+        if paddle.bottom >= SCREEN_HEIGHT:
+            paddle.bottom = SCREEN_HEIGHT
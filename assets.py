@@ -0,0 +1,64 @@
+"""Sprites and overlays pre-rendered once at startup.
+
+Drawing the ball, its squash and trail, the paddles and the score flash used
+to allocate surfaces or rasterize shapes every frame. ``GameAssets`` builds
+them all up front as display-format surfaces so gameplay drawing is only
+blits. Must be created after ``pygame.display.set_mode``. Sprites are
+sized for the Viewport they are drawn through (the internal resolution).
+"""
+import pygame
+
+from settings import BALL_RADIUS, PADDLE_WIDTH, PADDLE_HEIGHT
+from viewport import Viewport
+
+TRAIL_LENGTH = 10 # Number of past ball positions kept for the trail
+FLASH_ALPHA = 100 # Opacity of the white score flash
+
+
+def _ellipse_sprite(size, color):
+    sprite = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.ellipse(sprite, color, sprite.get_rect())
+    return sprite.convert_alpha()
+
+
+class GameAssets:
+    """Pre-rendered, display-converted surfaces used by the playing screen."""
+
+    def __init__(self, ball_color, highlight_color, paddle_height=PADDLE_HEIGHT, view=None):
+        view = view or Viewport()
+        ball_size = BALL_RADIUS * 2
+        self.ball = _ellipse_sprite(view.rect((0, 0, ball_size, ball_size)).size, ball_color)
+        # Same size the old squash Rect ended up with (37.5 x 22.5 rounded by pygame.Rect)
+        self.squash = _ellipse_sprite((max(1, int(BALL_RADIUS * 2.5 * view.scale + 0.5)),
+                                       max(1, int(BALL_RADIUS * 1.5 * view.scale + 0.5))), highlight_color)
+
+        # Trail circles shrink from the newest point to the oldest: one sprite per trail slot
+        self.trail = []
+        for i in range(TRAIL_LENGTH):
+            radius = int(i / TRAIL_LENGTH * (BALL_RADIUS * 0.5) * view.scale)
+            if radius == 0:
+                self.trail.append(None) # Too small to be visible
+                continue
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, ball_color, (radius, radius), radius)
+            self.trail.append((sprite.convert_alpha(), radius))
+
+        # Paddles in their normal and flash colors
+        paddle_size = view.rect((0, 0, PADDLE_WIDTH, paddle_height)).size
+        self.paddle = pygame.Surface(paddle_size).convert()
+        self.paddle.fill(ball_color)
+        self.paddle_flash = pygame.Surface(paddle_size).convert()
+        self.paddle_flash.fill(highlight_color)
+
+        # Semi-transparent white overlay for the score flash
+        self.flash_overlay = pygame.Surface(view.size).convert()
+        self.flash_overlay.fill((255, 255, 255))
+        self.flash_overlay.set_alpha(FLASH_ALPHA)
+
+    def trail_sprite(self, index, trail_length):
+        """Returns (sprite, radius) for a trail point, or None if it is too small to draw.
+
+        A trail shorter than TRAIL_LENGTH (right after a reset) uses the
+        largest sprites, so the newest point always looks the same.
+        """
+        return self.trail[index + TRAIL_LENGTH - trail_length]
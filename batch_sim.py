@@ -0,0 +1,276 @@
+"""Headless batch simulation of many Ping Pong matches at once.
+
+Every match follows the same rules as ``ball_animation()``,
+``player_animation()`` and ``opponent_ai()`` in ping_pong.py, but the state of
+all matches lives in NumPy arrays so one call to ``step()`` advances them all.
+The ball position is its center and paddle positions are their top edge.
+
+Two ball physics are available: "swept" (the game's continuous collision
+from collision.py) and "classic" (the original move-then-test frame rules,
+reproduced exactly, including pygame.Rect rounding). The opponent can use either the reactive
+AI or the predictive AI from ai.py.
+"""
+import numpy as np
+
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, BALL_RADIUS, PADDLE_WIDTH, PADDLE_HEIGHT, WINNING_SCORE
+from settings import PLAYER_X, OPPONENT_X
+from ai import predict_intercept, OPPONENT_INTERCEPT_X
+from collision import sweep_ball_batch
+
+BALL_SIZE = BALL_RADIUS * 2
+
+# Values stored in BatchSimulation.winner
+NO_WINNER = 0
+PLAYER_WON = 1
+OPPONENT_WON = 2
+
+
+def rect_round(values):
+    """Round the way pygame.Rect does when a float is assigned (half away from zero)."""
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+
+class BatchSimulation:
+    """Simulates ``num_matches`` independent matches in lockstep.
+
+    ``ball_speed``, ``opponent_speed``, ``paddle_height``, ``winning_score``,
+    ``reaction_delay`` and ``prediction_noise`` may be scalars or one value
+    per match, which makes parameter sweeps a single batch. With
+    ``ai="predictive"`` the opponent uses ``opponent_speed`` as its max speed.
+    """
+
+    def __init__(self, num_matches, ball_speed=7, opponent_speed=7, paddle_height=PADDLE_HEIGHT,
+                 winning_score=WINNING_SCORE, ai="reactive", reaction_delay=0, prediction_noise=0, seed=None,
+                 physics="swept"):
+        if ai not in ("reactive", "predictive"):
+            raise ValueError(f"Unknown AI '{ai}', expected 'reactive' or 'predictive'")
+        if physics not in ("swept", "classic"):
+            raise ValueError(f"Unknown physics '{physics}', expected 'swept' or 'classic'")
+        self.physics = physics
+        self.num_matches = num_matches
+        self.ball_speed = self._per_match(ball_speed)
+        self.opponent_speed = self._per_match(opponent_speed)
+        self.paddle_height = self._per_match(paddle_height)
+        self.winning_score = self._per_match(winning_score)
+        self.ai = ai
+        self.reaction_delay = self._per_match(reaction_delay).astype(np.int32)
+        self.prediction_noise = self._per_match(prediction_noise)
+        self.rng = np.random.default_rng(seed)
+        self.paddle_half = np.floor_divide(self.paddle_height, 2) # Same as Rect.centery offset
+
+        shape = (num_matches,)
+        self.ball_x = np.zeros(shape)
+        self.ball_y = np.zeros(shape)
+        self.ball_speed_x = np.zeros(shape)
+        self.ball_speed_y = np.zeros(shape)
+        self.player_y = np.zeros(shape)
+        self.opponent_y = np.zeros(shape)
+        self.player_score = np.zeros(shape, dtype=np.int32)
+        self.opponent_score = np.zeros(shape, dtype=np.int32)
+        self.winner = np.zeros(shape, dtype=np.int8)
+        self.player_hits = np.zeros(shape, dtype=np.int32) # Paddle hits in the current match
+        self.opponent_hits = np.zeros(shape, dtype=np.int32)
+        self.match_frames = np.zeros(shape, dtype=np.int64) # Frames played in the current match
+        self.ai_target = np.full(shape, SCREEN_HEIGHT / 2) # Predictive AI state
+        self.ai_error = np.zeros(shape)
+        self.ai_delay = np.zeros(shape, dtype=np.int32)
+        self.frames = 0
+        self.reset()
+
+    def _per_match(self, value):
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (self.num_matches,)).copy()
+
+    @property
+    def done(self):
+        """Boolean mask of matches that already have a winner."""
+        return self.winner != NO_WINNER
+
+    @property
+    def waiting_for_serve(self):
+        """Boolean mask of running matches whose ball is stopped at the center."""
+        return (self.ball_speed_x == 0) & (self.ball_speed_y == 0) & ~self.done
+
+    def reset(self, mask=None):
+        """Starts new matches (all of them, or only where ``mask`` is True)."""
+        if mask is None:
+            mask = np.ones(self.num_matches, dtype=bool)
+        start_y = np.trunc(SCREEN_HEIGHT / 2 - self.paddle_height / 2) # Rect() truncates on creation
+        self.player_y[mask] = start_y[mask]
+        self.opponent_y[mask] = start_y[mask]
+        self.player_score[mask] = 0
+        self.opponent_score[mask] = 0
+        self.winner[mask] = NO_WINNER
+        self.player_hits[mask] = 0
+        self.opponent_hits[mask] = 0
+        self.match_frames[mask] = 0
+        self._ball_restart(mask)
+
+    def _ball_restart(self, mask):
+        self.ball_x[mask] = SCREEN_WIDTH / 2
+        self.ball_y[mask] = SCREEN_HEIGHT / 2
+        self.ball_speed_x[mask] = 0
+        self.ball_speed_y[mask] = 0
+        self._ai_observe(mask)
+
+    def keep(self, mask):
+        """Drops every match where ``mask`` is False; the kept matches continue where they were."""
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray) and value.shape == (self.num_matches,): # Per-match state and settings
+                setattr(self, name, value[mask])
+        self.num_matches = int(np.count_nonzero(mask))
+
+    def serve(self, mask=None):
+        """Serves the ball in every match that is waiting for a serve (SPACE in the game)."""
+        waiting = self.waiting_for_serve
+        if mask is not None:
+            waiting &= mask
+        self.ball_speed_x[waiting] = -self.ball_speed[waiting]
+        self.ball_speed_y[waiting] = -self.ball_speed[waiting]
+        self._ai_observe(waiting)
+
+    def step(self, player_speed, opponent_player_speed=None, frame_skip=1):
+        """Advances every match by ``frame_skip`` frames with the same paddle input.
+
+        ``player_speed`` is the right paddle's movement per frame (like the
+        game's ``player_speed``). If ``opponent_player_speed`` is None the left
+        paddle is driven by the AI, otherwise it is moved like the second
+        player's paddle. Each frame moves the ball and then the paddles, as
+        the game's update does, so a step of N frames plays out exactly like
+        N steps of one frame. Returns the masks of points scored by the
+        player and by the opponent during the step.
+        """
+        player_point, opponent_point = self._frame(player_speed, opponent_player_speed)
+        for _ in range(frame_skip - 1):
+            player, opponent = self._frame(player_speed, opponent_player_speed)
+            player_point |= player
+            opponent_point |= opponent
+        return player_point, opponent_point
+
+    def _frame(self, player_speed, opponent_player_speed):
+        self.frames += 1
+        running = ~self.done
+        self.match_frames += running
+
+        if self.physics == "swept":
+            player_point, opponent_point = self._swept_ball(running)
+        else:
+            player_point, opponent_point = self._classic_ball(running)
+
+        # Paddle movement
+        self.player_y = self._clamp_paddle(rect_round(self.player_y + player_speed))
+        if opponent_player_speed is None:
+            if self.ai == "predictive":
+                self._predictive_ai()
+            else:
+                self._opponent_ai()
+        else:
+            self.opponent_y = self._clamp_paddle(rect_round(self.opponent_y + opponent_player_speed))
+
+        return player_point, opponent_point
+
+    def _swept_ball(self, running):
+        """Moves the ball with continuous collision, like the game's ``ball_animation()``."""
+        paddles = [(PLAYER_X, self.player_y, PLAYER_X + PADDLE_WIDTH, self.player_y + self.paddle_height),
+                   (OPPONENT_X, self.opponent_y, OPPONENT_X + PADDLE_WIDTH, self.opponent_y + self.paddle_height)]
+        (self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y,
+         wall_hit, (player_hit, opponent_hit), left_goal, right_goal) = sweep_ball_batch(
+            self.ball_x, self.ball_y, self.ball_speed_x, self.ball_speed_y, paddles)
+        self._ai_observe(wall_hit, new_path=False)
+        self._ai_observe(player_hit | opponent_hit)
+        self.player_hits += player_hit
+        self.opponent_hits += opponent_hit
+        player_point = left_goal & running
+        opponent_point = right_goal & running
+        self._score(player_point, opponent_point)
+        return player_point, opponent_point
+
+    def _classic_ball(self, running):
+        """The original move-then-test frame rules, with pygame.Rect rounding."""
+        left = rect_round(self.ball_x - BALL_RADIUS + self.ball_speed_x)
+        top = rect_round(self.ball_y - BALL_RADIUS + self.ball_speed_y)
+        self.ball_x = left + BALL_RADIUS
+        self.ball_y = top + BALL_RADIUS
+        wall_hit = (top <= 0) | (top + BALL_SIZE >= SCREEN_HEIGHT)
+        np.negative(self.ball_speed_y, out=self.ball_speed_y, where=wall_hit)
+        self._ai_observe(wall_hit, new_path=False)
+
+        # Scoring (the opponent's side is checked first, as the original ball_animation() did)
+        opponent_point = (left + BALL_SIZE >= SCREEN_WIDTH) & running
+        player_point = (left <= 0) & ~opponent_point & running
+        self._score(player_point, opponent_point)
+
+        # Paddle collisions (same test as Rect.colliderect)
+        left = self.ball_x - BALL_RADIUS
+        top = self.ball_y - BALL_RADIUS
+        player_hit = ((left < PLAYER_X + PADDLE_WIDTH) & (PLAYER_X < left + BALL_SIZE)
+                      & (top < self.player_y + self.paddle_height) & (self.player_y < top + BALL_SIZE))
+        np.negative(self.ball_speed_x, out=self.ball_speed_x, where=player_hit)
+        opponent_hit = ((left < OPPONENT_X + PADDLE_WIDTH) & (OPPONENT_X < left + BALL_SIZE)
+                        & (top < self.opponent_y + self.paddle_height) & (self.opponent_y < top + BALL_SIZE))
+        np.negative(self.ball_speed_x, out=self.ball_speed_x, where=opponent_hit)
+        self._ai_observe(player_hit | opponent_hit)
+        self.player_hits += player_hit
+        self.opponent_hits += opponent_hit
+        return player_point, opponent_point
+
+    def _score(self, player_point, opponent_point):
+        """Adds points, records winners and restarts the ball where a point was scored."""
+        self.opponent_score += opponent_point
+        self.player_score += player_point
+        scored = opponent_point | player_point
+        self.winner[scored & (self.player_score >= self.winning_score)] = PLAYER_WON
+        self.winner[scored & (self.opponent_score >= self.winning_score) & (self.winner == NO_WINNER)] = OPPONENT_WON
+        self._ball_restart(scored)
+
+    def _opponent_ai(self):
+        """Vectorized version of the reactive ``opponent_ai()``."""
+        tracking = self.ball_speed_x < 0
+        ball_center = rect_round(self.ball_y) # Same as ball.centery of the game's Rect
+        move_down = tracking & (self.opponent_y + self.paddle_half < ball_center)
+        self.opponent_y = np.where(move_down, rect_round(self.opponent_y + self.opponent_speed), self.opponent_y)
+        # The second check sees the position after the first move, like the original if/if
+        move_up = tracking & (self.opponent_y + self.paddle_half > ball_center)
+        self.opponent_y = np.where(move_up, rect_round(self.opponent_y - self.opponent_speed), self.opponent_y)
+        self.opponent_y = self._clamp_paddle(self.opponent_y)
+
+    def _ai_observe(self, mask, new_path=True):
+        """Vectorized ``PredictiveAI.observe()`` for the matches where the ball's path changed."""
+        if self.ai != "predictive":
+            return
+        index = np.flatnonzero(mask)
+        if index.size == 0:
+            return
+        if new_path:
+            self.ai_error[index] = self.rng.normal(0, 1, index.size) * self.prediction_noise[index]
+            self.ai_delay[index] = self.reaction_delay[index]
+        speed_x = self.ball_speed_x[index]
+        incoming = speed_x < 0
+        predicted = predict_intercept(self.ball_x[index], self.ball_y[index],
+                                      np.where(incoming, speed_x, -1), self.ball_speed_y[index], OPPONENT_INTERCEPT_X)
+        self.ai_target[index] = np.where(incoming, predicted + self.ai_error[index], SCREEN_HEIGHT / 2)
+
+    def _predictive_ai(self):
+        """Vectorized ``PredictiveAI.update()``: move toward the cached target after the reaction delay."""
+        waiting = self.ai_delay > 0
+        self.ai_delay -= waiting
+        step = np.clip(self.ai_target - (self.opponent_y + self.paddle_half), -self.opponent_speed, self.opponent_speed)
+        moved = rect_round(self.opponent_y + step)
+        self.opponent_y = self._clamp_paddle(np.where(waiting, self.opponent_y, moved))
+
+    def _clamp_paddle(self, paddle_y):
+        paddle_y = np.maximum(paddle_y, 0)
+        return np.minimum(paddle_y, SCREEN_HEIGHT - self.paddle_height)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Quick throughput check: AI opponent vs a stationary player, auto-serving
+    sim = BatchSimulation(10000)
+    steps = 2000
+    start = time.perf_counter()
+    for _ in range(steps):
+        sim.serve()
+        sim.step(0)
+    elapsed = time.perf_counter() - start
+    print(f"{sim.num_matches * steps / elapsed:,.0f} match-frames per second")
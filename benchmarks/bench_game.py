@@ -0,0 +1,206 @@
+"""Headless frame-time benchmark of the full game.
+
+Runs ping_pong.Game under the SDL dummy video/audio drivers with scripted
+keyboard input that walks through every state (start_menu, enter_name_p1/p2,
+a Player vs Player match to game_over, then a Player vs AI match). Each
+frame is split into phases by the game's profiler:
+
+    events     event handling
+    update     fixed-timestep game logic (paddles, effect timers)
+    ball       ball_animation(): ball movement and collisions
+    ai         the opponent AI
+    particles  particle update and drawing
+    text       text rendering through the text cache
+    draw       the rest of the state's drawing
+    present    screen shake, final blit and flip
+    tick       clock.tick (always ~0 here: the clock is simulated)
+
+p50/p99/mean per phase and state are written as JSON. With --compare, the
+run is checked against an earlier result and slower phases are flagged.
+
+    python benchmarks/bench_game.py --output before.json
+    python benchmarks/bench_game.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+import ping_pong
+from profiling import profiler
+from settings import UPDATES_PER_SECOND
+
+PHASES = ["events", "update", "ball", "ai", "particles", "text", "draw", "present", "tick"]
+
+
+class SimulatedClock:
+    """Stands in for pygame.time.Clock: every frame advances exactly one game update."""
+
+    def tick(self, framerate=0):
+        return 1000 / UPDATES_PER_SECOND
+
+    def get_fps(self):
+        return float(UPDATES_PER_SECOND)
+
+
+def key(name, event_type=pygame.KEYDOWN):
+    """Builds a keyboard event for key constant K_<name>."""
+    code = getattr(pygame, f"K_{name}")
+    return pygame.event.Event(event_type, key=code, unicode=name if len(name) == 1 else "")
+
+
+def build_script(frames_per_state):
+    """Returns {frame: [events]} driving the game through every state, ending with QUIT."""
+    n = frames_per_state
+    script = {}
+    frame = n # Idle on the start menu first
+
+    # Switch to Player vs Player and enter both names
+    script[frame] = [key("RIGHT"), key("SPACE")]
+    frame += n
+    script[frame] = [key("a"), key("n"), key("n")]
+    script[frame + 1] = [key("RETURN")]
+    frame += n
+    script[frame] = [key("b"), key("o"), key("b")]
+    script[frame + 1] = [key("RETURN")]
+    frame += 2
+
+    # PvP match: both paddles hide at the top so every serve scores, until game_over
+    script[frame] = [key("UP"), key("w")]
+    match_end = frame + 5 * 200
+    for serve_frame in range(frame + 1, match_end, 30):
+        script[serve_frame] = [key("SPACE")]
+    frame = match_end
+    script[frame] = [key("UP", pygame.KEYUP), key("w", pygame.KEYUP)]
+    frame += n # Idle on the game_over screen (or the end of the match)
+
+    # Back to the menu, switch to Player vs AI and play with the player chasing nothing
+    script[frame] = [key("ESCAPE")]
+    script[frame + 1] = [key("LEFT"), key("SPACE")]
+    frame += 2
+    for serve_frame in range(frame, frame + 3 * n, 30):
+        script.setdefault(serve_frame, []).append(key("SPACE"))
+    frame += 3 * n
+    script[frame] = [pygame.event.Event(pygame.QUIT)]
+    return script
+
+
+def run_game(frames_per_state):
+    """Plays the scripted session and returns the profiler's frames."""
+    script = build_script(frames_per_state)
+    frame_counter = [0]
+
+    def scripted_get():
+        pygame.event.get() # Keep SDL's own queue drained
+        events = script.get(frame_counter[0], [])
+        frame_counter[0] += 1
+        return events
+
+    profiler.enable(frame_capacity=max(script) + 1) # Keep every frame of the script
+    profiler.reset()
+    os.chdir(ROOT)
+    try:
+        game = ping_pong.Game(fps=0, quality=0) # Full effects every run, so results stay comparable
+        game.get_events = scripted_get
+        game.clock = SimulatedClock()
+        game.run() # Returns at the scripted QUIT
+    finally:
+        profiler.disable()
+        pygame.quit()
+    return profiler.frames()
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(frames):
+    """Returns {state: {phase: {p50_ms, p99_ms, mean_ms}}} including a 'frame' total per state."""
+    by_state = {}
+    for state, phases in frames:
+        samples = by_state.setdefault(state, {phase: [] for phase in PHASES + ["frame"]})
+        for phase in PHASES:
+            samples[phase].append(phases.get(phase, 0.0) * 1000)
+        samples["frame"].append(sum(phases.values()) * 1000)
+
+    summary = {}
+    for state, samples in by_state.items():
+        summary[state] = {"frames": len(samples["frame"])}
+        for phase, values in samples.items():
+            values.sort()
+            summary[state][phase] = {
+                "p50_ms": percentile(values, 0.50),
+                "p99_ms": percentile(values, 0.99),
+                "mean_ms": sum(values) / len(values),
+            }
+    return summary
+
+
+def compare(summary, baseline, threshold, min_ms):
+    """Returns a list of regressions: phases whose p50 or p99 grew by more than threshold."""
+    regressions = []
+    for state, phases in summary.items():
+        for phase, stats in phases.items():
+            if phase == "frames" or phase not in baseline.get(state, {}):
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                old, new = baseline[state][phase][metric], stats[metric]
+                if new > min_ms and new > old * (1 + threshold):
+                    regressions.append(f"{state}/{phase} {metric}: {old:.3f} -> {new:.3f} ms")
+    return regressions
+
+
+def print_summary(summary):
+    print(f"{'state':<14} {'phase':<10} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for state, phases in summary.items():
+        for phase in PHASES + ["frame"]:
+            stats = phases[phase]
+            print(f"{state:<14} {phase:<10} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f} {stats['mean_ms']:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames-per-state", type=int, default=300, help="frames spent idling in each scripted state")
+    parser.add_argument("--output", default="bench_game.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier JSON result to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed slowdown before flagging (0.20 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore phases faster than this")
+    options = parser.parse_args()
+
+    output = os.path.abspath(options.output)
+    baseline_path = os.path.abspath(options.compare) if options.compare else None
+    summary = summarize(run_game(options.frames_per_state))
+    print_summary(summary)
+
+    result = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "states": summary,
+    }
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as file:
+            baseline = json.load(file)["states"]
+        regressions = compare(summary, baseline, options.threshold, options.min_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Frame cost of the particle effect at 10, 1,000 and 10,000 live particles.
+
+Compares the ParticlePool against the old list-of-dicts implementation.
+Each frame updates, draws and respawns particles so the live count stays
+roughly constant, just like a long rally.
+
+    python benchmarks/bench_particles.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from particles import ParticlePool
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+LIGHT_GREY = (200, 200, 200)
+CENTER = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+FRAMES = 200
+
+
+def legacy_frame(particles, surface, target):
+    """One frame of the previous per-dict particle code."""
+    for i in range(len(particles) - 1, -1, -1):
+        particle = particles[i]
+        particle['pos'][0] += particle['vel'][0]
+        particle['pos'][1] += particle['vel'][1]
+        particle['life'] -= 1
+        if particle['life'] <= 0:
+            particles.pop(i)
+        else:
+            size = particle['life'] * 0.5
+            pygame.draw.rect(surface, LIGHT_GREY, (particle['pos'][0] - size/2, particle['pos'][1] - size/2, size, size))
+    while len(particles) < target:
+        particles.append({
+            'pos': list(CENTER),
+            'vel': [random.uniform(-3, 3), random.uniform(-3, 3)],
+            'life': random.randint(10, 20)
+        })
+
+
+def pool_frame(pool, surface, target):
+    """One frame of the ParticlePool."""
+    pool.update()
+    pool.draw(surface)
+    pool.spawn(CENTER, target - pool.count)
+
+
+def time_frames(frame, state, surface, target):
+    for _ in range(FRAMES // 4): # Warm up to the steady-state particle count
+        frame(state, surface, target)
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        frame(state, surface, target)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"{'particles':>10} {'list of dicts (ms)':>20} {'ParticlePool (ms)':>20}")
+    for target in (10, 1000, 10000):
+        legacy_ms = time_frames(legacy_frame, [], surface, target)
+        pool_ms = time_frames(pool_frame, ParticlePool(capacity=target, color=LIGHT_GREY), surface, target)
+        print(f"{target:>10,} {legacy_ms:>20.3f} {pool_ms:>20.3f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
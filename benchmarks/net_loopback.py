@@ -0,0 +1,233 @@
+"""Online play over loopback with injected latency and jitter.
+
+Starts a GameServer and a proxy in front of it that delays every chunk of
+data by ``--latency`` ms plus up to ``--jitter`` ms either way (in order,
+like TCP). Bot clients connect through the proxy in pairs; each bot chases
+the ball it sees and serves when asked, stepping its NetworkClient from one
+shared 60 Hz loop, just like the game would.
+
+The server's true state is recorded every update, so the run reports how
+far the clients' view is off from it:
+
+- prediction error: a bot's predicted own paddle against the server's
+  position for the same client update
+- interpolation error: the ball as drawn against the server's ball at the
+  (fractional) update it is drawn at
+- input latency: time from sending a direction change until a snapshot
+  acknowledges it
+- score mismatches: snapshots whose score differs from the server's at
+  that update
+- server update time and bytes per second in each direction
+
+tests/test_net_loopback.py runs a short loopback and checks these numbers.
+
+    python benchmarks/net_loopback.py --matches 20 --latency 80 --jitter 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import network
+from network import GameServer, NetworkClient, Match, RIGHT, SCORED
+from ping_pong import GameSession
+from settings import PADDLE_HEIGHT, UPDATES_PER_SECOND
+
+
+class LatencyProxy:
+    """Forwards TCP connections to a server, delaying everything sent either way."""
+
+    def __init__(self, target_port, latency, jitter, seed=None):
+        self.target_port = target_port
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+        await asyncio.gather(self.pipe(client_reader, server_writer), self.pipe(server_reader, client_writer))
+
+    async def pipe(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        last = 0.0 # Delivery time of the previous chunk; later chunks never overtake it
+        try:
+            while data := await reader.read(65536):
+                delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+                last = max(last, loop.time() + delay)
+                loop.call_at(last, writer.write, data)
+        except ConnectionError:
+            pass
+        await asyncio.sleep(max(0, last - loop.time()))
+        writer.close()
+
+
+class Bot:
+    """A NetworkClient plus a player that chases the ball it is shown."""
+
+    def __init__(self, name):
+        self.client = NetworkClient(name)
+        self.session = GameSession()
+        self.predicted = {} # Client update -> predicted own paddle top
+        self.drawn_ball = [] # (server update drawn at, ball center) while playing
+        self.pending_inputs = [] # (client update, send time) not acknowledged yet
+        self.input_latencies = []
+        self.scores = {} # Server update -> (right score, left score) received
+
+    def update(self):
+        client, session = self.client, self.session
+        if session.game_state == "playing":
+            own = session.player if client.side == RIGHT else session.opponent
+            target = session.ball.centery
+            direction = 1 if own.centery < target - PADDLE_HEIGHT / 4 else -1 if own.centery > target + PADDLE_HEIGHT / 4 else 0
+            if direction != client.direction:
+                self.pending_inputs.append((client.updates + 1, time.perf_counter()))
+            client.set_direction(direction)
+            if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+                client.serve()
+
+        client.update(session)
+        for snapshot in client.snapshots:
+            self.scores[snapshot[0]] = snapshot[6:8]
+        if client.snapshots:
+            ack = client.snapshots[-1][1]
+            while self.pending_inputs and self.pending_inputs[0][0] <= ack:
+                self.input_latencies.append(time.perf_counter() - self.pending_inputs.pop(0)[1])
+        if session.game_state == "playing":
+            own = session.player if client.side == RIGHT else session.opponent
+            self.predicted[client.updates] = own.y
+            self.drawn_ball.append((client.render_update, session.ball_position))
+
+
+def record_truth(truth, paddles, scores):
+    """Patches Match.update to store the server's state after every update, per player name.
+
+    Returns the original Match.update, to put back when done.
+    """
+    update = Match.update
+
+    def recording_update(match):
+        update(match)
+        if match.state != network.PLAYING:
+            return
+        session = match.session
+        ball = (session.ball_position, match.events & SCORED)
+        for player in match.players:
+            truth.setdefault(player.name, {})[match.updates] = ball
+            paddle = session.player if player.side == RIGHT else session.opponent
+            paddles.setdefault(player.name, {})[player.ack] = paddle.y
+            scores.setdefault(player.name, {})[match.updates] = (session.player_score, session.opponent_score)
+
+    Match.update = recording_update
+    return update
+
+
+def ball_errors(bot, match_truth):
+    """Distance between the drawn ball and the server's ball at the same moment, skipping points scored."""
+    errors = []
+    for render_update, (x, y) in bot.drawn_ball:
+        first = int(render_update)
+        if first not in match_truth or first + 1 not in match_truth or match_truth[first + 1][1]:
+            continue
+        (x0, y0), _ = match_truth[first]
+        (x1, y1), _ = match_truth[first + 1]
+        alpha = render_update - first
+        errors.append(np.hypot(x - (x0 + (x1 - x0) * alpha), y - (y0 + (y1 - y0) * alpha)))
+    return errors
+
+
+def percentiles(values, scale=1.0):
+    if not values:
+        return "n/a"
+    values = np.asarray(values) * scale
+    return f"mean {values.mean():6.2f}  p50 {np.percentile(values, 50):6.2f}  p99 {np.percentile(values, 99):6.2f}"
+
+
+async def run(matches, latency, jitter, seconds, seed):
+    """Plays the matches for ``seconds`` through the proxy. Returns a dict of measurements for report()."""
+    truth, paddles, scores = {}, {}, {}
+    update = record_truth(truth, paddles, scores)
+    try:
+        return await play(matches, latency, jitter, seconds, seed, truth, paddles, scores)
+    finally:
+        Match.update = update
+
+
+async def play(matches, latency, jitter, seconds, seed, truth, paddles, scores):
+    server = GameServer()
+    await server.start("127.0.0.1", 0)
+    proxy = LatencyProxy(server.server.sockets[0].getsockname()[1], latency / 1000, jitter / 1000, seed)
+    proxy_port = await proxy.start()
+
+    bots = [Bot(f"bot{i}") for i in range(matches * 2)]
+    for bot in bots:
+        asyncio.create_task(bot.client.run("127.0.0.1", proxy_port))
+
+    loop = asyncio.get_running_loop()
+    start = next_time = loop.time()
+    while loop.time() - start < seconds:
+        for bot in bots:
+            bot.update()
+        next_time += 1 / UPDATES_PER_SECOND
+        await asyncio.sleep(max(0, next_time - loop.time()))
+    elapsed = loop.time() - start
+    for bot in bots:
+        bot.client.writer.close()
+    await asyncio.sleep((latency + jitter) / 1000 + 0.1) # Let the proxy and server see the disconnects
+    await server.close()
+    proxy.server.close()
+
+    results = {"bots": bots, "elapsed": elapsed, "update_times": list(server.update_times), "prediction_errors": [],
+               "interpolation_errors": [], "input_latencies": [], "score_checks": 0, "score_mismatches": 0}
+    for bot in bots:
+        server_paddle = paddles.get(bot.client.name, {})
+        results["prediction_errors"] += [abs(y - server_paddle[update]) for update, y in bot.predicted.items()
+                                         if update in server_paddle]
+        results["interpolation_errors"] += ball_errors(bot, truth.get(bot.client.name, {}))
+        results["input_latencies"] += bot.input_latencies
+        server_scores = scores.get(bot.client.name, {})
+        checked = [update for update in bot.scores if update in server_scores]
+        results["score_checks"] += len(checked)
+        results["score_mismatches"] += sum(bot.scores[update] != server_scores[update] for update in checked)
+    return results
+
+
+def report(results, matches, latency, jitter):
+    bots, elapsed = results["bots"], results["elapsed"]
+    prediction_errors = results["prediction_errors"]
+    print(f"{matches} matches, {len(bots)} clients, {latency:g} ms latency +/- {jitter:g} ms jitter, {elapsed:.1f}s")
+    print(f"server update (ms)        {percentiles(results['update_times'], 1000)}")
+    print(f"prediction error (px)     {percentiles(prediction_errors)}  "
+          f"mispredicted {np.count_nonzero(prediction_errors) / max(1, len(prediction_errors)):.1%}")
+    print(f"interpolation error (px)  {percentiles(results['interpolation_errors'])}")
+    print(f"input latency (ms)        {percentiles(results['input_latencies'], 1000)}")
+    print(f"score mismatches          {results['score_mismatches']} of {results['score_checks']} snapshots")
+    down = sum(bot.client.bytes_received for bot in bots) / len(bots) / elapsed
+    up = sum(bot.client.bytes_sent for bot in bots) / len(bots) / elapsed
+    print(f"per client: {down:,.0f} bytes/s down, {up:,.0f} bytes/s up")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online play over loopback with injected latency and jitter")
+    parser.add_argument("--matches", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=50, help="one-way delay in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="random extra delay in ms, either way")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, help="seed for the injected jitter")
+    options = parser.parse_args()
+    results = asyncio.run(run(options.matches, options.latency, options.jitter, options.seconds, options.seed))
+    report(results, options.matches, options.latency, options.jitter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Swept (continuous) collision detection for the ball.
+
+Moving the ball first and testing for overlap afterwards lets a fast ball
+skip over a paddle, or stay inside one and bounce on several frames in a
+row. Here the ball is instead moved along its path for a whole step: the
+exact time of impact with every wall, goal line and paddle is computed, the
+earliest one is resolved, and the rest of the step continues from there, so
+several bounces can happen in one step and the result does not depend on
+the step size.
+
+The ball is treated as a square of half-size ``BALL_RADIUS`` (the same box
+as its pygame.Rect) and positions are centers. ``sweep_ball`` works on plain
+numbers for the game; ``sweep_ball_batch`` is the same algorithm on NumPy
+arrays for the batch simulation.
+"""
+import math
+
+import numpy as np
+
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, BALL_RADIUS
+
+MAX_BOUNCES = 8 # Collisions resolved per step before the rest of the step is moved freely
+
+# Event kinds reported by sweep_ball
+WALL = "wall"
+LEFT_GOAL = "left_goal" # Ball reached the left edge: the player scores
+RIGHT_GOAL = "right_goal" # Ball reached the right edge: the opponent scores
+
+
+def _paddle_entry(x, y, speed_x, speed_y, left, top, right, bottom):
+    """Returns (time, hits_front_face) of the ball entering a paddle, or None if it doesn't this step."""
+    # Grow the paddle by the ball's half-size so the ball can be treated as a point
+    left -= BALL_RADIUS
+    top -= BALL_RADIUS
+    right += BALL_RADIUS
+    bottom += BALL_RADIUS
+    if speed_x != 0:
+        t1 = (left - x) / speed_x
+        t2 = (right - x) / speed_x
+        enter_x, exit_x = min(t1, t2), max(t1, t2)
+    elif left < x < right:
+        enter_x, exit_x = -math.inf, math.inf
+    else:
+        return None
+    if speed_y != 0:
+        t1 = (top - y) / speed_y
+        t2 = (bottom - y) / speed_y
+        enter_y, exit_y = min(t1, t2), max(t1, t2)
+    elif top < y < bottom:
+        enter_y, exit_y = -math.inf, math.inf
+    else:
+        return None
+    enter = max(enter_x, enter_y)
+    # Only count the ball entering from outside; a ball already inside is let out instead of bouncing again
+    if enter < 0 or enter > min(exit_x, exit_y):
+        return None
+    return enter, enter_x >= enter_y
+
+
+def _paddle_push_out(x, y, speed_x, left, top, right, bottom):
+    """Returns the x of the face to push the ball out to, if a paddle moved onto it and it is heading through; else None."""
+    left -= BALL_RADIUS
+    top -= BALL_RADIUS
+    right += BALL_RADIUS
+    bottom += BALL_RADIUS
+    if not (left < x < right and top < y < bottom):
+        return None
+    center = (left + right) / 2
+    if speed_x > 0 and x < center:
+        return left
+    if speed_x < 0 and x > center:
+        return right
+    return None # Already on its way out
+
+
+def sweep_ball(x, y, speed_x, speed_y, paddles, duration=1.0, contacts=None):
+    """Moves the ball for ``duration`` updates, bouncing off walls and paddles at their exact time of impact.
+
+    ``paddles`` maps a name to a pygame.Rect. Returns the new center, the new
+    speeds and the list of events in the order they happened: WALL, a paddle
+    name, or a goal (LEFT_GOAL / RIGHT_GOAL, which ends the sweep). If
+    ``contacts`` is a list, (time into the step, center x, center y, speed x,
+    speed y after the bounce) of each event is appended to it, in the same
+    order.
+
+    A ball that starts the step inside a paddle (the paddle moved onto it)
+    and is heading through it is pushed out of the face it came from and
+    bounced back, instead of passing through.
+    """
+    events = []
+    remaining = duration
+    if duration > 0:
+        for name, paddle in paddles.items():
+            face = _paddle_push_out(x, y, speed_x, paddle.left, paddle.top, paddle.right, paddle.bottom)
+            if face is not None:
+                x, speed_x = face, -speed_x
+                events.append(name)
+                if contacts is not None:
+                    contacts.append((0.0, x, y, speed_x, speed_y))
+    for _ in range(MAX_BOUNCES):
+        hit_time = remaining
+        hit = None
+
+        # Top and bottom walls
+        if speed_y < 0:
+            t = max((y - BALL_RADIUS) / -speed_y, 0)
+            if t < hit_time:
+                hit_time, hit = t, WALL
+        elif speed_y > 0:
+            t = max((SCREEN_HEIGHT - BALL_RADIUS - y) / speed_y, 0)
+            if t < hit_time:
+                hit_time, hit = t, WALL
+
+        # Goal lines
+        if speed_x < 0:
+            t = max((x - BALL_RADIUS) / -speed_x, 0)
+            if t < hit_time:
+                hit_time, hit = t, LEFT_GOAL
+        elif speed_x > 0:
+            t = max((SCREEN_WIDTH - BALL_RADIUS - x) / speed_x, 0)
+            if t < hit_time:
+                hit_time, hit = t, RIGHT_GOAL
+
+        # Paddles
+        front_face = False
+        for name, paddle in paddles.items():
+            entry = _paddle_entry(x, y, speed_x, speed_y, paddle.left, paddle.top, paddle.right, paddle.bottom)
+            if entry is not None and entry[0] < hit_time:
+                hit_time, front_face = entry
+                hit = name
+
+        x += speed_x * hit_time
+        y += speed_y * hit_time
+        remaining -= hit_time
+        if hit is None:
+            return x, y, speed_x, speed_y, events
+
+        events.append(hit)
+        if hit not in (LEFT_GOAL, RIGHT_GOAL):
+            if hit == WALL or not front_face:
+                speed_y = -speed_y # Walls and the top/bottom edges of paddles
+            else:
+                speed_x = -speed_x
+        if contacts is not None:
+            contacts.append((duration - remaining, x, y, speed_x, speed_y))
+        if hit in (LEFT_GOAL, RIGHT_GOAL):
+            return x, y, speed_x, speed_y, events
+
+    # Out of bounces: move the rest of the step without further collisions
+    return x + speed_x * remaining, y + speed_y * remaining, speed_x, speed_y, events
+
+
+def sweep_ball_batch(x, y, speed_x, speed_y, paddles, duration=1.0):
+    """``sweep_ball`` for arrays of balls, one per match.
+
+    ``paddles`` is a sequence of (left, top, right, bottom) tuples of arrays
+    (or scalars). Returns x, y, speed_x, speed_y, a mask of wall bounces, one
+    mask of hits per paddle, and the LEFT_GOAL and RIGHT_GOAL masks. Balls
+    that reached a goal stop at the goal line.
+    """
+    x, y = x.astype(np.float64), y.astype(np.float64)
+    speed_x, speed_y = speed_x.astype(np.float64), speed_y.astype(np.float64)
+    remaining = np.broadcast_to(np.asarray(duration, dtype=np.float64), x.shape).copy()
+    wall_hit = np.zeros(x.shape, dtype=bool)
+    paddle_hits = [np.zeros(x.shape, dtype=bool) for _ in paddles]
+    left_goal = np.zeros(x.shape, dtype=bool)
+    right_goal = np.zeros(x.shape, dtype=bool)
+    active = (remaining > 0) & ((speed_x != 0) | (speed_y != 0))
+
+    # Push balls out of paddles that moved onto them, like sweep_ball
+    for i, (left, top, right, bottom) in enumerate(paddles):
+        left = left - BALL_RADIUS
+        right = right + BALL_RADIUS
+        inside = active & (left < x) & (x < right) & (top - BALL_RADIUS < y) & (y < bottom + BALL_RADIUS)
+        center = (left + right) / 2
+        push_left = inside & (speed_x > 0) & (x < center)
+        push_right = inside & (speed_x < 0) & (x > center)
+        x = np.where(push_left, left, np.where(push_right, right, x))
+        np.negative(speed_x, out=speed_x, where=push_left | push_right)
+        paddle_hits[i] |= push_left | push_right
+
+    # Hit kinds: -1 none, 0 wall, 1 left goal, 2 right goal, 3 + 2*i paddle i front face, 4 + 2*i paddle edge
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(MAX_BOUNCES):
+            if not active.any():
+                break
+            hit_time = remaining.copy()
+            hit = np.full(x.shape, -1)
+
+            t = np.where(speed_y < 0, np.maximum((y - BALL_RADIUS) / -speed_y, 0),
+                         np.where(speed_y > 0, np.maximum((SCREEN_HEIGHT - BALL_RADIUS - y) / speed_y, 0), np.inf))
+            closer = t < hit_time
+            hit_time = np.where(closer, t, hit_time)
+            hit[closer] = 0
+
+            left_t = np.where(speed_x < 0, np.maximum((x - BALL_RADIUS) / -speed_x, 0), np.inf)
+            right_t = np.where(speed_x > 0, np.maximum((SCREEN_WIDTH - BALL_RADIUS - x) / speed_x, 0), np.inf)
+            for kind, t in ((1, left_t), (2, right_t)):
+                closer = t < hit_time
+                hit_time = np.where(closer, t, hit_time)
+                hit[closer] = kind
+
+            for i, (left, top, right, bottom) in enumerate(paddles):
+                left = left - BALL_RADIUS
+                top = top - BALL_RADIUS
+                right = right + BALL_RADIUS
+                bottom = bottom + BALL_RADIUS
+                t1 = (left - x) / speed_x
+                t2 = (right - x) / speed_x
+                still_x = (left < x) & (x < right)
+                enter_x = np.where(speed_x != 0, np.minimum(t1, t2), np.where(still_x, -np.inf, np.inf))
+                exit_x = np.where(speed_x != 0, np.maximum(t1, t2), np.where(still_x, np.inf, -np.inf))
+                t1 = (top - y) / speed_y
+                t2 = (bottom - y) / speed_y
+                still_y = (top < y) & (y < bottom)
+                enter_y = np.where(speed_y != 0, np.minimum(t1, t2), np.where(still_y, -np.inf, np.inf))
+                exit_y = np.where(speed_y != 0, np.maximum(t1, t2), np.where(still_y, np.inf, -np.inf))
+                enter = np.maximum(enter_x, enter_y)
+                closer = (enter >= 0) & (enter <= np.minimum(exit_x, exit_y)) & (enter < hit_time)
+                hit_time = np.where(closer, enter, hit_time)
+                hit[closer] = np.where(enter_x >= enter_y, 3 + 2 * i, 4 + 2 * i)[closer]
+
+            hit_time = np.where(active, hit_time, 0)
+            x += speed_x * hit_time
+            y += speed_y * hit_time
+            remaining -= hit_time
+            hit[~active] = -1
+
+            wall_hit |= hit == 0
+            left_goal |= hit == 1
+            right_goal |= hit == 2
+            for i in range(len(paddles)):
+                paddle_hits[i] |= (hit == 3 + 2 * i) | (hit == 4 + 2 * i)
+            flip_y = (hit == 0) | ((hit >= 4) & (hit % 2 == 0))
+            flip_x = (hit >= 3) & (hit % 2 == 1)
+            np.negative(speed_y, out=speed_y, where=flip_y)
+            np.negative(speed_x, out=speed_x, where=flip_x)
+            active &= (hit >= 0) & (hit != 1) & (hit != 2) # Stop at goals and when the step is used up
+
+    # Out of bounces: move the rest of the step without further collisions
+    moving = ~(left_goal | right_goal)
+    x += np.where(moving, speed_x * remaining, 0)
+    y += np.where(moving, speed_y * remaining, 0)
+    return x, y, speed_x, speed_y, wall_hit, paddle_hits, left_goal, right_goal
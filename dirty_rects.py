@@ -0,0 +1,90 @@
+"""Dirty-rectangle presentation of the display surface.
+
+The game still draws every frame into ``display_surface``, but instead of
+copying the whole surface to the window and flipping, only the regions
+marked as changed are copied and pushed with ``pygame.display.update``.
+A region has to be pushed on the frame something is drawn there and on the
+frame after, so the old position gets erased; both are tracked here.
+
+When ``display_surface`` is not the window's size (a lower or higher
+internal resolution, a resized window or fullscreen), it is scaled to the
+largest rect of the same aspect ratio that fits in the window, centered,
+and dirty regions are scaled with it.
+"""
+import pygame
+
+from viewport import fit_rect, scale_rect
+
+
+class DirtyRectRenderer:
+    """Collects changed regions each frame and presents only those."""
+
+    def __init__(self, screen, bg_color, enabled=True, smooth=False):
+        self.screen = screen
+        self.bg_color = bg_color
+        self.enabled = enabled
+        self.smooth = smooth # Scale with smoothscale (filtered) instead of scale (nearest pixel)
+        self.screen_rect = screen.get_rect()
+        self.output = None # Where the source goes in the window, recomputed when either size changes
+        self.source_size = None
+        self.scaled = None # The source scaled to the output size (only when the sizes differ)
+        self.current_rects = []
+        self.previous_rects = []
+        self.scene_key = None
+        self.force_full = True # The first frame always has to be presented in full
+
+    def begin_frame(self, scene_key):
+        """Starts a frame. Any change of scene_key (state, menu values...) triggers a full redraw."""
+        if scene_key != self.scene_key:
+            self.scene_key = scene_key
+            self.force_full = True
+
+    def mark(self, rect):
+        """Records a region of the display surface that was drawn this frame."""
+        if rect is not None:
+            self.current_rects.append(pygame.Rect(rect))
+
+    def discard(self):
+        """Forgets the regions of a frame that is not presented (drawn only to be read back)."""
+        self.current_rects = []
+
+    def fit(self, source):
+        """Updates the output rect if the window (resized or fullscreen) or the source changed size."""
+        if self.screen.get_size() == self.screen_rect.size and source.get_size() == self.source_size:
+            return
+        self.screen_rect = self.screen.get_rect()
+        self.source_size = source.get_size()
+        self.output = fit_rect(self.source_size, self.screen_rect.size)
+        self.scaled = None if self.output.size == self.source_size else pygame.Surface(self.output.size, 0, source)
+        self.force_full = True
+
+    def present(self, source, offset=(0, 0), full=False):
+        """Copies source to the screen, either in full or only the dirty regions. offset is in source pixels."""
+        self.fit(source)
+        output = self.output
+        if self.scaled is not None:
+            # Everything is scaled once, then copied like an unscaled source placed at the output rect
+            scale = pygame.transform.smoothscale if self.smooth else pygame.transform.scale
+            scale(source, output.size, self.scaled)
+            offset = (round(offset[0] * output.width / source.get_width()),
+                      round(offset[1] * output.height / source.get_height()))
+            source = self.scaled
+        shaken = tuple(offset) != (0, 0)
+        if not self.enabled or full or self.force_full or shaken:
+            self.screen.fill(self.bg_color)
+            self.screen.blit(source, output.move(offset))
+            pygame.display.flip()
+            # A shaken or flashed frame changes the whole window, so the next one must be full too
+            self.force_full = shaken or full
+        else:
+            scale_x = output.width / self.source_size[0]
+            scale_y = output.height / self.source_size[1]
+            dirty = [scale_rect(rect, scale_x, scale_y, output.topleft).clip(output)
+                     for rect in self.previous_rects + self.current_rects]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+            for rect in dirty:
+                self.screen.blit(source, rect, rect.move(-output.x, -output.y))
+            pygame.display.update(dirty)
+
+        self.previous_rects = self.current_rects
+        self.current_rects = []
@@ -0,0 +1,478 @@
+"""Networked Player vs Player with an authoritative server.
+
+The server runs the real game: every match is a GameSession in "Player vs
+Player" mode, and one asyncio task steps all matches in the process at
+UPDATES_PER_SECOND. Clients never send positions. They send only changes
+of their paddle direction and serve requests, and receive a fixed-size
+binary snapshot of their match every few updates.
+
+To hide latency, a client predicts its own paddle: it starts from the
+position in the latest snapshot and re-applies its own input for every
+update the server has not processed yet. The ball and the other paddle
+are drawn a few updates in the past, interpolated between the two
+snapshots around that moment.
+
+Every message is a one-byte type followed by a fixed-size struct:
+
+    client -> server   JOIN      client update, name
+                       INPUT     client update the input applies from, direction (-1, 0, 1)
+                       SERVE     client update
+    server -> client   START     side, right player's name, left player's name
+                       SNAPSHOT  server update, acknowledged client update, ball center,
+                                 paddle tops, scores, match state, event flags
+
+The acknowledged client update says which of the client's updates the
+snapshot's paddle position corresponds to, which is what prediction
+needs to know which inputs to re-apply. The server counts client updates
+along with its own, a few behind the client, and applies each input on
+the update it was made for; only an input that still arrives too late
+moves that count back.
+
+    python ping_pong.py --server                       # host matches on port 5555
+    python ping_pong.py --connect HOST --name Ann       # join (or open) a match
+"""
+import asyncio
+import struct
+import threading
+import time
+from collections import deque
+
+from settings import SCREEN_HEIGHT, PADDLE_HEIGHT, PADDLE_SPEED, UPDATES_PER_SECOND
+from collision import WALL, LEFT_GOAL, RIGHT_GOAL
+from ping_pong import GameSession, game_modes
+
+DEFAULT_PORT = 5555
+TIMESTEP = 1 / UPDATES_PER_SECOND
+SNAPSHOT_INTERVAL = 2 # Updates between snapshots (30 per second)
+INTERPOLATION_DELAY = 6 # Updates the ball and the other paddle are drawn in the past
+INPUT_DELAY = 2 # Updates the server holds inputs back, so jitter doesn't make them arrive late
+HISTORY_SIZE = 2 * UPDATES_PER_SECOND # Inputs a client keeps for prediction (covers a 2 s round trip)
+MAX_CATCH_UP = 5 # Updates the server runs back to back after falling behind, before skipping ahead
+MAX_WRITE_BUFFER = 4096 # Bytes queued for a client before its snapshots are dropped
+NAME_SIZE = 40
+
+# Message types and payloads
+MSG_JOIN = b"J"
+MSG_INPUT = b"I"
+MSG_SERVE = b"S"
+MSG_START = b"M"
+MSG_SNAPSHOT = b"T"
+JOIN = struct.Struct(f"<I{NAME_SIZE}s")
+INPUT = struct.Struct("<Ib")
+SERVE = struct.Struct("<I")
+START = struct.Struct(f"<B{NAME_SIZE}s{NAME_SIZE}s")
+SNAPSHOT = struct.Struct("<IiffhhBBBB") # The acknowledged update is negative until the first one is reached
+CLIENT_MESSAGES = {MSG_JOIN: JOIN, MSG_INPUT: INPUT, MSG_SERVE: SERVE}
+SERVER_MESSAGES = {MSG_START: START, MSG_SNAPSHOT: SNAPSHOT}
+
+# Sides; the right paddle is the session's "player", the left one its "opponent"
+RIGHT = 0
+LEFT = 1
+
+# Match states sent in snapshots
+WAITING = 0 # For a second player
+PLAYING = 1
+GAME_OVER = 2
+ABANDONED = 3 # The other player left
+
+# Event flags sent in snapshots (everything that happened since the previous snapshot)
+SERVE_WAIT = 1 # Ball stopped at the center, waiting for a serve
+WALL_HIT = 2
+RIGHT_HIT = 4
+LEFT_HIT = 8
+SCORED = 16
+
+
+async def read_message(reader, messages):
+    """Reads one message. Returns (type, fields)."""
+    kind = await reader.readexactly(1)
+    payload = messages.get(kind)
+    if payload is None:
+        raise ConnectionError(f"Unknown message type {kind!r}")
+    return kind, payload.unpack(await reader.readexactly(payload.size))
+
+
+def encode_name(name):
+    return name.encode("utf-8")[:NAME_SIZE]
+
+
+def decode_name(data):
+    return data.rstrip(b"\0").decode("utf-8", errors="replace")
+
+
+def clamp_paddle(y):
+    """Keeps a paddle top on screen, like player_animation()."""
+    return max(0, min(y, SCREEN_HEIGHT - PADDLE_HEIGHT))
+
+
+# --- Server ---
+
+class RemotePlayer:
+    """A connected client, as seen by the server."""
+
+    def __init__(self, writer, name, client_update):
+        self.writer = writer
+        self.name = name
+        self.side = None
+        self.direction = 0
+        self.inputs = deque() # (client update, direction) waiting for their update
+        self.ack = client_update - INPUT_DELAY # Client update that the server's state of this paddle corresponds to
+        self.bytes_sent = 0
+
+    def send(self, data, droppable=False):
+        # Snapshots replace each other, so a client that can't keep up just misses some
+        if droppable and self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            return
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+
+class Match:
+    """One authoritative match between two RemotePlayers."""
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.session = GameSession() # Silent, and never draws
+        self.session.current_mode_index = game_modes.index("Player vs Player")
+        self.players = []
+        self.state = WAITING
+        self.updates = 0
+        self.events = 0 # Event flags not sent yet
+
+    def join(self, player):
+        player.side = len(self.players)
+        self.players.append(player)
+        if len(self.players) == 2:
+            self.start()
+
+    def start(self):
+        session = self.session
+        session.player_1_name = self.players[RIGHT].name
+        session.player_2_name = self.players[LEFT].name
+        session.reset_game()
+        self.state = PLAYING
+        for player in self.players:
+            player.send(MSG_START + START.pack(player.side, encode_name(session.player_1_name),
+                                               encode_name(session.player_2_name)))
+
+    def update(self):
+        """Advances the match by one fixed timestep."""
+        self.updates += 1
+        for player in self.players:
+            player.ack += 1
+            while player.inputs and player.inputs[0][0] <= player.ack:
+                player.direction = player.inputs.popleft()[1]
+        if self.state != PLAYING:
+            return
+
+        session = self.session
+        session.player_speed = self.players[RIGHT].direction * PADDLE_SPEED
+        session.opponent_player_speed = self.players[LEFT].direction * PADDLE_SPEED
+        session.update()
+
+        for event in session.ball_events:
+            if event == WALL:
+                self.events |= WALL_HIT
+            elif event in (LEFT_GOAL, RIGHT_GOAL):
+                self.events |= SCORED
+            else:
+                self.events |= RIGHT_HIT if event == "player" else LEFT_HIT
+        if session.game_state == "game_over":
+            self.state = GAME_OVER
+
+    def serve(self):
+        session = self.session
+        if self.state == PLAYING and session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            session.serve_ball()
+
+    def snapshot(self, player):
+        session = self.session
+        events = self.events
+        if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            events |= SERVE_WAIT
+        return MSG_SNAPSHOT + SNAPSHOT.pack(self.updates, player.ack, session.ball_position[0], session.ball_position[1],
+                                            session.player.y, session.opponent.y, session.player_score,
+                                            session.opponent_score, self.state, events)
+
+    def send_snapshots(self):
+        for player in self.players:
+            player.send(self.snapshot(player), droppable=True)
+        self.events = 0
+
+
+class GameServer:
+    """Hosts any number of matches in one process; players are paired in the order they join."""
+
+    def __init__(self, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+        self.matches = {}
+        self.waiting = None # Match with one player, waiting for a second
+        self.next_match_id = 1
+        self.updates = 0
+        self.update_times = deque(maxlen=600) # Seconds spent per server update, for tools
+        self.server = None
+        self.update_task = None
+
+    async def start(self, host="0.0.0.0", port=DEFAULT_PORT):
+        """Starts accepting players and stepping matches. Returns the asyncio server."""
+        self.server = await asyncio.start_server(self.handle_player, host, port)
+        self.update_task = asyncio.create_task(self.run_updates())
+        return self.server
+
+    async def serve_forever(self, host="0.0.0.0", port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        self.update_task.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_player(self, reader, writer):
+        player = match = None
+        try:
+            kind, (client_update, name) = await read_message(reader, CLIENT_MESSAGES)
+            if kind != MSG_JOIN:
+                raise ConnectionError("Expected JOIN")
+            player = RemotePlayer(writer, decode_name(name) or "Player", client_update)
+            match = self.waiting
+            if match is None:
+                match = Match(self.next_match_id)
+                self.next_match_id += 1
+                self.matches[match.match_id] = match
+                self.waiting = match
+            match.join(player)
+            if match.state != WAITING:
+                self.waiting = None
+
+            while True:
+                kind, fields = await read_message(reader, CLIENT_MESSAGES)
+                if kind == MSG_INPUT:
+                    client_update, direction = fields
+                    if client_update <= player.ack:
+                        # Too late for its update: count from here, INPUT_DELAY behind again
+                        player.ack = client_update - 1 - INPUT_DELAY
+                        player.inputs.clear()
+                        player.direction = max(-1, min(direction, 1))
+                    else:
+                        player.inputs.append((client_update, max(-1, min(direction, 1))))
+                elif kind == MSG_SERVE:
+                    match.serve()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if match is not None:
+                self.leave(match, player)
+            writer.close()
+
+    def leave(self, match, player):
+        """Ends a match when one of its players disconnects."""
+        if self.waiting is match:
+            self.waiting = None
+        self.matches.pop(match.match_id, None)
+        if match.state in (WAITING, PLAYING):
+            match.state = ABANDONED
+        for other in match.players:
+            if other is not player and not other.writer.is_closing():
+                other.send(match.snapshot(other))
+                other.writer.close()
+
+    def update(self):
+        """Advances every match by one update and sends snapshots when they are due."""
+        start = time.perf_counter()
+        self.updates += 1
+        send = self.updates % self.snapshot_interval == 0
+        for match in self.matches.values():
+            match.update()
+            if send:
+                match.send_snapshots()
+        self.update_times.append(time.perf_counter() - start)
+
+    async def run_updates(self):
+        """Steps the matches at a fixed rate, like the game's accumulator loop."""
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            behind = 0
+            while loop.time() >= next_time and behind < MAX_CATCH_UP:
+                self.update()
+                next_time += TIMESTEP
+                behind += 1
+            if behind == MAX_CATCH_UP:
+                next_time = loop.time() # Too far behind: skip ahead rather than spiral
+            await asyncio.sleep(max(0, next_time - loop.time()))
+
+
+# --- Client ---
+
+class NetworkClient:
+    """Connection to a GameServer plus the client-side prediction and interpolation.
+
+    ``run()`` reads messages on an asyncio loop (in a background thread for
+    the game, see ``start_thread()``). The game calls ``update(session)`` once
+    per fixed update; it writes the predicted and interpolated state into a
+    GameSession that the normal drawing code then shows.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.side = None
+        self.names = ("", "")
+        self.snapshots = deque(maxlen=32) # Newest last; appended by the network loop
+        self.closed = False
+        self.loop = None
+        self.writer = None
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+        self.updates = 0 # Local updates so far; the numbers in JOIN, INPUT and acknowledgements
+        self.direction = 0
+        self.history = deque(maxlen=HISTORY_SIZE) # (update, direction) of recent updates
+        self.render_update = None # Server update that the ball and the other paddle are drawn at
+        self.shown_update = 0 # Newest snapshot whose events were shown
+
+    # --- Network side ---
+    async def run(self, host, port=DEFAULT_PORT):
+        """Connects, joins a match and receives messages until the connection closes."""
+        self.loop = asyncio.get_running_loop()
+        try:
+            reader, self.writer = await asyncio.open_connection(host, port)
+            self.send(MSG_JOIN + JOIN.pack(self.updates, encode_name(self.name)))
+            direction = self.direction
+            if direction != 0: # Set before there was a connection to send it on
+                self.send(MSG_INPUT + INPUT.pack(self.updates + 1, direction))
+            while True:
+                kind, fields = await read_message(reader, SERVER_MESSAGES)
+                self.bytes_received += 1 + SERVER_MESSAGES[kind].size
+                if kind == MSG_START:
+                    side, right_name, left_name = fields
+                    self.names = (decode_name(right_name), decode_name(left_name))
+                    self.side = side
+                else:
+                    self.snapshots.append(fields)
+        except (OSError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.closed = True
+            if self.writer is not None:
+                self.writer.close()
+
+    def start_thread(self, host, port=DEFAULT_PORT):
+        """Runs ``run()`` on its own event loop in a daemon thread."""
+        thread = threading.Thread(target=asyncio.run, args=(self.run(host, port),), daemon=True)
+        thread.start()
+        return thread
+
+    def send(self, data):
+        if self.writer is None or self.closed:
+            return
+        self.bytes_sent += len(data)
+        self.loop.call_soon_threadsafe(self.writer.write, data) # Safe from the game's thread too
+
+    def set_direction(self, direction):
+        """Sets the paddle direction (-1 up, 0 still, 1 down) from the next update on.
+
+        Before the connection is open the direction is only kept; ``run()``
+        sends it right after joining.
+        """
+        if direction != self.direction:
+            self.direction = direction
+            self.send(MSG_INPUT + INPUT.pack(self.updates + 1, direction))
+
+    def serve(self):
+        self.send(MSG_SERVE + SERVE.pack(self.updates))
+
+    # --- Game side ---
+    def predicted_paddle(self, snapshot):
+        """Own paddle top: the snapshot's position plus the input the server hasn't applied yet."""
+        ack = snapshot[1]
+        y = snapshot[4] if self.side == RIGHT else snapshot[5]
+        if snapshot[8] == PLAYING:
+            # Kept inputs, not just unacknowledged ones: a late input can move the server's count back
+            for update, direction in self.history:
+                if update > ack:
+                    y = clamp_paddle(y + direction * PADDLE_SPEED)
+        return y
+
+    def interpolated(self, snapshots):
+        """Returns (snapshot before, snapshot after, alpha) around render_update."""
+        # Drift towards INTERPOLATION_DELAY behind the newest snapshot, jumping if far off
+        target = snapshots[-1][0] - INTERPOLATION_DELAY
+        if self.render_update is None or abs(self.render_update - target) > 2 * INTERPOLATION_DELAY:
+            self.render_update = target
+        else:
+            self.render_update += 1 + max(-0.5, min((target - self.render_update) * 0.05, 0.5))
+
+        before = after = snapshots[0]
+        for i in range(len(snapshots) - 1, -1, -1):
+            if snapshots[i][0] <= self.render_update:
+                before = snapshots[i]
+                after = snapshots[min(i + 1, len(snapshots) - 1)]
+                break
+        if after[0] == before[0] or after[6:8] != before[6:8]:
+            return before, after, 0.0 # Nothing to blend, or the ball jumped back to the center
+        return before, after, (self.render_update - before[0]) / (after[0] - before[0])
+
+    def show_events(self, session, snapshots):
+        """Starts the effects of every snapshot the drawn moment has passed, once each."""
+        for snapshot in snapshots:
+            if self.shown_update < snapshot[0] <= self.render_update:
+                events = snapshot[9]
+                if events & RIGHT_HIT:
+                    session.paddle_hit_effects("player")
+                if events & LEFT_HIT:
+                    session.paddle_hit_effects("opponent")
+                if events & WALL_HIT:
+                    session.sounds.play("pong")
+                if events & SCORED:
+                    session.score_effects()
+                self.shown_update = snapshot[0]
+
+    def update(self, session):
+        """Advances one local update and writes what should be shown into session."""
+        self.updates += 1
+        self.history.append((self.updates, self.direction))
+        session.player_1_name, session.player_2_name = self.names
+        snapshots = list(self.snapshots) # The network thread appends while this runs
+        if not snapshots:
+            session.game_state = "game_over" if self.closed else "waiting"
+            session.winner_text = "Connection Lost" if self.closed else ""
+            return
+
+        latest = snapshots[-1]
+        before, after, alpha = self.interpolated(snapshots)
+        session.save_previous_positions()
+        session.count_down_effects()
+
+        # Ball and the other paddle in the past, own paddle predicted ahead of the newest snapshot
+        session.ball_position = (before[2] + (after[2] - before[2]) * alpha, before[3] + (after[3] - before[3]) * alpha)
+        session.ball.center = session.ball_position
+        own_y = self.predicted_paddle(latest)
+        other = 5 if self.side == RIGHT else 4
+        other_y = round(before[other] + (after[other] - before[other]) * alpha)
+        if self.side == RIGHT:
+            session.player.y, session.opponent.y = own_y, other_y
+        else:
+            session.player.y, session.opponent.y = other_y, own_y
+        session.player_score, session.opponent_score = before[6], before[7]
+        # Only read by drawing, which shows the serve prompt while both are 0
+        speed = 0 if before[9] & SERVE_WAIT else 1
+        session.ball_speed_x = session.ball_speed_y = speed
+        self.show_events(session, snapshots)
+
+        state = before[8]
+        if latest[8] == ABANDONED:
+            session.winner_text = "Opponent Left"
+            session.game_state = "game_over"
+        elif self.closed and latest[8] != GAME_OVER:
+            session.winner_text = "Connection Lost"
+            session.game_state = "game_over"
+        elif state == WAITING:
+            session.game_state = "waiting"
+        elif state == PLAYING:
+            session.game_state = "playing"
+            session.update_effects()
+        else:
+            session.check_for_winner()
@@ -0,0 +1,105 @@
+"""Fixed-capacity particle pool for the paddle hit effect.
+
+Particles are stored as a structure of NumPy arrays (position, velocity,
+life) instead of one dict per particle. Live particles always occupy the
+first ``count`` slots; dead ones are removed by swapping live particles from
+the end into their slots, so nothing is allocated while the game runs.
+"""
+import numpy as np
+import pygame
+
+MIN_LIFE = 10 # Lifetime range of a new particle, in updates
+MAX_LIFE = 20
+MAX_SPEED = 3 # Largest velocity component, in pixels per update
+
+
+class ParticlePool:
+    """Preallocated storage, vectorized update and batched drawing of particles."""
+
+    def __init__(self, capacity=1024, color=(200, 200, 200), seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.rng = np.random.default_rng(seed)
+        self.color = color
+        self.sprites_by_scale = {} # Scale -> sprites and half sizes, built the first time it is drawn at
+
+    def sprites_at(self, scale):
+        """One square sprite per remaining life value (size shrinks as life decreases), plus their half sizes."""
+        if scale not in self.sprites_by_scale:
+            sprites = [None]
+            half_sizes = np.zeros(MAX_LIFE + 1)
+            for life in range(1, MAX_LIFE + 1):
+                size = life * 0.5 * scale
+                sprite = pygame.Surface((max(1, int(size)), max(1, int(size))))
+                sprite.fill(self.color)
+                sprites.append(sprite)
+                half_sizes[life] = size / 2
+            self.sprites_by_scale[scale] = (sprites, half_sizes)
+        return self.sprites_by_scale[scale]
+
+    def spawn(self, position, amount=10):
+        """Creates a burst of particles at position. Extra particles are dropped when the pool is full."""
+        amount = min(amount, self.capacity - self.count)
+        if amount <= 0:
+            return
+        new = slice(self.count, self.count + amount)
+        random = self.rng.random((amount, 3)) # One Generator call for both; each call has a fixed cost of several µs
+        self.pos[new] = position
+        self.vel[new] = random[:, :2] * (2 * MAX_SPEED) - MAX_SPEED
+        self.life[new] = random[:, 2] * (MAX_LIFE - MIN_LIFE + 1) + MIN_LIFE # Truncated to whole updates
+        self.count += amount
+
+    def update(self):
+        """Moves every live particle, ages it and swap-removes the ones that died."""
+        n = self.count
+        if n == 0:
+            return
+        self.pos[:n] += self.vel[:n]
+        self.life[:n] -= 1
+
+        alive = self.life[:n] > 0
+        alive_count = int(np.count_nonzero(alive))
+        if alive_count == n:
+            return
+        # Dead slots below alive_count are refilled with live particles from above it
+        holes = np.flatnonzero(~alive[:alive_count])
+        movers = np.flatnonzero(alive[alive_count:]) + alive_count
+        self.pos[holes] = self.pos[movers]
+        self.vel[holes] = self.vel[movers]
+        self.life[holes] = self.life[movers]
+        self.count = alive_count
+
+    def draw(self, surface, scale=1.0):
+        """Draws all live particles with a single Surface.blits call, at ``scale`` surface pixels per unit."""
+        n = self.count
+        if n == 0:
+            return
+        sprites, half_sizes = self.sprites_at(scale)
+        life = self.life[:n]
+        corners = (self.pos[:n] * scale - half_sizes[life][:, None]).astype(np.int32)
+        sprites = map(sprites.__getitem__, life.tolist())
+        surface.blits(zip(sprites, corners.tolist()), doreturn=False)
+
+    def bounds(self, scale=1.0):
+        """Returns a Rect covering every live particle as drawn at ``scale``, or None when there are none."""
+        n = self.count
+        if n == 0:
+            return None
+        half_size = MAX_LIFE * 0.25 * scale
+        left, top = self.pos[:n].min(axis=0) * scale - half_size
+        right, bottom = self.pos[:n].max(axis=0) * scale + half_size
+        return pygame.Rect(int(left), int(top), int(right - left) + 2, int(bottom - top) + 2)
+
+    def clear(self):
+        """Removes every particle."""
+        self.count = 0
+
+    def seed(self, seed):
+        """Restarts the random generator, so the same bursts follow from the same seed."""
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.count
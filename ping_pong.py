@@ -1,483 +1,1080 @@
+import argparse
+import asyncio
+import os
 import pygame
-import sys
 import random
+import time
 import math # Used for the pulsing animation
+from functools import cached_property
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, BALL_RADIUS, PADDLE_WIDTH, PADDLE_HEIGHT, WINNING_SCORE
+from settings import PADDLE_SPEED, AI_SPEEDS, BALL_SPEEDS, UPDATES_PER_SECOND, PREDICTIVE_AI_LEVELS, CHASER_AIM_ERROR
+from ai import PredictiveAI
+from collision import sweep_ball, WALL, LEFT_GOAL, RIGHT_GOAL
+from profiling import profiler
+from text_cache import TextCache
+from particles import ParticlePool
+from dirty_rects import DirtyRectRenderer
+from assets import GameAssets, TRAIL_LENGTH
+from replay import Replay, ReplayRecorder, FLAG_SERVE
+from telemetry import TelemetryWriter, SERVE, PADDLE_HIT, WALL_BOUNCE, POINT, MATCH_END, PLAYER, OPPONENT
+from quality import QualityGovernor, QUALITY_NAMES
+from sounds import SoundManager
+from viewport import Viewport, parse_size
+from collections import deque
 
 # --- Constants ---
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
 BG_COLOR = pygame.Color('grey12')
 LIGHT_GREY = (200, 200, 200)
 ACCENT_COLOR = pygame.Color('#45B3E7')
-BALL_RADIUS = 15
-PADDLE_WIDTH = 10
-PADDLE_HEIGHT = 140
-WINNING_SCORE = 5
-
-# --- Initialization ---
-pygame.init()
-clock = pygame.time.Clock()
-pygame.mixer.init()
-
-# --- Screen Setup ---
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('AI Ping Pong')
-# NEW: Create a separate surface for all drawing. This allows us to apply screen shake.
-display_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-# --- Game Objects ---
-# Create Rects for the ball and paddles for drawing and collision
-ball = pygame.Rect(SCREEN_WIDTH / 2 - BALL_RADIUS, SCREEN_HEIGHT / 2 - BALL_RADIUS, BALL_RADIUS * 2, BALL_RADIUS * 2)
-player = pygame.Rect(SCREEN_WIDTH - 20 - PADDLE_WIDTH, SCREEN_HEIGHT / 2 - PADDLE_HEIGHT / 2, PADDLE_WIDTH, PADDLE_HEIGHT)
-opponent = pygame.Rect(10, SCREEN_HEIGHT / 2 - PADDLE_HEIGHT / 2, PADDLE_WIDTH, PADDLE_HEIGHT)
-
-# --- Game Variables ---
-ball_speed_x = 0
-ball_speed_y = 0
-player_speed = 0
-opponent_player_speed = 0
-base_ball_speed = 7
-
-# --- NEW: Animation Variables ---
-ball_animation_timer = 0 # Controls the ball squash animation
-screen_flash_timer = 0 # Controls the screen flash on score
-pulse_timer = 0 # Controls the menu text pulse
-particles = [] # List to store particles for hit animation
-ball_trail = [] # NEW: List to store ball positions for trail effect
-player_flash_timer = 0 # NEW: Timer for player paddle flash
-opponent_flash_timer = 0 # NEW: Timer for opponent paddle flash
-screen_shake_timer = 0 # NEW: Timer for screen shake effect
-render_offset = [0, 0] # NEW: X/Y offset for screen shake
-
-# --- AI and Game Mode Variables ---
-opponent_speed = 7
+TIMESTEP = 1 / UPDATES_PER_SECOND # Seconds of game time advanced by one update
+PARTICLE_BURST = 10 # Particles spawned per paddle hit
+MAX_FRAME_TIME = 0.25 # Cap on real time fed to the simulation per frame (avoids a catch-up spiral)
+OVERLAY_FRAMES = 120 # Frames shown in the profiler overlay's frame-time graph
+OVERLAY_REFRESH = 30 # Frames between updates of the overlay's numbers (readable, and few new text surfaces)
+
+# --- Menu Options ---
 difficulty_levels = ["Easy", "Medium", "Hard"]
-current_difficulty_index = 1
 game_modes = ["Player vs AI", "Player vs Player"]
-current_mode_index = 0
 ball_speed_levels = ["Slow", "Normal", "Fast"]
-current_ball_speed_index = 1
-
-# --- Menu Navigation ---
-menu_selection_index = 0 # 0: Mode, 1: Difficulty, 2: Speed
-
-# --- Text Variables ---
-player_score = 0
-opponent_score = 0
-player_1_name = ""
-player_2_name = ""
-active_input_name = ""
-game_font = pygame.font.Font("freesansbold.ttf", 32)
-title_font = pygame.font.Font("freesansbold.ttf", 70)
-small_font = pygame.font.Font("freesansbold.ttf", 28)
-hint_font = pygame.font.Font("freesansbold.ttf", 20)
-
-# --- Sound Loading ---
-# Try to load sound files. If they fail, create dummy objects to prevent crashing.
-try:
-    pong_sound = pygame.mixer.Sound("pong.ogg")
-    score_sound = pygame.mixer.Sound("score.ogg")
-except pygame.error:
-    print("Warning: Sound files 'pong.ogg' or 'score.ogg' not found.")
-    class DummySound:
-        def play(self): pass
-    pong_sound = DummySound()
-    score_sound = DummySound()
-
-# --- Game State Management ---
-game_state = "start_menu" # Controls which screen is active
-winner_text = ""
-
-# --- Function Definitions ---
-
-# NEW: Particle effect functions
-def spawn_particles(position):
-    """Create a burst of particles at a given position."""
-    for _ in range(10): # Spawn 10 particles
-        particles.append({
-            'pos': list(position), # [x, y]
-            'vel': [random.uniform(-3, 3), random.uniform(-3, 3)], # Random velocity
-            'life': random.randint(10, 20) # Lifetime in frames
-        })
-
-def update_and_draw_particles():
-    """Update positions, decrease life, and draw all active particles."""
-    for i in range(len(particles) - 1, -1, -1): # Iterate backwards for safe removal
-        particle = particles[i]
-        particle['pos'][0] += particle['vel'][0]
-        particle['pos'][1] += particle['vel'][1]
-        particle['life'] -= 1
-        
-        if particle['life'] <= 0:
-            particles.pop(i)
+
+# --- Sounds ---
+class SilentSounds:
+    """Stands in for SoundManager when nothing should be heard (headless runs, tools)."""
+
+    def play(self, name):
+        pass
+
+
+class GameSession:
+    """The state and rules of the game: ball, paddles, scores, menu choices and effect timers.
+
+    Nothing here opens a window or touches the audio device, so a session can
+    be stepped headless or driven by tools without initializing pygame. Sound
+    effects go through ``sounds``, any object with a ``play(name)`` method.
+    """
+
+    def __init__(self, ai="reactive", sounds=None):
+        self.ai = ai # Opponent AI: "reactive" or "predictive"
+        self.sounds = sounds if sounds is not None else SilentSounds()
+        self.seed = 0 # Seeds every random choice of the current match (see reset_game)
+        self.rng = random.Random(self.seed) # Screen shake
+        self.recorder = None # ReplayRecorder of the current match, if it is being recorded
+        self.telemetry = None # TelemetryWriter that rally events are logged to, if any
+        self.update_count = 0 # Updates since the match started
+        self.served = False # serve_ball() was called since the last update
+        self.ball_events = [] # What the ball hit during the last update, as returned by sweep_ball()
+        self.particle_burst = PARTICLE_BURST # Particles per paddle hit (lowered by the quality governor)
+
+        # --- Game Objects ---
+        # Create Rects for the ball and paddles for drawing and collision
+        self.ball = pygame.Rect(SCREEN_WIDTH / 2 - BALL_RADIUS, SCREEN_HEIGHT / 2 - BALL_RADIUS, BALL_RADIUS * 2, BALL_RADIUS * 2)
+        self.player = pygame.Rect(SCREEN_WIDTH - 20 - PADDLE_WIDTH, SCREEN_HEIGHT / 2 - PADDLE_HEIGHT / 2, PADDLE_WIDTH, PADDLE_HEIGHT)
+        self.opponent = pygame.Rect(10, SCREEN_HEIGHT / 2 - PADDLE_HEIGHT / 2, PADDLE_WIDTH, PADDLE_HEIGHT)
+
+        # --- Game Variables ---
+        self.ball_position = self.ball.center # Exact (float) ball center; the Rect holds it rounded to pixels
+        self.ball_speed_x = 0
+        self.ball_speed_y = 0
+        self.player_speed = 0
+        self.opponent_player_speed = 0
+        self.base_ball_speed = 7
+
+        # --- Animation Variables ---
+        self.ball_animation_timer = 0 # Controls the ball squash animation
+        self.screen_flash_timer = 0 # Controls the screen flash on score
+        self.ball_trail = deque(maxlen=TRAIL_LENGTH) # Ring buffer of recent ball positions for trail effect
+        self.player_flash_timer = 0 # Timer for player paddle flash
+        self.opponent_flash_timer = 0 # Timer for opponent paddle flash
+        self.screen_shake_timer = 0 # Timer for screen shake effect
+        self.shake_offset = (0, 0) # X/Y offset for screen shake
+
+        # --- Interpolation Variables ---
+        self.previous_ball_pos = self.ball.topleft # Positions before the last update, used to interpolate rendering
+        self.previous_player_y = self.player.y
+        self.previous_opponent_y = self.opponent.y
+
+        # --- AI and Game Mode Variables ---
+        self.opponent_speed = 7
+        self.current_difficulty_index = 1
+        self.predictive_ai = PredictiveAI(**PREDICTIVE_AI_LEVELS[difficulty_levels[self.current_difficulty_index]]) # Used with ai="predictive"
+        self.current_mode_index = 0
+        self.current_ball_speed_index = 1
+
+        # --- Score Variables ---
+        self.player_score = 0
+        self.opponent_score = 0
+        self.player_1_name = ""
+        self.player_2_name = ""
+
+        # --- Game State Management ---
+        self.game_state = "start_menu" # Controls which screen is active
+        self.winner_text = ""
+
+    @cached_property
+    def particles(self):
+        # Preallocated particle storage for hit animation. Created when the first match
+        # starts rather than at startup: NumPy's random module alone takes several ms to import.
+        return ParticlePool(color=LIGHT_GREY)
+
+    @property
+    def mode(self):
+        return game_modes[self.current_mode_index]
+
+    def spawn_particles(self, position):
+        """Create a burst of particles at a given position."""
+        self.particles.spawn(position, self.particle_burst)
+
+    def ball_animation(self):
+        """Handles ball movement, wall collisions, scoring, and paddle collisions."""
+        # Move the ball along its path, bouncing at the exact moment of each impact (no tunneling)
+        contacts = [] if self.telemetry is not None else None
+        x, y, self.ball_speed_x, self.ball_speed_y, events = sweep_ball(
+            self.ball_position[0], self.ball_position[1], self.ball_speed_x, self.ball_speed_y,
+            {"player": self.player, "opponent": self.opponent}, contacts=contacts)
+        self.ball_position = (x, y)
+        self.ball.center = self.ball_position
+        self.ball_events = events
+
+        for i, event in enumerate(events):
+            contact = contacts[i] if contacts is not None else None
+            # Ball bounces off top and bottom walls
+            if event == WALL:
+                self.sounds.play("pong")
+                self.ai_observe(new_path=False)
+                self.log_event(WALL_BOUNCE, contact=contact)
+
+            # Opponent scores
+            elif event == RIGHT_GOAL:
+                self.opponent_score += 1
+                self.log_event(POINT, OPPONENT, contact=contact)
+                self.score_effects()
+                self.check_for_winner()
+                self.ball_restart()
+
+            # Player scores
+            elif event == LEFT_GOAL:
+                self.player_score += 1
+                self.log_event(POINT, PLAYER, contact=contact)
+                self.score_effects()
+                self.check_for_winner()
+                self.ball_restart()
+
+            # Ball bounces off paddles
+            else:
+                self.ai_observe()
+                self.paddle_hit_effects(event)
+                if self.telemetry is not None:
+                    paddle = self.player if event == "player" else self.opponent
+                    reach = paddle.height / 2 + BALL_RADIUS # Farthest the ball's center can be and still touch
+                    offset = max(-1.0, min((contact[2] - paddle.centery) / reach, 1.0))
+                    self.log_event(PADDLE_HIT, PLAYER if event == "player" else OPPONENT, offset, contact)
+
+    def log_event(self, kind, side=-1, offset=float("nan"), contact=None):
+        """Logs a rally event, if telemetry is on.
+
+        ``contact`` is the (time into this update, x, y, speed x, speed y)
+        that sweep_ball() reported for the event; without it the ball and
+        the time are taken as they are now.
+        """
+        if self.telemetry is not None:
+            if contact is None:
+                event_time = self.update_count
+                (x, y), speed_x, speed_y = self.ball_position, self.ball_speed_x, self.ball_speed_y
+            else:
+                event_time, x, y, speed_x, speed_y = contact
+                event_time += self.update_count - 1 # This update runs from update_count - 1 to update_count
+            self.telemetry.record(self.seed, event_time, kind, side, x, y, speed_x, speed_y, offset, self.player_score,
+                                  self.opponent_score)
+
+    def paddle_hit_effects(self, paddle):
+        """Starts the sound and animations of the ball hitting ``paddle`` ("player" or "opponent")."""
+        self.sounds.play("pong")
+        self.ball_animation_timer = 10 # Trigger ball squash animation
+        self.spawn_particles(self.ball.center) # Trigger particle burst
+        self.screen_shake_timer = 8 # Trigger screen shake
+        if paddle == "player":
+            self.player_flash_timer = 10 # Trigger player paddle flash
         else:
-            # Draw the particle (size shrinks as life decreases)
-            size = particle['life'] * 0.5 
-            pygame.draw.rect(display_surface, LIGHT_GREY, (particle['pos'][0] - size/2, particle['pos'][1] - size/2, size, size))
-
-def ball_animation():
-    """Handles ball movement, wall collisions, scoring, and paddle collisions."""
-    global ball_speed_x, ball_speed_y, player_score, opponent_score, screen_flash_timer
-    global ball_animation_timer, screen_shake_timer, player_flash_timer, opponent_flash_timer
-    
-    ball.x += ball_speed_x
-    ball.y += ball_speed_y
-
-    # Ball bounces off top and bottom walls
-    if ball.top <= 0 or ball.bottom >= SCREEN_HEIGHT:
-        ball_speed_y *= -1
-        pong_sound.play()
-
-    # Opponent scores
-    if ball.right >= SCREEN_WIDTH:
-        opponent_score += 1
-        score_sound.play()
-        screen_flash_timer = 15 # Trigger screen flash
-        check_for_winner()
-        ball_restart()
-
-    # Player scores
-    if ball.left <= 0:
-        player_score += 1
-        score_sound.play()
-        screen_flash_timer = 15 # Trigger screen flash
-        check_for_winner()
-        ball_restart()
-
-    # Ball bounces off paddles (AABB Collision)
-    if ball.colliderect(player):
-        ball_speed_x *= -1
-        pong_sound.play()
-        ball_animation_timer = 10 # Trigger ball squash animation
-        spawn_particles(ball.center) # Trigger particle burst
-        screen_shake_timer = 8 # NEW: Trigger screen shake
-        player_flash_timer = 10 # NEW: Trigger player paddle flash
-        
-    if ball.colliderect(opponent):
-        ball_speed_x *= -1
-        pong_sound.play()
-        ball_animation_timer = 10 
-        spawn_particles(ball.center)
-        screen_shake_timer = 8 # NEW: Trigger screen shake
-        opponent_flash_timer = 10 # NEW: Trigger opponent paddle flash
-
-def player_animation():
-    """Moves the player's paddle and keeps it within the screen boundaries."""
-    player.y += player_speed
-    if player.top <= 0:
-        player.top = 0
-    if player.bottom >= SCREEN_HEIGHT:
-        player.bottom = SCREEN_HEIGHT
-
-def opponent_player_animation():
-    """Moves the second player's paddle and keeps it within the screen boundaries."""
-    opponent.y += opponent_player_speed
-    if opponent.top <= 0:
-        opponent.top = 0
-    if opponent.bottom >= SCREEN_HEIGHT:
-        opponent.bottom = SCREEN_HEIGHT
-
-def opponent_ai():
-    """Implements the Reactive AI Algorithm."""
-    if ball_speed_x < 0:
-        if opponent.centery < ball.centery:
-            opponent.y += opponent_speed
-        if opponent.centery > ball.centery:
-            opponent.y -= opponent_speed
-
-    if opponent.top <= 0:
-        opponent.top = 0
-    if opponent.bottom >= SCREEN_HEIGHT:
-        opponent.bottom = SCREEN_HEIGHT
-
-def ball_restart():
-    """Resets the ball to the center and stops it, waiting for a serve."""
-    global ball_speed_x, ball_speed_y
-    ball.center = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
-    ball_speed_y = 0
-    ball_speed_x = 0
-
-def check_for_winner():
-    """Checks if a player's score has reached the winning score."""
-    global game_state, winner_text
-    player_1_wins = player_score >= WINNING_SCORE
-    player_2_wins = opponent_score >= WINNING_SCORE
-    
-    if player_1_wins:
-        winner_name = player_1_name if game_modes[current_mode_index] == "Player vs Player" else "You"
-        winner_text = f"{winner_name} Won!"
-        game_state = "game_over" 
-    elif player_2_wins:
-        winner_name = player_2_name if game_modes[current_mode_index] == "Player vs Player" else "AI"
-        winner_text = f"{winner_name} Won!"
-        game_state = "game_over"
-
-def set_difficulty():
-    """Sets the AI's speed based on the menu selection."""
-    global opponent_speed
-    difficulty = difficulty_levels[current_difficulty_index]
-    if difficulty == "Easy":
-        opponent_speed = 5.5
-    elif difficulty == "Medium":
-        opponent_speed = 5.9
-    elif difficulty == "Hard":
-        opponent_speed = 7
-
-def set_ball_speed():
-    """Sets the ball's base speed based on the menu selection."""
-    global base_ball_speed
-    speed_level = ball_speed_levels[current_ball_speed_index]
-    if speed_level == "Slow":
-        base_ball_speed = 5
-    elif speed_level == "Normal":
-        base_ball_speed = 7
-    elif speed_level == "Fast":
-        base_ball_speed = 10
-
-def reset_game():
-    """Resets all game variables to start a new match."""
-    global player_score, opponent_score, game_state, particles, ball_trail
-    global player_flash_timer, opponent_flash_timer, screen_shake_timer
-    player_score = 0
-    opponent_score = 0
-    particles = [] # Clear particles
-    ball_trail = [] # NEW: Clear ball trail
-    player_flash_timer = 0 # NEW: Reset flash timers
-    opponent_flash_timer = 0
-    screen_shake_timer = 0
-    
-    if game_modes[current_mode_index] == "Player vs AI":
-        set_difficulty() 
-    set_ball_speed() 
-    ball_restart() 
-    game_state = "playing"
-
-def draw_back_hint():
-    """Draws the 'ESC to Menu' hint."""
-    back_text = hint_font.render("ESC to Menu", False, LIGHT_GREY)
-    display_surface.blit(back_text, (20, SCREEN_HEIGHT - 40)) # UPDATED: Draw to display_surface
-
-# --- Main Game Loop ---
-while True:
-    # --- Event Handling ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
+            self.opponent_flash_timer = 10 # Trigger opponent paddle flash
+
+    def score_effects(self):
+        """Starts the sound and screen flash of a point being scored."""
+        self.sounds.play("score")
+        self.screen_flash_timer = 15 # Trigger screen flash
+
+    def player_animation(self):
+        """Moves the player's paddle and keeps it within the screen boundaries."""
+        self.player.y += self.player_speed
+        if self.player.top <= 0:
+            self.player.top = 0
+        if self.player.bottom >= SCREEN_HEIGHT:
+            self.player.bottom = SCREEN_HEIGHT
+
+    def opponent_player_animation(self):
+        """Moves the second player's paddle and keeps it within the screen boundaries."""
+        self.opponent.y += self.opponent_player_speed
+        if self.opponent.top <= 0:
+            self.opponent.top = 0
+        if self.opponent.bottom >= SCREEN_HEIGHT:
+            self.opponent.bottom = SCREEN_HEIGHT
+
+    def opponent_ai(self):
+        """Implements the Reactive AI Algorithm."""
+        if self.ball_speed_x < 0:
+            if self.opponent.centery < self.ball.centery:
+                self.opponent.y += self.opponent_speed
+            if self.opponent.centery > self.ball.centery:
+                self.opponent.y -= self.opponent_speed
+
+        if self.opponent.top <= 0:
+            self.opponent.top = 0
+        if self.opponent.bottom >= SCREEN_HEIGHT:
+            self.opponent.bottom = SCREEN_HEIGHT
+
+    def ai_observe(self, new_path=True):
+        """Lets the predictive AI re-plan after the ball's path changed."""
+        if self.ai == "predictive":
+            self.predictive_ai.observe(self.ball, self.ball_speed_x, self.ball_speed_y, new_path)
+
+    def ball_restart(self):
+        """Resets the ball to the center and stops it, waiting for a serve."""
+        self.ball_position = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        self.ball.center = self.ball_position
+        self.previous_ball_pos = self.ball.topleft # Don't interpolate across the jump to the center
+        self.ball_speed_y = 0
+        self.ball_speed_x = 0
+        self.ai_observe()
+
+    def check_for_winner(self):
+        """Checks if a player's score has reached the winning score."""
+        player_1_wins = self.player_score >= WINNING_SCORE
+        player_2_wins = self.opponent_score >= WINNING_SCORE
+
+        if player_1_wins:
+            winner_name = self.player_1_name if self.mode == "Player vs Player" else "You"
+            self.winner_text = f"{winner_name} Won!"
+            self.game_state = "game_over"
+            self.log_event(MATCH_END, PLAYER)
+        elif player_2_wins:
+            winner_name = self.player_2_name if self.mode == "Player vs Player" else "AI"
+            self.winner_text = f"{winner_name} Won!"
+            self.game_state = "game_over"
+            self.log_event(MATCH_END, OPPONENT)
+
+    def set_difficulty(self):
+        """Sets the AI's speed (and the predictive AI's skill) based on the menu selection."""
+        self.opponent_speed = AI_SPEEDS[difficulty_levels[self.current_difficulty_index]]
+        self.predictive_ai = PredictiveAI(**PREDICTIVE_AI_LEVELS[difficulty_levels[self.current_difficulty_index]], seed=self.seed)
+
+    def set_ball_speed(self):
+        """Sets the ball's base speed based on the menu selection."""
+        self.base_ball_speed = BALL_SPEEDS[ball_speed_levels[self.current_ball_speed_index]]
+
+    def reset_game(self, seed=None):
+        """Resets all game variables to start a new match.
+
+        Every random choice in the match (AI error, particles, screen shake)
+        follows from ``seed``, so the same seed and the same input replay the
+        same match. A new seed is picked when none is given.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng.seed(self.seed)
+        self.particles.seed(self.seed)
+        self.player_score = 0
+        self.opponent_score = 0
+        self.update_count = 0
+        self.particles.clear() # Clear particles
+        self.ball_trail.clear() # Clear ball trail
+        self.player_flash_timer = 0 # Reset flash timers
+        self.opponent_flash_timer = 0
+        self.screen_shake_timer = 0
+
+        if self.mode == "Player vs AI":
+            self.set_difficulty()
+        self.set_ball_speed()
+        self.ball_restart()
+        self.game_state = "playing"
+
+    def serve_ball(self):
+        """Launches the ball from the center toward the opponent."""
+        self.ball_speed_y = -self.base_ball_speed
+        self.ball_speed_x = -self.base_ball_speed
+        self.served = True
+        self.ai_observe()
+        self.log_event(SERVE)
+
+    def apply_input(self, player_speed, opponent_player_speed, flags):
+        """Sets the paddle input for the next update from a replay record."""
+        self.player_speed = player_speed
+        self.opponent_player_speed = opponent_player_speed
+        if flags & FLAG_SERVE:
+            self.serve_ball()
+
+    def update(self):
+        """Advances the game by one fixed timestep. Never draws anything."""
+        self.ball_events = []
+        if self.game_state != "playing":
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.player_speed, self.opponent_player_speed, self.served)
+        self.served = False
+        self.update_count += 1
+
+        self.save_previous_positions()
+        self.count_down_effects()
+
+        profiler.start("ball")
+        self.ball_animation()
+        profiler.stop()
+        self.player_animation()
+        if self.mode == "Player vs AI":
+            profiler.start("ai")
+            if self.ai == "predictive":
+                self.predictive_ai.update(self.opponent)
+            else:
+                self.opponent_ai()
+            profiler.stop()
+        else:
+            self.opponent_player_animation()
+        self.update_effects()
+
+    # The parts of update() that only animate; network clients run these on the server's state
+    def save_previous_positions(self):
+        self.previous_ball_pos = self.ball.topleft
+        self.previous_player_y = self.player.y
+        self.previous_opponent_y = self.opponent.y
+
+    def count_down_effects(self):
+        """Counts down the effect timers started by the previous update."""
+        if self.ball_animation_timer > 0: self.ball_animation_timer -= 1
+        if self.screen_flash_timer > 0: self.screen_flash_timer -= 1
+        if self.player_flash_timer > 0: self.player_flash_timer -= 1
+        if self.opponent_flash_timer > 0: self.opponent_flash_timer -= 1
+        if self.screen_shake_timer > 0: self.screen_shake_timer -= 1
+
+    def update_effects(self):
+        """Moves the particles, extends the ball trail and picks the screen shake offset."""
+        profiler.start("particles")
+        self.particles.update()
+        profiler.stop()
+
+        # Add ball trail logic (the deque drops the oldest point by itself)
+        self.ball_trail.append(self.ball.center)
+
+        # Pick the screen shake offset here rather than per frame, so it follows from the seed
+        if self.screen_shake_timer > 0:
+            self.shake_offset = (self.rng.randint(-4, 4), self.rng.randint(-4, 4)) # Pick a random offset
+        else:
+            self.shake_offset = (0, 0) # No offset
+
+
+def interpolate(previous, current, alpha):
+    """Returns the position a fraction alpha of the way from previous to current."""
+    return previous + (current - previous) * alpha
+
+
+class Game:
+    """The windowed game: a GameSession plus the window, fonts, sounds and menus around it.
+
+    Each pygame subsystem is started the first time something needs it
+    instead of all at once by ``pygame.init()``: the window and fonts on the
+    first frame, the mixer when the first match starts. Constructing a Game
+    does not open anything, so tools can import this module and set up a
+    game cheaply. ``get_events`` and ``clock`` may be replaced before
+    ``run()`` to script input or fake time.
+
+    With ``record`` set, every match is written to a replay file; with
+    ``telemetry`` set, the rally events of every match are appended to a
+    telemetry file. With
+    ``replay`` set, the recorded match is played back instead of the menus
+    and keyboard, ``speed`` times faster than real time. With ``client`` (a
+    connected NetworkClient) set, the match is played against another player
+    on a GameServer: keys go to the server and the session only shows what
+    the client predicts and interpolates.
+
+    F3 toggles the profiler overlay (FPS, frame-time graph, particle count)
+    and F4 writes the frames profiled so far as a Chrome trace. With
+    ``trace`` set, the whole session is profiled and its trace written
+    there on exit.
+
+    The effects are scaled down and back up by a QualityGovernor to hold
+    the frame rate; ``quality`` (an index into QUALITY_TIERS) pins them
+    to one tier instead.
+
+    Everything is drawn at the internal ``resolution`` (default: the
+    world's SCREEN_WIDTH x SCREEN_HEIGHT) and scaled to the window, which
+    is ``window`` sized and resizable, or fills the display when
+    ``fullscreen`` is set. ``smooth`` filters the scaling instead of
+    repeating or dropping pixels.
+    """
+
+    def __init__(self, fps=60, ai="reactive", dirty_rects=False, record=None, replay=None, speed=1.0, client=None,
+                 trace=None, quality=None, resolution=None, window=None, fullscreen=False, smooth=False, telemetry=None):
+        self.fps = fps # Render frame rate cap, 0 for uncapped
+        self.dirty_rects = dirty_rects
+        self.view = Viewport(resolution or (SCREEN_WIDTH, SCREEN_HEIGHT)) # Maps world units to display_surface
+        self.window_size = window or (SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.fullscreen = fullscreen
+        self.smooth = smooth
+        self.sounds = SoundManager()
+        self.session = GameSession(ai, sounds=self.sounds)
+        self.get_events = pygame.event.get
+        self.clock = pygame.time.Clock()
+        self.running = False
+
+        # --- Replay Variables ---
+        self.record = record # Replay file path for the first match; later matches get -2, -3, ... appended
+        self.matches_recorded = 0
+        self.replay = replay # Replay played back instead of keyboard input
+        self.replay_index = 0 # Next record to play
+        self.speed = speed # Game seconds per real second
+        self.telemetry = telemetry # Telemetry file path
+        if replay is not None:
+            self.session = replay_session(replay, self.sounds)
+
+        # --- Network Variables ---
+        self.client = client # NetworkClient of an online match
+        self.network_direction = 0 # Sum of the held movement keys: -1 up, 1 down
+        if client is not None:
+            self.session.current_mode_index = game_modes.index("Player vs Player")
+            self.session.game_state = "waiting"
+
+        # --- Menu Navigation ---
+        self.menu_selection_index = 0 # 0: Mode, 1: Difficulty, 2: Speed
+        self.active_input_name = ""
+
+        # --- Frame Variables ---
+        self.pulse_timer = 0 # Controls the menu text pulse
+        self.accumulator = 0.0 # Real time not yet consumed by updates
+
+        # --- Profiling Variables ---
+        self.trace = trace # Chrome trace written on exit
+        self.trace_paths = [] # Every trace written so far (F4 and on exit)
+        self.show_overlay = False
+        self.overlay_lines = [] # Overlay text, refreshed every OVERLAY_REFRESH frames
+
+        # --- Effects Quality ---
+        self.quality = QualityGovernor(1 / fps if fps else TIMESTEP, pinned=quality)
+        self.session.particle_burst = self.quality.tier["particles"]
+
+    # --- Lazily Started Subsystems ---
+    @cached_property
+    def screen(self):
+        pygame.display.init()
+        if self.fullscreen:
+            screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN) # The display's own resolution
+        else:
+            screen = pygame.display.set_mode(self.window_size, pygame.RESIZABLE)
+        pygame.display.set_caption('AI Ping Pong')
+        return screen
+
+    @cached_property
+    def display_surface(self):
+        # A separate surface for all drawing, at the internal resolution. This allows us to apply screen shake and scaling.
+        return pygame.Surface(self.view.size)
+
+    @cached_property
+    def renderer(self):
+        # Presents display_surface to the window
+        return DirtyRectRenderer(self.screen, BG_COLOR, enabled=self.dirty_rects, smooth=self.smooth)
+
+    @cached_property
+    def assets(self):
+        self.screen # Sprites are converted to the window's pixel format
+        return GameAssets(ACCENT_COLOR, LIGHT_GREY, view=self.view) # Ball, trail, paddle and flash sprites, rendered once
+
+    @cached_property
+    def text_cache(self):
+        text_cache = TextCache() # Rendered text is reused across frames instead of re-rasterized
+        # Always wrapped, so the overlay can time text whenever it is turned on; the timing is a no-op while the profiler is off
+        text_cache.render = profiler.timed("text", text_cache.render)
+        return text_cache
+
+    def _load_font(self, size):
+        pygame.font.init()
+        return pygame.font.Font("freesansbold.ttf", self.view.length(size)) # size is in world units
+
+    @cached_property
+    def game_font(self):
+        return self._load_font(32)
+
+    @cached_property
+    def title_font(self):
+        return self._load_font(70)
+
+    @cached_property
+    def small_font(self):
+        return self._load_font(28)
+
+    @cached_property
+    def hint_font(self):
+        return self._load_font(20)
+
+    # --- Events ---
+    def start_match(self):
+        """Starts a new match, loading the sounds first so the first hit doesn't stall."""
+        self.stop_recording()
+        self.sounds.load()
+        self.session.reset_game()
+        if self.record:
+            self.start_recording()
+
+    def start_recording(self):
+        """Records the match that was just started."""
+        self.matches_recorded += 1
+        path = self.record
+        if self.matches_recorded > 1:
+            root, extension = os.path.splitext(path)
+            path = f"{root}-{self.matches_recorded}{extension}"
+        self.session.recorder = ReplayRecorder(path, self.session)
+
+    def stop_recording(self):
+        """Finishes the replay file of the current match, if it is being recorded."""
+        if self.session.recorder is not None:
+            self.session.recorder.close()
+            self.session.recorder = None
+
+    def handle_event(self, event):
+        """Reacts to one input event according to the current game state."""
+        session = self.session
+
+        # Replays ignore input; ESC (or SPACE once the match is over) closes them
+        if self.replay is not None:
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE or (event.key == pygame.K_SPACE and session.game_state == "game_over"):
+                    self.running = False
+            return
+        if self.client is not None:
+            self.handle_network_event(event)
+            return
 
         # Universal ESCAPE key handler to return to menu
         if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            if game_state in ["playing", "game_over", "enter_name_p1", "enter_name_p2"]:
-                game_state = "start_menu"
-                menu_selection_index = 0
+            if session.game_state in ["playing", "game_over", "enter_name_p1", "enter_name_p2"]:
+                session.game_state = "start_menu"
+                self.menu_selection_index = 0
 
         # --- State Machine Logic ---
         # 1. Handle events for the "playing" state
-        if game_state == "playing":
+        if session.game_state == "playing":
             # Ball serve logic
-            if ball_speed_x == 0 and ball_speed_y == 0:
+            if session.ball_speed_x == 0 and session.ball_speed_y == 0:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    ball_speed_y = -base_ball_speed
-                    ball_speed_x = -base_ball_speed
-            
+                    session.serve_ball()
+
             # Player 1 paddle movement (Arrow Keys)
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_DOWN: player_speed += 7
-                if event.key == pygame.K_UP: player_speed -= 7
+                if event.key == pygame.K_DOWN: session.player_speed += PADDLE_SPEED
+                if event.key == pygame.K_UP: session.player_speed -= PADDLE_SPEED
                 # Player 2 paddle movement (W/S Keys)
-                if game_modes[current_mode_index] == "Player vs Player":
-                    if event.key == pygame.K_s: opponent_player_speed += 7
-                    if event.key == pygame.K_w: opponent_player_speed -= 7
+                if session.mode == "Player vs Player":
+                    if event.key == pygame.K_s: session.opponent_player_speed += PADDLE_SPEED
+                    if event.key == pygame.K_w: session.opponent_player_speed -= PADDLE_SPEED
             if event.type == pygame.KEYUP:
-                if event.key == pygame.K_DOWN: player_speed -= 7
-                if event.key == pygame.K_UP: player_speed += 7
-                if game_modes[current_mode_index] == "Player vs Player":
-                    if event.key == pygame.K_s: opponent_player_speed -= 7
-                    if event.key == pygame.K_w: opponent_player_speed += 7
-        
+                if event.key == pygame.K_DOWN: session.player_speed -= PADDLE_SPEED
+                if event.key == pygame.K_UP: session.player_speed += PADDLE_SPEED
+                if session.mode == "Player vs Player":
+                    if event.key == pygame.K_s: session.opponent_player_speed -= PADDLE_SPEED
+                    if event.key == pygame.K_w: session.opponent_player_speed += PADDLE_SPEED
+
         # 2. Handle events for the "start_menu" state
-        elif game_state == "start_menu":
+        elif session.game_state == "start_menu":
             if event.type == pygame.KEYDOWN:
                 # Start game or go to name entry
                 if event.key == pygame.K_SPACE:
-                    if game_modes[current_mode_index] == "Player vs Player":
-                        game_state = "enter_name_p1"; active_input_name = ""; player_1_name = ""; player_2_name = ""
-                    else: reset_game()
+                    if session.mode == "Player vs Player":
+                        session.game_state = "enter_name_p1"; self.active_input_name = ""; session.player_1_name = ""; session.player_2_name = ""
+                    else: self.start_match()
                 # Menu navigation (UP/DOWN keys)
                 if event.key == pygame.K_DOWN:
-                    menu_selection_index = (menu_selection_index + 1) % 3
-                    if menu_selection_index == 1 and game_modes[current_mode_index] == "Player vs Player":
-                        menu_selection_index = (menu_selection_index + 1) % 3
+                    self.menu_selection_index = (self.menu_selection_index + 1) % 3
+                    if self.menu_selection_index == 1 and session.mode == "Player vs Player":
+                        self.menu_selection_index = (self.menu_selection_index + 1) % 3
                 if event.key == pygame.K_UP:
-                    menu_selection_index = (menu_selection_index - 1)
-                    if menu_selection_index < 0: menu_selection_index = 2
-                    if menu_selection_index == 1 and game_modes[current_mode_index] == "Player vs Player":
-                        menu_selection_index = (menu_selection_index - 1)
-                        if menu_selection_index < 0: menu_selection_index = 2
+                    self.menu_selection_index = (self.menu_selection_index - 1)
+                    if self.menu_selection_index < 0: self.menu_selection_index = 2
+                    if self.menu_selection_index == 1 and session.mode == "Player vs Player":
+                        self.menu_selection_index = (self.menu_selection_index - 1)
+                        if self.menu_selection_index < 0: self.menu_selection_index = 2
                 # Change menu options (LEFT/RIGHT keys)
                 if event.key == pygame.K_RIGHT:
-                    if menu_selection_index == 0: current_mode_index = (current_mode_index + 1) % len(game_modes)
-                    elif menu_selection_index == 1: current_difficulty_index = (current_difficulty_index + 1) % len(difficulty_levels)
-                    elif menu_selection_index == 2: current_ball_speed_index = (current_ball_speed_index + 1) % len(ball_speed_levels)
+                    if self.menu_selection_index == 0: session.current_mode_index = (session.current_mode_index + 1) % len(game_modes)
+                    elif self.menu_selection_index == 1: session.current_difficulty_index = (session.current_difficulty_index + 1) % len(difficulty_levels)
+                    elif self.menu_selection_index == 2: session.current_ball_speed_index = (session.current_ball_speed_index + 1) % len(ball_speed_levels)
                 if event.key == pygame.K_LEFT:
-                    if menu_selection_index == 0: current_mode_index = (current_mode_index - 1) % len(game_modes)
-                    elif menu_selection_index == 1: current_difficulty_index = (current_difficulty_index - 1) % len(difficulty_levels)
-                    elif menu_selection_index == 2: current_ball_speed_index = (current_ball_speed_index - 1) % len(ball_speed_levels)
-        
+                    if self.menu_selection_index == 0: session.current_mode_index = (session.current_mode_index - 1) % len(game_modes)
+                    elif self.menu_selection_index == 1: session.current_difficulty_index = (session.current_difficulty_index - 1) % len(difficulty_levels)
+                    elif self.menu_selection_index == 2: session.current_ball_speed_index = (session.current_ball_speed_index - 1) % len(ball_speed_levels)
+
         # 3. Handle events for the "enter_name" state
-        elif game_state.startswith("enter_name"):
+        elif session.game_state.startswith("enter_name"):
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN: # Press ENTER to confirm name
-                    if game_state == "enter_name_p1" and active_input_name:
-                        player_1_name = active_input_name; game_state = "enter_name_p2"; active_input_name = ""
-                    elif game_state == "enter_name_p2" and active_input_name:
-                        player_2_name = active_input_name; reset_game()
+                    if session.game_state == "enter_name_p1" and self.active_input_name:
+                        session.player_1_name = self.active_input_name; session.game_state = "enter_name_p2"; self.active_input_name = ""
+                    elif session.game_state == "enter_name_p2" and self.active_input_name:
+                        session.player_2_name = self.active_input_name; self.start_match()
                 elif event.key == pygame.K_BACKSPACE: # Press BACKSPACE to delete
-                    active_input_name = active_input_name[:-1]
+                    self.active_input_name = self.active_input_name[:-1]
                 else:
-                    if len(active_input_name) < 10: # Limit name length
-                        active_input_name += event.unicode # Add typed character
+                    if len(self.active_input_name) < 10: # Limit name length
+                        self.active_input_name += event.unicode # Add typed character
 
         # 4. Handle events for the "game_over" state
-        elif game_state == "game_over":
+        elif session.game_state == "game_over":
              if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                 game_state = "start_menu"
+                 session.game_state = "start_menu"
+
+    def handle_network_event(self, event):
+        """Sends the paddle direction and serves of an online match; ESC leaves it."""
+        session = self.session
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE or (event.key == pygame.K_SPACE and session.game_state == "game_over"):
+                self.running = False
+            elif event.key == pygame.K_SPACE and session.ball_speed_x == 0 and session.ball_speed_y == 0:
+                self.client.serve()
+        # Either paddle's keys move your own paddle, whichever side you were given
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            step = 1 if event.type == pygame.KEYDOWN else -1
+            if event.key in (pygame.K_DOWN, pygame.K_s): self.network_direction += step
+            if event.key in (pygame.K_UP, pygame.K_w): self.network_direction -= step
+            self.client.set_direction(max(-1, min(self.network_direction, 1)))
+
+    # --- Updates ---
+    def update(self):
+        """Advances the menus and the session by one fixed timestep."""
+        self.pulse_timer += 1 # Drives the menu text pulse
+        self.sounds.tick(TIMESTEP) # Sound cooldowns run on game time
+        if self.replay is not None:
+            self.replay_input()
+        if self.client is not None:
+            self.client.update(self.session) # The server runs the match; the session only shows it
+            return
+        self.session.update()
+        if self.session.recorder is not None and self.session.game_state != "playing":
+            self.stop_recording() # Match won, or left with ESC
+
+    def replay_input(self):
+        """Feeds the next recorded input to the session, ending the match when the records run out."""
+        session = self.session
+        if session.game_state != "playing":
+            return
+        if self.replay_index == len(self.replay):
+            # Recording stopped before anyone won (ESC or closed window)
+            session.winner_text = "Replay Ended"
+            session.game_state = "game_over"
+            return
+        session.apply_input(*self.replay.inputs[self.replay_index].item())
+        self.replay_index += 1
 
     # --- Drawing ---
-    display_surface.fill(BG_COLOR) # UPDATED: Clear the display surface
-
-    # --- State-based Drawing ---
-    # 1. Draw the "start_menu"
-    if game_state == "start_menu":
-        title_text = title_font.render("P I N G", False, ACCENT_COLOR); title_text_2 = title_font.render("P O N G", False, ACCENT_COLOR)
-        display_surface.blit(title_text, (SCREEN_WIDTH/2 - title_text.get_width()/2, SCREEN_HEIGHT/2 - 200)); display_surface.blit(title_text_2, (SCREEN_WIDTH/2 - title_text_2.get_width()/2, SCREEN_HEIGHT/2 - 120))
-        
-        mode_color = ACCENT_COLOR if menu_selection_index == 0 else LIGHT_GREY; diff_color = ACCENT_COLOR if menu_selection_index == 1 else LIGHT_GREY; speed_color = ACCENT_COLOR if menu_selection_index == 2 else LIGHT_GREY
-        
-        mode_label = small_font.render("Mode:", False, mode_color); mode_value = small_font.render(f"< {game_modes[current_mode_index]} >", False, mode_color)
-        display_surface.blit(mode_label, (SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 - 20)); display_surface.blit(mode_value, (SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 - 20))
-        
-        if game_modes[current_mode_index] == "Player vs AI":
-            diff_label = small_font.render("Difficulty:", False, diff_color); diff_value = small_font.render(f"< {difficulty_levels[current_difficulty_index]} >", False, diff_color)
-            display_surface.blit(diff_label, (SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 + 30)); display_surface.blit(diff_value, (SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 + 30))
-        
-        speed_label = small_font.render("Ball Speed:", False, speed_color); speed_value = small_font.render(f"< {ball_speed_levels[current_ball_speed_index]} >", False, speed_color)
-        display_surface.blit(speed_label, (SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 + 80)); display_surface.blit(speed_value, (SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 + 80))
-        
-        # UPDATED: Pulsing/blinking text animation
-        if pulse_timer % 60 < 40: # Blink on for 40 frames, off for 20
-            prompt_text = game_font.render("Press SPACE to Start", False, LIGHT_GREY); 
-            display_surface.blit(prompt_text, (SCREEN_WIDTH/2 - prompt_text.get_width()/2, SCREEN_HEIGHT/2 + 150))
-    
-    # 2. Draw the "enter_name" screen
-    elif game_state.startswith("enter_name"):
-        prompt = "Enter Player 1 Name:" if game_state == "enter_name_p1" else "Enter Player 2 Name:"
-        prompt_text = game_font.render(prompt, False, LIGHT_GREY); display_surface.blit(prompt_text, (SCREEN_WIDTH/2 - prompt_text.get_width()/2, SCREEN_HEIGHT/2 - 100))
-        input_box = pygame.Rect(SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 - 25, 300, 50); pygame.draw.rect(display_surface, ACCENT_COLOR, input_box, 2) 
-        input_text = game_font.render(active_input_name, False, LIGHT_GREY); display_surface.blit(input_text, (input_box.x + 10, input_box.y + 10))
-        continue_prompt = small_font.render("Press ENTER to continue", False, LIGHT_GREY); display_surface.blit(continue_prompt, (SCREEN_WIDTH/2 - continue_prompt.get_width()/2, SCREEN_HEIGHT/2 + 100))
-        draw_back_hint()
-
-    # 3. Draw the "game_over" screen
-    elif game_state == "game_over":
-        winner_render = title_font.render(winner_text, False, ACCENT_COLOR); prompt_text = game_font.render("Press SPACE to Return to Menu", False, LIGHT_GREY)
-        display_surface.blit(winner_render, (SCREEN_WIDTH/2 - winner_render.get_width()/2, SCREEN_HEIGHT/2 - 100)); display_surface.blit(prompt_text, (SCREEN_WIDTH/2 - prompt_text.get_width()/2, SCREEN_HEIGHT/2 + 20))
-        draw_back_hint()
-
-    # 4. Draw the "playing" screen
-    elif game_state == "playing":
-        # Update game logic
-        ball_animation()
-        player_animation()
-        if game_modes[current_mode_index] == "Player vs AI":
-            opponent_ai()
-        else:
-            opponent_player_animation()
-        
+    def draw_back_hint(self):
+        """Draws the 'ESC to Menu' hint."""
+        back_text = self.text_cache.render(self.hint_font, "ESC to Menu", LIGHT_GREY)
+        return self.display_surface.blit(back_text, self.view.point(20, SCREEN_HEIGHT - 40))
+
+    def draw(self):
+        """Draws the current state onto display_surface, marking regions that change every frame."""
+        session = self.session
+        display_surface = self.display_surface
+        renderer = self.renderer
+        text_cache = self.text_cache
+        view = self.view # Positions below are in world units, mapped to display_surface
+        display_surface.fill(BG_COLOR) # Clear the display surface
+        # Anything that changes the static parts of a screen forces a full redraw
+        renderer.begin_frame((session.game_state, session.current_mode_index, session.current_difficulty_index,
+                              session.current_ball_speed_index, self.menu_selection_index, self.active_input_name,
+                              session.winner_text, session.player_1_name, session.player_2_name))
+
+        # --- State-based Drawing ---
+        # 1. Draw the "start_menu"
+        if session.game_state == "start_menu":
+            title_text = text_cache.render(self.title_font, "P I N G", ACCENT_COLOR); title_text_2 = text_cache.render(self.title_font, "P O N G", ACCENT_COLOR)
+            display_surface.blit(title_text, view.centered(title_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 200)); display_surface.blit(title_text_2, view.centered(title_text_2, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 120))
+
+            mode_color = ACCENT_COLOR if self.menu_selection_index == 0 else LIGHT_GREY; diff_color = ACCENT_COLOR if self.menu_selection_index == 1 else LIGHT_GREY; speed_color = ACCENT_COLOR if self.menu_selection_index == 2 else LIGHT_GREY
+
+            mode_label = text_cache.render(self.small_font, "Mode:", mode_color); mode_value = text_cache.render(self.small_font, f"< {session.mode} >", mode_color)
+            display_surface.blit(mode_label, view.point(SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 - 20)); display_surface.blit(mode_value, view.point(SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 - 20))
+
+            if session.mode == "Player vs AI":
+                diff_label = text_cache.render(self.small_font, "Difficulty:", diff_color); diff_value = text_cache.render(self.small_font, f"< {difficulty_levels[session.current_difficulty_index]} >", diff_color)
+                display_surface.blit(diff_label, view.point(SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 + 30)); display_surface.blit(diff_value, view.point(SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 + 30))
+
+            speed_label = text_cache.render(self.small_font, "Ball Speed:", speed_color); speed_value = text_cache.render(self.small_font, f"< {ball_speed_levels[session.current_ball_speed_index]} >", speed_color)
+            display_surface.blit(speed_label, view.point(SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 + 80)); display_surface.blit(speed_value, view.point(SCREEN_WIDTH/2 + 30, SCREEN_HEIGHT/2 + 80))
+
+            # Pulsing/blinking text animation
+            if self.pulse_timer % 60 < 40: # Blink on for 40 frames, off for 20
+                prompt_text = text_cache.render(self.game_font, "Press SPACE to Start", LIGHT_GREY)
+                renderer.mark(display_surface.blit(prompt_text, view.centered(prompt_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 150)))
+
+        # 2. Draw the "enter_name" screen
+        elif session.game_state.startswith("enter_name"):
+            prompt = "Enter Player 1 Name:" if session.game_state == "enter_name_p1" else "Enter Player 2 Name:"
+            prompt_text = text_cache.render(self.game_font, prompt, LIGHT_GREY); display_surface.blit(prompt_text, view.centered(prompt_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 100))
+            input_box = pygame.Rect(SCREEN_WIDTH/2 - 150, SCREEN_HEIGHT/2 - 25, 300, 50); pygame.draw.rect(display_surface, ACCENT_COLOR, view.rect(input_box), view.length(2))
+            input_text = text_cache.render(self.game_font, self.active_input_name, LIGHT_GREY); display_surface.blit(input_text, view.point(input_box.x + 10, input_box.y + 10))
+            continue_prompt = text_cache.render(self.small_font, "Press ENTER to continue", LIGHT_GREY); display_surface.blit(continue_prompt, view.centered(continue_prompt, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 100))
+            self.draw_back_hint()
+
+        # 3. Draw the "game_over" screen
+        elif session.game_state == "game_over":
+            winner_render = text_cache.render(self.title_font, session.winner_text, ACCENT_COLOR); prompt_text = text_cache.render(self.game_font, "Press SPACE to Return to Menu", LIGHT_GREY)
+            display_surface.blit(winner_render, view.centered(winner_render, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 100)); display_surface.blit(prompt_text, view.centered(prompt_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 20))
+            self.draw_back_hint()
+
+        # 4. Draw the "playing" screen
+        elif session.game_state == "playing":
+            self.draw_playing()
+
+        # 5. Draw the "waiting" screen of an online match
+        elif session.game_state == "waiting":
+            if self.pulse_timer % 60 < 40:
+                waiting_text = text_cache.render(self.game_font, "Waiting for an opponent...", LIGHT_GREY)
+                renderer.mark(display_surface.blit(waiting_text, view.centered(waiting_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 16)))
+            self.draw_back_hint()
+
+        if self.show_overlay:
+            profiler.start("overlay")
+            self.draw_overlay()
+            profiler.stop()
+
+    def draw_overlay(self):
+        """Draws the profiler overlay: FPS, frame times, particle count and a frame-time graph."""
+        display_surface = self.display_surface
+        view = self.view
+        durations = profiler.frame_durations(OVERLAY_FRAMES) * 1000
+        if profiler.frame_count % OVERLAY_REFRESH == 0 or not self.overlay_lines:
+            recent = durations[-OVERLAY_REFRESH:]
+            self.overlay_lines = [
+                f"FPS {self.clock.get_fps():.0f}",
+                f"frame {recent.mean() if recent.size else 0:.1f} ms, max {recent.max() if recent.size else 0:.1f}",
+                f"particles {len(self.session.particles)}, quality {self.quality.tier['name']}",
+            ]
+        panel = pygame.Rect(SCREEN_WIDTH - OVERLAY_FRAMES * 2 - 20, 10, OVERLAY_FRAMES * 2 + 10, 140)
+        display_surface.fill((0, 0, 0), view.rect(panel))
+        for i, line in enumerate(self.overlay_lines):
+            display_surface.blit(self.text_cache.render(self.hint_font, line, LIGHT_GREY), view.point(panel.x + 5, panel.y + 5 + i * 22))
+
+        # Frame times as a line, 0 to two updates' worth of time; the accent line marks one update
+        graph = pygame.Rect(panel.x + 5, panel.bottom - 65, OVERLAY_FRAMES * 2, 60)
+        scale = graph.height / (2 * TIMESTEP * 1000)
+        target_y = graph.bottom - TIMESTEP * 1000 * scale
+        pygame.draw.line(display_surface, ACCENT_COLOR, view.point(graph.x, target_y), view.point(graph.right, target_y))
+        if durations.size > 1:
+            heights = graph.bottom - (durations.clip(0, 2 * TIMESTEP * 1000) * scale)
+            points = [view.point(x, y) for x, y in zip(range(graph.x, graph.right, 2), heights.tolist())]
+            pygame.draw.lines(display_surface, LIGHT_GREY, False, points)
+        self.renderer.mark(view.rect(panel))
+
+    def toggle_overlay(self):
+        """Shows or hides the profiler overlay; the profiler records while either it or the trace needs it."""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            profiler.enable()
+        elif not self.trace:
+            profiler.disable()
+
+    def write_trace(self, path=None):
+        """Writes the profiled frames as a Chrome trace, by default to a timestamped file.
+
+        Returns the path written, or None when nothing has been profiled yet.
+        """
+        if profiler.frame_count == 0:
+            return None
+        path = path or time.strftime("pong-trace-%Y%m%d-%H%M%S.json")
+        profiler.write_trace(path)
+        self.trace_paths.append(path)
+        return path
+
+    def draw_playing(self):
+        """Draws the match, interpolated between the last two updates."""
+        session = self.session
+        display_surface = self.display_surface
+        renderer = self.renderer
+        text_cache = self.text_cache
+        assets = self.assets
+        view = self.view
+        effects = self.quality.tier
+
+        # Blend between the last two updates so motion stays smooth at any refresh rate
+        alpha = self.accumulator / TIMESTEP
+        draw_ball = session.ball.copy()
+        draw_ball.topleft = (interpolate(session.previous_ball_pos[0], session.ball.x, alpha),
+                             interpolate(session.previous_ball_pos[1], session.ball.y, alpha))
+        draw_player = session.player.copy()
+        draw_player.y = interpolate(session.previous_player_y, session.player.y, alpha)
+        draw_opponent = session.opponent.copy()
+        draw_opponent.y = interpolate(session.previous_opponent_y, session.opponent.y, alpha)
+
         # --- Draw game elements ---
-        
-        # NEW: Draw ball trail (draw first so it's behind the ball)
-        for i, pos in enumerate(ball_trail):
-            trail_radius = (i / len(ball_trail)) * (BALL_RADIUS * 0.5) # Trail particles shrink
-            pygame.draw.circle(display_surface, ACCENT_COLOR, pos, trail_radius)
-
-        # NEW: Draw paddles with flash effect
-        player_color = LIGHT_GREY if player_flash_timer > 0 else ACCENT_COLOR
-        opponent_color = LIGHT_GREY if opponent_flash_timer > 0 else ACCENT_COLOR
-        if player_flash_timer > 0: player_flash_timer -= 1
-        if opponent_flash_timer > 0: opponent_flash_timer -= 1
-        
-        pygame.draw.rect(display_surface, player_color, player)
-        pygame.draw.rect(display_surface, opponent_color, opponent)
-        
-        # UPDATED: Draw ball with squash animation on hit
-        if ball_animation_timer > 0:
-            squash_rect = ball.copy()
-            squash_rect.width = BALL_RADIUS * 2.5 # Make wider
-            squash_rect.height = BALL_RADIUS * 1.5 # Make shorter
-            squash_rect.center = ball.center # Keep it centered
-            pygame.draw.ellipse(display_surface, LIGHT_GREY, squash_rect) # Draw squashed ball in white
-            ball_animation_timer -= 1
+
+        # Draw ball trail (draw first so it's behind the ball)
+        trail = list(session.ball_trail)[len(session.ball_trail) - effects["trail"]:] # The newest points only
+        for i, (x, y) in enumerate(trail):
+            trail_point = assets.trail_sprite(i, len(trail)) # Trail particles shrink
+            if trail_point:
+                sprite, radius = trail_point
+                x, y = view.point(x, y)
+                renderer.mark(display_surface.blit(sprite, (x - radius, y - radius)))
+
+        # Draw paddles with flash effect
+        player_sprite = assets.paddle_flash if session.player_flash_timer > 0 else assets.paddle
+        opponent_sprite = assets.paddle_flash if session.opponent_flash_timer > 0 else assets.paddle
+
+        renderer.mark(display_surface.blit(player_sprite, view.point(*draw_player.topleft)))
+        renderer.mark(display_surface.blit(opponent_sprite, view.point(*draw_opponent.topleft)))
+
+        # Draw ball with squash animation on hit
+        if session.ball_animation_timer > 0:
+            squash_rect = assets.squash.get_rect(center=view.point(*draw_ball.center)) # Wider, shorter and kept centered
+            renderer.mark(display_surface.blit(assets.squash, squash_rect)) # Draw squashed ball in white
         else:
-            pygame.draw.ellipse(display_surface, ACCENT_COLOR, ball) # Draw normal ball
-            
-        pygame.draw.aaline(display_surface, LIGHT_GREY, (SCREEN_WIDTH / 2, 0), (SCREEN_WIDTH / 2, SCREEN_HEIGHT))
-        
+            renderer.mark(display_surface.blit(assets.ball, view.point(*draw_ball.topleft))) # Draw normal ball
+
+        pygame.draw.aaline(display_surface, LIGHT_GREY, view.point(SCREEN_WIDTH / 2, 0), view.point(SCREEN_WIDTH / 2, SCREEN_HEIGHT))
+
         # Draw player names in PvP
-        if game_modes[current_mode_index] == "Player vs Player":
-            p1_name_text = small_font.render(player_1_name, False, LIGHT_GREY)
-            display_surface.blit(p1_name_text, (SCREEN_WIDTH * 0.75 - p1_name_text.get_width()/2, 20))
-            p2_name_text = small_font.render(player_2_name, False, LIGHT_GREY)
-            display_surface.blit(p2_name_text, (SCREEN_WIDTH * 0.25 - p2_name_text.get_width()/2, 20))
-            
+        if session.mode == "Player vs Player":
+            p1_name_text = text_cache.render(self.small_font, session.player_1_name, LIGHT_GREY)
+            display_surface.blit(p1_name_text, view.centered(p1_name_text, SCREEN_WIDTH * 0.75, 20))
+            p2_name_text = text_cache.render(self.small_font, session.player_2_name, LIGHT_GREY)
+            display_surface.blit(p2_name_text, view.centered(p2_name_text, SCREEN_WIDTH * 0.25, 20))
+
         # Draw scores
-        player_text = game_font.render(f"{player_score}", False, LIGHT_GREY)
-        display_surface.blit(player_text, (SCREEN_WIDTH/2 + 20, SCREEN_HEIGHT/2 - 16))
-        opponent_text = game_font.render(f"{opponent_score}", False, LIGHT_GREY)
-        display_surface.blit(opponent_text, (SCREEN_WIDTH/2 - 45, SCREEN_HEIGHT/2 - 16))
-        
+        player_text = text_cache.render(self.game_font, f"{session.player_score}", LIGHT_GREY)
+        renderer.mark(display_surface.blit(player_text, view.point(SCREEN_WIDTH/2 + 20, SCREEN_HEIGHT/2 - 16)))
+        opponent_text = text_cache.render(self.game_font, f"{session.opponent_score}", LIGHT_GREY)
+        renderer.mark(display_surface.blit(opponent_text, view.point(SCREEN_WIDTH/2 - 45, SCREEN_HEIGHT/2 - 16)))
+
         # Draw serve prompt
-        if ball_speed_x == 0 and ball_speed_y == 0:
-            serve_text = small_font.render("Press SPACE to Serve", False, LIGHT_GREY)
-            display_surface.blit(serve_text, (SCREEN_WIDTH/2 - serve_text.get_width()/2, SCREEN_HEIGHT/2 + 50))
-        draw_back_hint()
-
-        # UPDATED: Draw screen flash animation on score
-        if screen_flash_timer > 0:
-            flash_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            flash_surface.set_alpha(100) # Semi-transparent
-            flash_surface.fill((255, 255, 255)) # White
-            display_surface.blit(flash_surface, (0, 0))
-            screen_flash_timer -= 1
-            
-        # NEW: Update and draw all particles
-        update_and_draw_particles()
-
-        # NEW: Add ball trail logic
-        ball_trail.append(ball.center)
-        if len(ball_trail) > 10: # Limit trail length
-            ball_trail.pop(0)
-
-    # --- Final Screen Blit ---
-    
-    # NEW: Handle Screen Shake
-    if screen_shake_timer > 0:
-        render_offset = [random.randint(-4, 4), random.randint(-4, 4)] # Pick a random offset
-        screen_shake_timer -= 1
+        if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            serve_text = text_cache.render(self.small_font, "Press SPACE to Serve", LIGHT_GREY)
+            renderer.mark(display_surface.blit(serve_text, view.centered(serve_text, SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 50)))
+        self.draw_back_hint()
+
+        # Draw screen flash animation on score
+        if session.screen_flash_timer > 0 and effects["flash"]:
+            display_surface.blit(assets.flash_overlay, (0, 0)) # Semi-transparent white
+
+        # Draw all particles
+        profiler.start("particles")
+        session.particles.draw(display_surface, view.scale)
+        profiler.stop()
+        renderer.mark(session.particles.bounds(view.scale))
+
+    def present(self):
+        """Copies display_surface to the window, applying screen shake."""
+        # Draw our display surface (with all game elements) onto the main screen at the offset.
+        # Screen shake and the flash change the whole window, so they always get a full flip.
+        effects = self.quality.tier
+        offset = (0, 0)
+        if effects["shake"]:
+            offset = tuple(round(value) for value in self.view.point(*self.session.shake_offset))
+        flash = self.session.screen_flash_timer > 0 and effects["flash"]
+        self.renderer.present(self.display_surface, offset, full=flash)
+
+    # --- Main Game Loop ---
+    def run(self):
+        """Runs the game until the window is closed. Returns the paths of the traces written."""
+        self.screen # Open the window before the first event poll
+        if self.replay is not None:
+            self.sounds.load()
+        if self.trace:
+            profiler.enable()
+        if self.telemetry:
+            self.session.telemetry = TelemetryWriter(self.telemetry)
+        self.running = True
+        try:
+            self.run_frames()
+        finally:
+            self.stop_recording()
+            if self.session.telemetry is not None:
+                self.session.telemetry.close()
+            if self.trace:
+                self.write_trace(self.trace)
+        return self.trace_paths
+
+    def run_frames(self):
+        """The main loop; returns when the window is closed or the replay is left."""
+        while True:
+            frame_start = time.perf_counter()
+            # --- Event Handling ---
+            profiler.start("events")
+            toggle_overlay = False
+            for event in self.get_events():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    toggle_overlay = not toggle_overlay
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                    self.write_trace()
+                else:
+                    self.handle_event(event)
+            profiler.stop()
+            if toggle_overlay:
+                self.toggle_overlay() # Outside any phase, so the profiler can start or stop cleanly
+            if not self.running:
+                return
+
+            # --- Fixed Timestep Updates ---
+            profiler.start("update")
+            # Run as many updates as the elapsed time covers; rendering happens once per frame
+            while self.accumulator >= TIMESTEP:
+                self.update()
+                self.accumulator -= TIMESTEP
+            profiler.stop()
+
+            # --- Drawing ---
+            profiler.start("draw")
+            self.draw()
+            profiler.stop()
+
+            # --- Final Screen Blit ---
+            profiler.start("present")
+            self.present()
+            profiler.stop()
+
+            # --- Effects Quality ---
+            # Only the time spent producing the frame counts, not the frame cap's wait
+            if self.session.game_state == "playing" and self.quality.frame(time.perf_counter() - frame_start):
+                self.session.particle_burst = self.quality.tier["particles"]
+
+            # --- Timing ---
+            # Measure real time since the last frame; the frame cap only limits rendering.
+            # Waiting at the end of the frame lets the first frame show without waiting.
+            profiler.start("tick")
+            frame_time = min(self.clock.tick(self.fps) / 1000, MAX_FRAME_TIME)
+            profiler.stop()
+            self.accumulator += frame_time * self.speed
+            profiler.end_frame(self.session.game_state)
+
+
+def replay_session(replay, sounds=None):
+    """Returns a GameSession set up like the recorded match was when it started."""
+    session = GameSession(replay.ai, sounds)
+    session.current_mode_index = replay.mode_index
+    session.current_difficulty_index = replay.difficulty_index
+    session.current_ball_speed_index = replay.ball_speed_index
+    session.player_1_name = replay.player_1_name
+    session.player_2_name = replay.player_2_name
+    session.player.y = replay.player_y # Paddles keep their place between matches
+    session.opponent.y = replay.opponent_y
+    session.reset_game(seed=replay.seed)
+    return session
+
+
+def run_replay(path):
+    """Re-runs a recorded match with no rendering and no frame cap, then checks the result against the recording."""
+    replay = Replay(path)
+    session = replay_session(replay)
+    start_time = time.perf_counter()
+    for chunk in replay.chunks():
+        for player_speed, opponent_player_speed, flags in chunk.tolist():
+            session.apply_input(player_speed, opponent_player_speed, flags)
+            session.update()
+    elapsed = time.perf_counter() - start_time
+    result = session.winner_text or "No winner"
+    print(f"{result} ({session.player_score}-{session.opponent_score})")
+    if replay.complete and (session.player_score, session.opponent_score) != (replay.player_score, replay.opponent_score):
+        print(f"Warning: the recorded match ended {replay.player_score}-{replay.opponent_score}")
+    print(f"{len(replay)} updates in {elapsed:.2f}s ({len(replay) / elapsed:,.0f} updates per second)")
+
+
+def run_headless(num_matches, ai="reactive", telemetry=None, seed=None):
+    """Plays AI-vs-AI matches with no rendering and no frame cap, then reports throughput.
+
+    The match seeds and the right paddle's aiming errors all follow from
+    ``seed``, so the same seed plays the same matches.
+    """
+    rng = random.Random(seed)
+    session = GameSession(ai) # No window, fonts or mixer are started
+    if telemetry:
+        session.telemetry = TelemetryWriter(telemetry)
+    session.reset_game(seed=rng.getrandbits(64))
+    matches_played = 0
+    updates = 0
+    aim_offset = 0
+    start_time = time.perf_counter()
+    while matches_played < num_matches:
+        if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            session.serve_ball()
+        # The right paddle chases the ball with a random aim error per rally; errors past its reach miss
+        session.player_speed = 0
+        if session.ball_speed_x < 0:
+            aim_offset = rng.uniform(-CHASER_AIM_ERROR, CHASER_AIM_ERROR) * PADDLE_HEIGHT
+        elif session.ball_speed_x > 0:
+            target_y = session.ball.centery + aim_offset
+            if session.player.centery < target_y: session.player_speed = PADDLE_SPEED
+            if session.player.centery > target_y: session.player_speed = -PADDLE_SPEED
+        session.update()
+        updates += 1
+        if session.game_state == "game_over":
+            matches_played += 1
+            print(f"Match {matches_played}: {session.winner_text} ({session.player_score}-{session.opponent_score})")
+            session.reset_game(seed=rng.getrandbits(64))
+    elapsed = time.perf_counter() - start_time
+    if session.telemetry is not None:
+        session.telemetry.close()
+    print(f"{updates} updates in {elapsed:.2f}s ({updates / elapsed:,.0f} updates per second)")
+
+
+def main(argv=None):
+    from network import NetworkClient, GameServer, DEFAULT_PORT # Not at the top: network imports this module
+
+    # --- Command Line Options ---
+    parser = argparse.ArgumentParser(description="AI Ping Pong")
+    parser.add_argument("--fps", type=int, default=60, help="render frame rate cap, 0 for uncapped (game speed is unaffected)")
+    parser.add_argument("--ai", choices=["reactive", "predictive"], default="reactive", help="opponent AI: chase the ball, or predict where it will arrive")
+    parser.add_argument("--dirty-rects", action="store_true", help="only push changed screen regions instead of flipping the whole window")
+    parser.add_argument("--headless", action="store_true", help="simulate AI-vs-AI matches with no rendering and no frame cap")
+    parser.add_argument("--matches", type=int, default=10, help="number of matches to simulate in headless mode")
+    parser.add_argument("--seed", type=int, help="seed for reproducible headless matches")
+    parser.add_argument("--record", metavar="PATH", help="record every match to a replay file (PATH, then PATH-2, ...)")
+    parser.add_argument("--replay", metavar="PATH", help="play back a recorded match (with --headless: as fast as possible)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay playback rate, e.g. 0.5 or 4")
+    parser.add_argument("--server", action="store_true", help="host online matches (no window); players are paired as they connect")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to host on with --server")
+    parser.add_argument("--connect", metavar="HOST[:PORT]", help="play an online match on a server")
+    parser.add_argument("--name", default="Player", help="your name in online matches")
+    parser.add_argument("--telemetry", metavar="PATH", help="append every serve, hit, bounce, point and match end to a telemetry file")
+    parser.add_argument("--trace", metavar="PATH", help="profile every frame and write a Chrome trace (JSON) on exit")
+    parser.add_argument("--quality", choices=["auto"] + QUALITY_NAMES, default="auto",
+                        help="effects quality; auto lowers it while frames run over budget and raises it again when they don't")
+    parser.add_argument("--resolution", type=parse_size, metavar="WxH",
+                        help=f"internal rendering resolution, scaled to the window (default {SCREEN_WIDTH}x{SCREEN_HEIGHT})")
+    parser.add_argument("--window", type=parse_size, metavar="WxH", help="window size (the window can also be resized)")
+    parser.add_argument("--fullscreen", action="store_true", help="fill the display, keeping the game's aspect ratio")
+    parser.add_argument("--smooth-scaling", action="store_true", help="filter when scaling to the window instead of repeating pixels")
+    args = parser.parse_args(argv)
+    quality = QUALITY_NAMES.index(args.quality) if args.quality != "auto" else None
+    if args.resolution and round(args.resolution[0] * SCREEN_HEIGHT / SCREEN_WIDTH) != args.resolution[1]:
+        parser.error(f"--resolution must have the game's {SCREEN_WIDTH}:{SCREEN_HEIGHT} aspect ratio")
+    display = {"resolution": args.resolution, "window": args.window, "fullscreen": args.fullscreen,
+               "smooth": args.smooth_scaling}
+
+    trace_paths = [] # Printed once the window is closed
+    if args.server:
+        asyncio.run(GameServer().serve_forever(port=args.port))
+    elif args.connect:
+        host, _, port = args.connect.partition(":")
+        client = NetworkClient(args.name)
+        client.start_thread(host, int(port or DEFAULT_PORT))
+        trace_paths = Game(args.fps, dirty_rects=args.dirty_rects, client=client, trace=args.trace, quality=quality,
+                           **display).run()
+    elif args.headless and args.replay:
+        run_replay(args.replay)
+    elif args.headless:
+        run_headless(args.matches, args.ai, args.telemetry, args.seed)
     else:
-        render_offset = [0, 0] # No offset
-
-    # Clear the main screen
-    screen.fill(BG_COLOR)
-    # Draw our display surface (with all game elements) onto the main screen at the offset
-    screen.blit(display_surface, render_offset)
-
-    # Update the display
-    pygame.display.flip()
-    # Control the frame rate to 60 FPS
-    clock.tick(60)
-    
-    # NEW: Increment the pulse timer every frame
-    
-    pulse_timer += 1
+        replay = Replay(args.replay) if args.replay else None
+        trace_paths = Game(args.fps, args.ai, args.dirty_rects, record=args.record, replay=replay, speed=args.speed,
+                           trace=args.trace, quality=quality, telemetry=args.telemetry, **display).run()
+    pygame.quit()
+    for path in trace_paths:
+        print(f"Trace written to {path}")
+
 
+if __name__ == "__main__":
+    main()
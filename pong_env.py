@@ -0,0 +1,313 @@
+"""Reinforcement learning environments: the agent plays the right paddle against the game's AI.
+
+``PongEnv`` is one match with the usual reset/step interface:
+
+    env = PongEnv(obs="state", frame_skip=4)
+    obs, info = env.reset(seed=1)
+    obs, reward, terminated, truncated, info = env.step(DOWN)
+
+``VectorPongEnv`` steps ``num_envs`` matches per call and takes an array of
+actions. Matches that end are restarted within the same call, so the
+observation returned for them is the first of their next match.
+
+Actions are UP, STAY and DOWN; the paddle moves like a held arrow key for
+``frame_skip`` updates. The reward is +1 when the agent scores and -1
+when the AI does. The ball is served automatically. An episode ends when
+either side reaches the winning score, or is truncated after
+``max_updates`` updates.
+
+Two observation modes:
+
+- ``"state"``: float32 ball center, ball speed and both paddle tops,
+  scaled to about -1..1 (see ``STATE_FIELDS``). VectorPongEnv steps
+  these with BatchSimulation, all matches in one NumPy call.
+- ``"pixels"``: the playing screen as the game draws it, as an
+  (height, width, 3) uint8 array. It is a ``pygame.surfarray.pixels3d``
+  view of the surface the match is drawn on, not a copy. With
+  ``downsample`` the game draws at 1/n of its resolution, so smaller
+  observations are also cheaper to draw. Frames are
+  drawn into two surfaces in turn, so an observation stays valid while
+  the next step is taken, but not after that: copy it to keep it.
+  VectorPongEnv draws all matches side by side on one surface, so its
+  (num_envs, height, width, 3) observation is a view as well.
+
+Pixel observations are drawn off-screen, with SDL's dummy video driver
+unless another one is set.
+
+    python pong_env.py --num-envs 64 --frame-skip 4   # steps per second of both modes
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Read when the display starts, not at import
+
+import numpy as np
+import pygame
+
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, PADDLE_HEIGHT, PADDLE_SPEED, AI_SPEEDS, BALL_SPEEDS, PREDICTIVE_AI_LEVELS
+from settings import UPDATES_PER_SECOND
+from batch_sim import BatchSimulation
+from dirty_rects import DirtyRectRenderer
+from ping_pong import Game, GameSession, BG_COLOR, TIMESTEP, difficulty_levels, ball_speed_levels
+
+# Actions
+UP = 0
+STAY = 1
+DOWN = 2
+NUM_ACTIONS = 3
+
+STATE_FIELDS = ["ball_x", "ball_y", "ball_speed_x", "ball_speed_y", "player_y", "opponent_y"]
+STATE_SCALE = np.array([SCREEN_WIDTH, SCREEN_HEIGHT, max(BALL_SPEEDS.values()), max(BALL_SPEEDS.values()),
+                        SCREEN_HEIGHT, SCREEN_HEIGHT], dtype=np.float32)
+MAX_UPDATES = 10 * 60 * UPDATES_PER_SECOND # Ten minutes of game time
+PADDLE_START_Y = (SCREEN_HEIGHT - PADDLE_HEIGHT) // 2 # Top of a centered paddle
+
+
+def state_observation(ball_x, ball_y, ball_speed_x, ball_speed_y, player_y, opponent_y):
+    """Stacks state values (scalars, or one array per field) into scaled float32 observations."""
+    state = np.stack(np.broadcast_arrays(ball_x, ball_y, ball_speed_x, ball_speed_y, player_y, opponent_y), axis=-1)
+    return state.astype(np.float32) / STATE_SCALE
+
+
+def pixel_resolution(downsample=1):
+    """(width, height) the screen is drawn at for a pixel observation."""
+    return (-(-SCREEN_WIDTH // downsample), -(-SCREEN_HEIGHT // downsample))
+
+
+def pixel_shape(downsample=1):
+    """Shape of a pixel observation."""
+    width, height = pixel_resolution(downsample)
+    return (height, width, 3)
+
+
+def pixel_view(surface):
+    """A (height, width, 3) view of surface's pixels."""
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2) # pixels3d is (x, y, channel), no copy
+
+
+def frame_renderer(resolution=None):
+    """A Game used only for its drawing code: fonts, sprites and the playing screen, drawn at ``resolution``."""
+    game = Game(fps=0, resolution=resolution)
+    game.accumulator = TIMESTEP # Draw the latest update itself, not a blend with the one before
+    game.renderer = DirtyRectRenderer(game.screen, BG_COLOR, enabled=False) # Nothing is presented
+    return game
+
+
+class PongEnv:
+    """One match against the game's AI, stepped with GameSession."""
+
+    def __init__(self, obs="state", frame_skip=1, downsample=1, ai="reactive", difficulty="Medium",
+                 ball_speed="Normal", max_updates=MAX_UPDATES, surfaces=None, game=None):
+        if obs not in ("state", "pixels"):
+            raise ValueError(f"Unknown observation mode '{obs}', expected 'state' or 'pixels'")
+        self.obs = obs
+        self.frame_skip = frame_skip
+        self.downsample = downsample
+        self.max_updates = max_updates
+        self.session = GameSession(ai)
+        self.session.current_difficulty_index = difficulty_levels.index(difficulty)
+        self.session.current_ball_speed_index = ball_speed_levels.index(ball_speed)
+        self.rng = random.Random()
+        self.updates = 0 # Updates played in the current match
+
+        # --- Pixel Observations ---
+        # VectorPongEnv passes a shared Game and slices of its own surfaces
+        self.game = None
+        self.surfaces = surfaces
+        self.buffer = 0 # Index of the surface drawn last
+        if obs == "pixels":
+            self.game = game or frame_renderer(pixel_resolution(downsample))
+            self.surfaces = surfaces or [pygame.Surface(pixel_resolution(downsample)) for _ in range(2)]
+
+    @property
+    def observation_shape(self):
+        return (len(STATE_FIELDS),) if self.obs == "state" else pixel_shape(self.downsample)
+
+    def reset(self, seed=None):
+        """Starts a new match. Returns (observation, info)."""
+        if seed is not None:
+            self.rng.seed(seed)
+        self.start_match()
+        return self.observe(), {}
+
+    def start_match(self):
+        # The game keeps paddles where they were between matches; an episode starts centered, like BatchSimulation
+        self.session.player.y = self.session.opponent.y = PADDLE_START_Y
+        self.session.reset_game(seed=self.rng.getrandbits(64))
+        self.session.serve_ball()
+        self.updates = 0
+
+    def step(self, action):
+        """Holds the paddle direction for frame_skip updates. Returns (obs, reward, terminated, truncated, info)."""
+        reward, terminated, truncated = self.advance(action)
+        return self.observe(), reward, terminated, truncated, {}
+
+    def advance(self, action):
+        """The game part of step(): returns (reward, terminated, truncated)."""
+        session = self.session
+        session.player_speed = (action - STAY) * PADDLE_SPEED
+        reward = 0
+        for _ in range(self.frame_skip):
+            if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+                session.serve_ball()
+            lead = session.player_score - session.opponent_score
+            session.update()
+            self.updates += 1
+            reward += session.player_score - session.opponent_score - lead
+            if session.game_state == "game_over":
+                break
+        terminated = session.game_state == "game_over"
+        return reward, terminated, not terminated and self.updates >= self.max_updates
+
+    def observe(self):
+        session = self.session
+        if self.obs == "state":
+            return state_observation(session.ball_position[0], session.ball_position[1], session.ball_speed_x,
+                                     session.ball_speed_y, session.player.y, session.opponent.y)
+        return pixel_view(self.draw())
+
+    def draw(self):
+        """Draws the playing screen with the game's own drawing code into the other surface. Returns it."""
+        surface = self.surfaces[1 - self.buffer]
+        if surface.get_abs_parent().get_locked():
+            raise RuntimeError("An observation from two steps ago is still in use; copy observations to keep them")
+        self.buffer = 1 - self.buffer
+        game = self.game
+        game.session = self.session
+        game.display_surface = surface
+        game.draw()
+        game.renderer.discard()
+        return surface
+
+
+class VectorPongEnv:
+    """``num_envs`` matches against the game's AI, stepped together.
+
+    With state observations the matches are a BatchSimulation, so a step
+    is a few NumPy operations however many matches there are. Pixel
+    observations need the game's drawing, so each match is a PongEnv
+    drawing into its own slice of shared surfaces.
+    """
+
+    def __init__(self, num_envs, obs="state", frame_skip=1, downsample=1, ai="reactive", difficulty="Medium",
+                 ball_speed="Normal", max_updates=MAX_UPDATES):
+        if obs not in ("state", "pixels"):
+            raise ValueError(f"Unknown observation mode '{obs}', expected 'state' or 'pixels'")
+        self.num_envs = num_envs
+        self.obs = obs
+        self.frame_skip = frame_skip
+        self.downsample = downsample
+        self.max_updates = max_updates
+
+        if obs == "state":
+            if ai == "predictive":
+                level = PREDICTIVE_AI_LEVELS[difficulty]
+                ai_options = {"opponent_speed": level["max_speed"], "reaction_delay": level["reaction_delay"],
+                              "prediction_noise": level["prediction_noise"]}
+            else:
+                ai_options = {"opponent_speed": AI_SPEEDS[difficulty]}
+            self.sim = BatchSimulation(num_envs, ball_speed=BALL_SPEEDS[ball_speed], ai=ai, **ai_options)
+        else:
+            # All matches side by side, so one pixels3d view covers every observation
+            width, height = pixel_resolution(downsample)
+            self.surfaces = [pygame.Surface((width * num_envs, height)) for _ in range(2)]
+            game = frame_renderer((width, height))
+            self.envs = []
+            for i in range(num_envs):
+                area = (width * i, 0, width, height)
+                self.envs.append(PongEnv("pixels", frame_skip, downsample, ai, difficulty, ball_speed, max_updates,
+                                         surfaces=[surface.subsurface(area) for surface in self.surfaces], game=game))
+
+    @property
+    def observation_shape(self):
+        if self.obs == "state":
+            return (self.num_envs, len(STATE_FIELDS))
+        return (self.num_envs,) + pixel_shape(self.downsample)
+
+    def reset(self, seed=None):
+        """Starts a new match in every environment. Returns (observations, info)."""
+        if self.obs == "state":
+            self.sim.rng = np.random.default_rng(seed)
+            self.sim.reset()
+            self.sim.serve()
+        else:
+            seeds = np.random.SeedSequence(seed).generate_state(self.num_envs, np.uint64)
+            for env, env_seed in zip(self.envs, seeds.tolist()):
+                env.rng.seed(env_seed)
+                env.start_match()
+        return self.observe(), {}
+
+    def step(self, actions):
+        """Steps every environment with its action. Returns (obs, rewards, terminated, truncated, info) arrays."""
+        actions = np.asarray(actions)
+        if self.obs == "state":
+            sim = self.sim
+            speeds = (actions - STAY) * PADDLE_SPEED
+            rewards = np.zeros(self.num_envs, dtype=np.float32)
+            for _ in range(self.frame_skip): # Serving before every update, like PongEnv.advance()
+                sim.serve()
+                player_point, opponent_point = sim.step(speeds)
+                rewards += player_point
+                rewards -= opponent_point
+            terminated = sim.done
+            truncated = ~terminated & (sim.match_frames >= self.max_updates)
+            sim.reset(terminated | truncated)
+            sim.serve(terminated | truncated) # The others are served before their next update
+        else:
+            rewards = np.zeros(self.num_envs, dtype=np.float32)
+            terminated = np.zeros(self.num_envs, dtype=bool)
+            truncated = np.zeros(self.num_envs, dtype=bool)
+            for i, env in enumerate(self.envs):
+                rewards[i], terminated[i], truncated[i] = env.advance(actions[i])
+                if terminated[i] or truncated[i]:
+                    env.start_match()
+        return self.observe(), rewards, terminated, truncated, {}
+
+    def observe(self):
+        if self.obs == "state":
+            sim = self.sim
+            return state_observation(sim.ball_x, sim.ball_y, sim.ball_speed_x, sim.ball_speed_y,
+                                     sim.player_y, sim.opponent_y)
+        for env in self.envs:
+            env.draw()
+        # (num_envs * width, height, 3) -> (num_envs, width, height, 3) only splits the x axis, so it stays a view
+        pixels = pygame.surfarray.pixels3d(self.surfaces[self.envs[0].buffer])
+        width, height = pixel_resolution(self.downsample)
+        return pixels.reshape(self.num_envs, width, height, 3).transpose(0, 2, 1, 3)
+
+
+def measure(env, steps, seed=0):
+    """Steps env with random actions. Returns environment steps per second."""
+    rng = np.random.default_rng(seed)
+    env.reset(seed=seed)
+    vector = isinstance(env, VectorPongEnv)
+    actions = rng.integers(0, NUM_ACTIONS, (steps, env.num_envs if vector else 1))
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions if vector else step_actions[0])
+    elapsed = time.perf_counter() - start
+    return steps * (env.num_envs if vector else 1) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steps per second of the Pong environments")
+    parser.add_argument("--num-envs", type=int, default=64)
+    parser.add_argument("--frame-skip", type=int, default=4)
+    parser.add_argument("--downsample", type=int, default=4, help="draw pixel observations at 1/n of the resolution")
+    parser.add_argument("--steps", type=int, default=200, help="steps per measurement")
+    options = parser.parse_args()
+
+    skip, downsample = options.frame_skip, options.downsample
+    print(f"frame skip {skip}, pixel downsample {downsample} (steps per second; x{skip} for updates per second)")
+    for label, env in [
+            ("state,  1 env", PongEnv("state", skip)),
+            (f"state, {options.num_envs} envs", VectorPongEnv(options.num_envs, "state", skip)),
+            ("pixels, 1 env", PongEnv("pixels", skip, downsample)),
+            (f"pixels, {options.num_envs} envs", VectorPongEnv(options.num_envs, "pixels", skip, downsample))]:
+        print(f"{label:>18}: {measure(env, options.steps):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Per-frame phase timing for the main loop.
+
+The game calls ``profiler.start(phase)`` / ``profiler.stop()`` around each
+part of a frame and ``profiler.end_frame(state)`` once per frame. Phases may
+nest; time is charged to the innermost running phase only, so the phase
+times of a frame add up to the time spent inside phases. While the profiler
+is disabled (the default) every call returns immediately and no buffers
+exist.
+
+Enabled, it keeps the most recent frames and phase slices in fixed-size
+ring buffers (NumPy arrays allocated by ``enable()``), so it can stay on
+for a whole session without growing. They feed the in-game overlay and
+are exported as a Chrome trace (chrome://tracing or ui.perfetto.dev) with
+``write_trace()``.
+"""
+import json
+import time
+
+import numpy as np
+
+FRAME_CAPACITY = 4096 # Frames kept (over a minute at 60 FPS)
+SLICE_CAPACITY = 65536 # Phase slices kept for the trace
+MAX_PHASES = 32 # Distinct phase names
+
+
+class FrameProfiler:
+    """Collects exclusive time per phase for every frame, plus each phase slice's start and end."""
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = [] # Phase names; their index is their column in frame_times
+        self.phase_ids = {}
+        self.states = [] # Game state names; their index is stored in frame_state
+        self.state_ids = {}
+        self.frame_count = 0 # Frames recorded since the last reset (the ring keeps the newest ones)
+        self.slice_count = 0
+        self.frame_times = None # Allocated by enable()
+        self.current = None
+        self.stack = [] # (phase id, start time) of the running phases, innermost last
+        self.mark = 0.0
+        self.frame_start = 0.0
+
+    def enable(self, frame_capacity=FRAME_CAPACITY, slice_capacity=SLICE_CAPACITY):
+        """Allocates the ring buffers (if their size changed) and starts recording."""
+        if self.frame_times is None or len(self.frame_times) != frame_capacity or len(self.slice_phase) != slice_capacity:
+            self.frame_times = np.zeros((frame_capacity, MAX_PHASES)) # Exclusive seconds per phase
+            self.frame_starts = np.zeros(frame_capacity)
+            self.frame_ends = np.zeros(frame_capacity)
+            self.frame_state = np.zeros(frame_capacity, dtype=np.int16)
+            self.slice_phase = np.zeros(slice_capacity, dtype=np.int16)
+            self.slice_start = np.zeros(slice_capacity)
+            self.slice_end = np.zeros(slice_capacity)
+            self.current = np.zeros(MAX_PHASES)
+            self.reset()
+        self.frame_start = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        """Stops recording; what was recorded stays available."""
+        self.enabled = False
+        self.stack = []
+        if self.current is not None:
+            self.current[:] = 0
+
+    def start(self, phase):
+        """Starts timing phase, pausing the phase it is nested in."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.stack:
+            self.current[self.stack[-1][0]] += now - self.mark
+        phase_id = self.phase_ids.get(phase)
+        if phase_id is None:
+            phase_id = self._add_name(phase, self.phases, self.phase_ids)
+        self.stack.append((phase_id, now))
+        self.mark = now
+
+    def stop(self):
+        """Stops the innermost phase and resumes the one it was nested in."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        phase_id, start = self.stack.pop()
+        self.current[phase_id] += now - self.mark
+        self.mark = now
+        index = self.slice_count % len(self.slice_phase)
+        self.slice_phase[index] = phase_id
+        self.slice_start[index] = start
+        self.slice_end[index] = now
+        self.slice_count += 1
+
+    def end_frame(self, state):
+        """Stores the phase times of the frame that just finished, labelled with the game state."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        state_id = self.state_ids.get(state)
+        if state_id is None:
+            state_id = self._add_name(state, self.states, self.state_ids)
+        index = self.frame_count % len(self.frame_times)
+        self.frame_times[index] = self.current
+        self.frame_starts[index] = self.frame_start
+        self.frame_ends[index] = now
+        self.frame_state[index] = state_id
+        self.frame_count += 1
+        self.current[:] = 0
+        self.frame_start = now
+
+    @staticmethod
+    def _add_name(name, names, ids):
+        if len(names) == MAX_PHASES:
+            raise ValueError(f"More than {MAX_PHASES} names; can't add '{name}'")
+        ids[name] = len(names)
+        names.append(name)
+        return ids[name]
+
+    def timed(self, phase, function):
+        """Wraps function so every call to it is timed as phase."""
+        def wrapper(*args, **kwargs):
+            self.start(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop()
+        return wrapper
+
+    def reset(self):
+        """Forgets every recorded frame and slice."""
+        self.frame_count = 0
+        self.slice_count = 0
+        self.stack = []
+        if self.current is not None:
+            self.current[:] = 0
+
+    # --- Reading the ring buffers ---
+    def _ring_order(self, count, capacity, last=None):
+        """Indices of the newest ``last`` (default: all kept) entries, oldest first."""
+        kept = min(count, capacity)
+        if last is not None:
+            kept = min(kept, last)
+        return np.arange(count - kept, count) % capacity
+
+    def frame_durations(self, last=None):
+        """Wall-clock seconds of the newest frames, oldest first (includes time outside phases)."""
+        if self.frame_times is None:
+            return np.zeros(0)
+        order = self._ring_order(self.frame_count, len(self.frame_times), last)
+        return self.frame_ends[order] - self.frame_starts[order]
+
+    def frames(self, last=None):
+        """The newest frames as a list of (state, {phase: seconds}), oldest first."""
+        if self.frame_times is None:
+            return []
+        frames = []
+        for index in self._ring_order(self.frame_count, len(self.frame_times), last).tolist():
+            times = self.frame_times[index]
+            phases = {self.phases[phase_id]: times[phase_id] for phase_id in np.flatnonzero(times).tolist()}
+            frames.append((self.states[self.frame_state[index]], phases))
+        return frames
+
+    def write_trace(self, path):
+        """Writes the kept frames and phase slices as a Chrome trace (JSON).
+
+        Each frame is a slice named after the game state, with the phases
+        nested inside it; the frame's exclusive time per phase is in its args.
+        """
+        if self.frame_times is None:
+            raise RuntimeError("The profiler has not recorded anything")
+        events = []
+        frame_order = self._ring_order(self.frame_count, len(self.frame_times))
+        origin = self.frame_starts[frame_order[0]] if frame_order.size else 0.0
+        for index in frame_order.tolist():
+            times = self.frame_times[index]
+            events.append({
+                "name": self.states[self.frame_state[index]], "cat": "frame", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (self.frame_starts[index] - origin) * 1e6,
+                "dur": (self.frame_ends[index] - self.frame_starts[index]) * 1e6,
+                "args": {self.phases[phase_id]: round(times[phase_id] * 1000, 4)
+                         for phase_id in np.flatnonzero(times).tolist()}, # Exclusive ms per phase
+            })
+        for index in self._ring_order(self.slice_count, len(self.slice_phase)).tolist():
+            if self.slice_start[index] < origin:
+                continue # Its frame already left the frame ring
+            events.append({
+                "name": self.phases[self.slice_phase[index]], "cat": "phase", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (self.slice_start[index] - origin) * 1e6,
+                "dur": (self.slice_end[index] - self.slice_start[index]) * 1e6,
+            })
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+# Shared instance used by ping_pong.py; tools enable it before starting the game
+profiler = FrameProfiler()
@@ -0,0 +1,96 @@
+"""Adaptive quality of the visual effects.
+
+The paddle hit particles, the ball trail, the score flash and the screen
+shake cost the same whatever the machine can sustain. ``QualityGovernor``
+watches how long each frame takes to produce (the busy time before the
+frame rate cap waits) against the frame budget, and steps through
+``QUALITY_TIERS`` to keep it under budget: fewer particles, a shorter
+trail, no flash, then no shake.
+
+Stepping uses hysteresis so the tier doesn't oscillate: it drops as soon
+as the rolling mean goes over DOWNGRADE_LOAD of the budget, but only
+rises after a longer stretch under UPGRADE_LOAD. A rise that is followed
+by a drop soon after doubles the stretch needed for the next rise. Only
+frames of a match in progress are fed to the governor, so menus don't
+raise the tier on their own.
+"""
+from collections import deque
+
+# Effects per tier, best first. "particles" per paddle hit, "trail" points drawn.
+QUALITY_TIERS = [
+    {"name": "Full", "particles": 10, "trail": 10, "flash": True, "shake": True},
+    {"name": "High", "particles": 5, "trail": 10, "flash": True, "shake": True},
+    {"name": "Medium", "particles": 5, "trail": 4, "flash": True, "shake": True},
+    {"name": "Low", "particles": 5, "trail": 4, "flash": False, "shake": True},
+    {"name": "Minimal", "particles": 0, "trail": 0, "flash": False, "shake": False},
+]
+QUALITY_NAMES = [tier["name"].lower() for tier in QUALITY_TIERS]
+
+DOWNGRADE_LOAD = 0.9 # Busy fraction of the frame budget that steps quality down
+UPGRADE_LOAD = 0.6 # Busy fraction the frames must stay under to step quality up
+DOWNGRADE_FRAMES = 30 # Frames averaged before stepping down
+UPGRADE_FRAMES = 120 # Frames averaged before stepping up
+MAX_UPGRADE_FRAMES = 1920 # Cap on the upgrade wait after repeated failed rises
+
+
+class QualityGovernor:
+    """Picks the effects tier from recent frame times; ``pinned`` (a tier index) overrides it."""
+
+    def __init__(self, budget, pinned=None):
+        self.budget = budget # Seconds per frame at the target frame rate
+        self.pinned = pinned
+        self.level = pinned if pinned is not None else 0 # Index into QUALITY_TIERS
+        self.busy_times = deque(maxlen=MAX_UPGRADE_FRAMES + 1) # Most recent last
+        self.recent_sum = 0.0 # Running sums of the last DOWNGRADE_FRAMES and upgrade_frames busy times
+        self.settled_sum = 0.0
+        self.upgrade_frames = UPGRADE_FRAMES
+        self.frames_since_upgrade = None # None until the first rise
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.level]
+
+    def pin(self, level):
+        """Fixes the tier (None returns to automatic)."""
+        self.pinned = level
+        if level is not None:
+            self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.busy_times.clear() # Frames measured at the old tier say little about the new one
+        self.recent_sum = self.settled_sum = 0.0
+
+    def _add(self, total, frames, busy_time):
+        """Running sum of the last ``frames`` busy times after busy_time was appended."""
+        total += busy_time
+        if len(self.busy_times) > frames:
+            total -= self.busy_times[-frames - 1] # The frame that just left the window
+        return total
+
+    def frame(self, busy_time):
+        """Records one frame's busy seconds. Returns True if the tier changed."""
+        if self.pinned is not None:
+            return False
+        self.busy_times.append(busy_time)
+        self.recent_sum = self._add(self.recent_sum, DOWNGRADE_FRAMES, busy_time)
+        self.settled_sum = self._add(self.settled_sum, self.upgrade_frames, busy_time)
+        if self.frames_since_upgrade is not None:
+            self.frames_since_upgrade += 1
+
+        count = len(self.busy_times)
+        recent = self.recent_sum / DOWNGRADE_FRAMES if count >= DOWNGRADE_FRAMES else None
+        if recent is not None and recent > self.budget * DOWNGRADE_LOAD and self.level < len(QUALITY_TIERS) - 1:
+            # Dropping back soon after a rise means that tier can't be held: wait longer next time
+            if self.frames_since_upgrade is not None and self.frames_since_upgrade < self.upgrade_frames:
+                self.upgrade_frames = min(self.upgrade_frames * 2, MAX_UPGRADE_FRAMES)
+            self.frames_since_upgrade = None
+            self.set_level(self.level + 1)
+            return True
+
+        settled = self.settled_sum / self.upgrade_frames if count >= self.upgrade_frames else None
+        if settled is not None and settled < self.budget * UPGRADE_LOAD and self.level > 0:
+            self.frames_since_upgrade = 0
+            self.set_level(self.level - 1)
+            return True
+        return False
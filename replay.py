@@ -0,0 +1,143 @@
+"""Recording and reading of match replays.
+
+A match is fully determined by its starting settings, its random seed and
+the paddle input of every update, so that is all a replay stores: a fixed
+128-byte header followed by one 3-byte record per update (player paddle
+speed, second paddle speed, flags). The records are a plain NumPy
+structured array on disk, so a replay is opened with ``np.memmap`` and long
+sessions can be scanned in chunks without reading the whole file.
+
+    python replay.py match.pongrec    # print a replay's header and input statistics
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"PONGREC\0"
+VERSION = 1
+HEADER_SIZE = 128
+# magic, version, ai, mode, difficulty, ball speed, complete, player y, opponent y,
+# seed, updates, player score, opponent score, player 1 name, player 2 name
+HEADER = struct.Struct("<8sHBBBBBhhQQHH40s40s")
+
+INPUT_DTYPE = np.dtype([("player_speed", "i1"), ("opponent_speed", "i1"), ("flags", "u1")])
+FLAG_SERVE = 1 # serve_ball() was called before this update
+
+AI_TYPES = ["reactive", "predictive"]
+BUFFER_SIZE = 4096 # Records kept in memory between writes
+
+
+class ReplayRecorder:
+    """Writes the input of one match to a replay file as it is played.
+
+    Created right after ``GameSession.reset_game()``; the session then calls
+    ``record()`` at the start of every update. Records are collected in a
+    preallocated buffer and appended to the file in blocks, and ``close()``
+    fills in the final score so a replay can be checked against it.
+    """
+
+    def __init__(self, path, session):
+        self.path = path
+        self.session = session
+        self.start_y = (session.player.y, session.opponent.y) # Paddles move during the match
+        self.buffer = np.zeros(BUFFER_SIZE, dtype=INPUT_DTYPE)
+        self.count = 0 # Records in the buffer
+        self.updates = 0 # Records written in total
+        self.file = open(path, "wb")
+        self.file.write(self._header(complete=False))
+
+    def _header(self, complete):
+        session = self.session
+        header = HEADER.pack(MAGIC, VERSION, AI_TYPES.index(session.ai), session.current_mode_index,
+                             session.current_difficulty_index, session.current_ball_speed_index, complete,
+                             *self.start_y, session.seed, self.updates,
+                             session.player_score, session.opponent_score,
+                             session.player_1_name.encode("utf-8"), session.player_2_name.encode("utf-8"))
+        return header.ljust(HEADER_SIZE, b"\0")
+
+    def record(self, player_speed, opponent_speed, served):
+        """Stores the input of one update."""
+        self.buffer[self.count] = (player_speed, opponent_speed, FLAG_SERVE if served else 0)
+        self.count += 1
+        self.updates += 1
+        if self.count == BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered records to the file."""
+        self.file.write(self.buffer[:self.count].tobytes())
+        self.count = 0
+
+    def close(self):
+        """Writes the remaining records and the final header."""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.seek(0)
+        self.file.write(self._header(complete=True))
+        self.file.close()
+
+
+class Replay:
+    """A replay file opened for reading. ``inputs`` is a read-only memory map of the records."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+            raise ValueError(f"{path} is not a replay file")
+        (_, version, ai, self.mode_index, self.difficulty_index, self.ball_speed_index, complete,
+         self.player_y, self.opponent_y, self.seed, self.updates, self.player_score, self.opponent_score,
+         player_1_name, player_2_name) = HEADER.unpack_from(header)
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} replay, expected version {VERSION}")
+        self.ai = AI_TYPES[ai]
+        self.complete = bool(complete) # False if the game stopped before the match ended cleanly
+        self.player_1_name = player_1_name.rstrip(b"\0").decode("utf-8")
+        self.player_2_name = player_2_name.rstrip(b"\0").decode("utf-8")
+
+        # The record count comes from the file size, so a replay cut short by a crash is still readable
+        count = (os.path.getsize(path) - HEADER_SIZE) // INPUT_DTYPE.itemsize
+        if count > 0:
+            self.inputs = np.memmap(path, dtype=INPUT_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.inputs = np.zeros(0, dtype=INPUT_DTYPE) # np.memmap cannot map zero bytes
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def chunks(self, size=65536):
+        """Yields the records in blocks of ``size``, each read into memory only when reached."""
+        for start in range(0, len(self.inputs), size):
+            yield np.array(self.inputs[start:start + size])
+
+
+if __name__ == "__main__":
+    import sys
+
+    from settings import UPDATES_PER_SECOND
+
+    replay = Replay(sys.argv[1])
+    print(f"{replay.path}: {replay.ai} AI, mode {replay.mode_index}, difficulty {replay.difficulty_index}, "
+          f"ball speed {replay.ball_speed_index}, seed {replay.seed}")
+    if replay.complete:
+        print(f"Final score {replay.player_score}-{replay.opponent_score}")
+    else:
+        print("Recording did not finish cleanly")
+
+    # Scan the inputs chunk by chunk; only one chunk is in memory at a time
+    serves = changes = moving = 0
+    previous = None
+    for chunk in replay.chunks():
+        speeds = chunk["player_speed"]
+        serves += int(np.count_nonzero(chunk["flags"] & FLAG_SERVE))
+        moving += int(np.count_nonzero(speeds))
+        changes += int(np.count_nonzero(speeds[1:] != speeds[:-1]))
+        if previous is not None and speeds[0] != previous:
+            changes += 1
+        previous = speeds[-1]
+    updates = len(replay)
+    print(f"{updates} updates ({updates / UPDATES_PER_SECOND:.1f}s of play), {serves} serves, "
+          f"{changes} player input changes, player paddle moving {moving / max(updates, 1):.0%} of the time")
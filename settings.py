@@ -0,0 +1,39 @@
+# --- Shared Game Settings ---
+# Plain numbers only (no pygame objects) so headless tools can import this
+# without opening a window.
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+BALL_RADIUS = 15
+PADDLE_WIDTH = 10
+PADDLE_HEIGHT = 140
+WINNING_SCORE = 5
+
+# Paddle positions (x of the left edge)
+PLAYER_X = SCREEN_WIDTH - 20 - PADDLE_WIDTH
+OPPONENT_X = 10
+
+# Pixels per update a human-controlled paddle moves while a key is held
+PADDLE_SPEED = 7
+
+# AI paddle speed for each difficulty level
+AI_SPEEDS = {"Easy": 5.5, "Medium": 5.9, "Hard": 7}
+
+# Base ball speed for each ball speed level
+BALL_SPEEDS = {"Slow": 5, "Normal": 7, "Fast": 10}
+
+# Game logic updates per second; every speed in the game is in pixels per update
+UPDATES_PER_SECOND = 60
+
+# Predictive AI for each difficulty level: reaction delay (updates),
+# prediction noise (pixels, standard deviation) and max paddle speed
+PREDICTIVE_AI_LEVELS = {
+    "Easy": {"reaction_delay": 20, "prediction_noise": 60, "max_speed": 5},
+    "Medium": {"reaction_delay": 10, "prediction_noise": 30, "max_speed": 6.5},
+    "Hard": {"reaction_delay": 3, "prediction_noise": 10, "max_speed": 8},
+}
+
+# Largest aiming error, as a fraction of the paddle height, of the chasing
+# player in headless matches and the tournament. Its reach is half the paddle
+# height plus the ball radius (0.61 of the paddle height), so wider errors miss.
+CHASER_AIM_ERROR = 0.8
@@ -0,0 +1,137 @@
+"""Sound effects through a fixed pool of reserved mixer channels.
+
+Every wall and paddle contact asks for the "pong" sound. When the ball
+grinds along a wall or inside a paddle that happens on consecutive
+updates, and playing each request on a free channel would stack voices.
+``SoundManager`` gives each sound a few reserved channels and a cooldown:
+
+- a request within the sound's cooldown of its last play is dropped; the
+  cooldown is measured in game time, which the game advances with
+  ``tick()`` every update, so several updates run in one frame or a
+  replay played fast are spaced like the updates themselves
+- a request with all of the sound's channels busy steals the channel that
+  started playing longest ago
+
+so no more than ``SOUNDS[name]["channels"]`` voices of a sound ever play
+at once. Sounds are decoded (or, when their file is missing, synthesized
+with NumPy) once in ``load()`` and cached for the life of the process, so
+nothing is decoded during play.
+"""
+import numpy as np
+import pygame
+
+# Per sound: file, reserved channels, cooldown (seconds of game time) and the fallback tone
+# (note frequencies in Hz played one after another, seconds per note, volume 0..1)
+SOUNDS = {
+    "pong": {"file": "pong.ogg", "channels": 3, "cooldown": 0.05,
+             "tone": {"notes": [660], "duration": 0.06, "volume": 0.4}},
+    "score": {"file": "score.ogg", "channels": 1, "cooldown": 0.25,
+              "tone": {"notes": [523, 784], "duration": 0.12, "volume": 0.4}},
+}
+
+_decoded = {} # (name, mixer settings) -> Sound, shared by every SoundManager
+
+
+def synthesize_tone(notes, duration, volume, mixer_settings):
+    """Returns the sample array of a sequence of square-wave notes with a short decay, in the mixer's format."""
+    frequency, size, channels = mixer_settings
+    times = np.arange(int(frequency * duration)) / frequency
+    envelope = np.exp(-times / (duration / 4)) # Fades out like a struck note, so the end doesn't click
+    wave = np.concatenate([np.sign(np.sin(2 * np.pi * note * times)) * envelope for note in notes]) * volume
+    if size == 32:
+        samples = wave.astype(np.float32)
+    else:
+        bits = abs(size)
+        dtype = np.dtype(f"{'i' if size < 0 else 'u'}{bits // 8}")
+        amplitude = 2 ** (bits - 1) - 1
+        samples = (wave * amplitude + (0 if size < 0 else amplitude + 1)).astype(dtype)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return samples
+
+
+def load_sound(name, mixer_settings):
+    """Returns the decoded Sound for name, from its file or synthesized when the file is missing."""
+    key = (name, mixer_settings)
+    if key not in _decoded:
+        spec = SOUNDS[name]
+        try:
+            _decoded[key] = pygame.mixer.Sound(spec["file"])
+        except (pygame.error, FileNotFoundError): # Newer pygame raises FileNotFoundError
+            print(f"Warning: sound file '{spec['file']}' not found, using a generated tone.")
+            _decoded[key] = pygame.sndarray.make_sound(synthesize_tone(**spec["tone"], mixer_settings=mixer_settings))
+    return _decoded[key]
+
+
+class SoundManager:
+    """The game's sound effects, loaded (and the mixer started) on first use.
+
+    Starting the mixer opens the audio device, which is one of the slowest
+    parts of startup, so it is left until a match begins. Without an audio
+    device the game stays silent.
+    """
+
+    def __init__(self, sounds=SOUNDS):
+        self.specs = sounds
+        self.sounds = None # name -> Sound, or {} when there is no audio device
+        self.channels = {} # name -> its reserved Channels
+        self.time = 0.0 # Game seconds, advanced by tick()
+        self.started = {} # Channel -> (game time, play number) its current sound started
+        self.last_played = {} # name -> game time of its last play
+        self.plays = 0
+        self.dropped = 0 # Requests within a cooldown
+        self.stolen = 0 # Plays that cut off an older voice
+
+    def load(self):
+        """Starts the mixer, reserves the channels and loads the sounds. Does nothing if they are already loaded."""
+        if self.sounds is not None:
+            return
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            print("Warning: no audio device, sound is off.")
+            self.sounds = {}
+            return
+        mixer_settings = pygame.mixer.get_init()
+        reserved = sum(spec["channels"] for spec in self.specs.values())
+        pygame.mixer.set_num_channels(max(reserved, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(reserved) # find_channel() and Sound.play() elsewhere never take these
+        first = 0
+        for name, spec in self.specs.items():
+            self.channels[name] = [pygame.mixer.Channel(first + i) for i in range(spec["channels"])]
+            first += spec["channels"]
+        self.sounds = {name: load_sound(name, mixer_settings) for name in self.specs}
+
+    def tick(self, seconds):
+        """Advances game time by one update of ``seconds``."""
+        self.time += seconds
+
+    def play(self, name):
+        self.load()
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        now = self.time
+        if now - self.last_played.get(name, -np.inf) < self.specs[name]["cooldown"]:
+            self.dropped += 1
+            return
+        self.last_played[name] = now
+
+        channels = self.channels[name]
+        channel = next((channel for channel in channels if not channel.get_busy()), None)
+        if channel is None:
+            channel = min(channels, key=self.started.__getitem__) # Steal the oldest voice
+            self.stolen += 1
+        channel.play(sound)
+        self.started[channel] = (now, self.plays) # Plays in the same update are ordered by when they came
+        self.plays += 1
+
+    def voices(self, name=None):
+        """Number of mixer channels playing name (default: playing anything), whichever channels they are."""
+        if not self.sounds:
+            return 0
+        channels = [pygame.mixer.Channel(i) for i in range(pygame.mixer.get_num_channels())]
+        if name is None:
+            return sum(channel.get_busy() for channel in channels)
+        sound = self.sounds[name]
+        return sum(channel.get_busy() and channel.get_sound() is sound for channel in channels)
@@ -0,0 +1,224 @@
+"""Match telemetry: a columnar, append-only log of what happens in each rally.
+
+The session reports serves, paddle hits (with where on the paddle the ball
+struck and how fast it was going), wall bounces, points and match ends.
+Hits, bounces and points carry the contact point and moment that the
+ball's sweep computed, not the ball's state at the end of the update.
+``TelemetryWriter`` keeps them in preallocated NumPy column buffers and
+appends them to the file in blocks, so recording an event is only a few
+array stores and the game never writes to disk per event.
+
+A file is a 16-byte header followed by blocks. Each block is an event
+count followed by every column of those events, one after another (the
+columns of ``COLUMNS``, in order). Files are only ever appended to, so one
+file can collect many sessions. A block cut short by a crash is cut off
+the file when the next session opens it for writing (and skipped if it
+is read before that). ``Telemetry`` streams a file block by block.
+
+    python telemetry.py pong.telemetry    # rally, hit and match statistics
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"PONGTLM\0"
+VERSION = 2 # 2: "update" became "time", the exact moment of the event
+HEADER = struct.Struct("<8sHxxxxxx") # magic, version
+BLOCK = struct.Struct("<I") # events in the block
+
+# Event kinds
+SERVE = 0
+PADDLE_HIT = 1
+WALL_BOUNCE = 2
+POINT = 3
+MATCH_END = 4
+EVENT_NAMES = ["serve", "paddle hit", "wall bounce", "point", "match end"]
+
+# Sides, for hits, points and match ends
+PLAYER = 0 # Right paddle
+OPPONENT = 1 # Left paddle (AI or player 2)
+
+COLUMNS = [
+    ("match", np.dtype("<u8")), # The match's seed
+    ("time", np.dtype("<f8")), # Updates since the match started, to the moment of contact
+    ("kind", np.dtype("u1")),
+    ("side", np.dtype("i1")), # PLAYER or OPPONENT: who hit, scored or won; -1 otherwise
+    ("ball_x", np.dtype("<f4")), # Ball center at the event (the contact point, for bounces and points)
+    ("ball_y", np.dtype("<f4")),
+    ("speed_x", np.dtype("<f4")), # Ball speed after the event, pixels per update
+    ("speed_y", np.dtype("<f4")),
+    ("offset", np.dtype("<f4")), # Paddle hits: ball from paddle center, -1 (touching the top) to 1 (bottom); else NaN
+    ("player_score", np.dtype("u1")),
+    ("opponent_score", np.dtype("u1")),
+]
+EVENT_SIZE = sum(dtype.itemsize for _, dtype in COLUMNS)
+BUFFER_SIZE = 4096 # Events kept in memory between writes
+
+
+class TelemetryWriter:
+    """Collects events in column buffers and appends them to a telemetry file in blocks."""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {name: np.zeros(BUFFER_SIZE, dtype=dtype) for name, dtype in COLUMNS}
+        self.count = 0 # Events in the buffers
+        self.events = 0 # Events recorded in total
+        # Check an existing file before opening it for writing, so a wrong header raises with nothing left open
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        complete_size = None if new else Telemetry(path).complete_size()
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        else:
+            # Drop a partial block left by a crash, or the new blocks would be read as part of it
+            self.file.truncate(complete_size)
+
+    def record(self, match, time, kind, side, ball_x, ball_y, speed_x, speed_y, offset,
+               player_score, opponent_score):
+        """Stores one event."""
+        i = self.count
+        columns = self.columns
+        columns["match"][i] = match
+        columns["time"][i] = time
+        columns["kind"][i] = kind
+        columns["side"][i] = side
+        columns["ball_x"][i] = ball_x
+        columns["ball_y"][i] = ball_y
+        columns["speed_x"][i] = speed_x
+        columns["speed_y"][i] = speed_y
+        columns["offset"][i] = offset
+        columns["player_score"][i] = player_score
+        columns["opponent_score"][i] = opponent_score
+        self.count += 1
+        self.events += 1
+        if self.count == BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered events to the file as one block."""
+        if self.count == 0:
+            return
+        self.file.write(BLOCK.pack(self.count))
+        for name, _ in COLUMNS:
+            self.file.write(self.columns[name][:self.count].tobytes())
+        self.count = 0
+
+    def close(self):
+        """Writes the remaining events and closes the file."""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class Telemetry:
+    """A telemetry file opened for reading."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+        if len(header) < HEADER.size or not header.startswith(MAGIC):
+            raise ValueError(f"{path} is not a telemetry file")
+        _, version = HEADER.unpack(header)
+        if version != VERSION:
+            raise ValueError(f"{path} is version {version} telemetry, expected version {VERSION}")
+
+    def complete_size(self):
+        """Bytes from the start of the file to the end of its last complete block."""
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as file:
+            end = HEADER.size
+            while True:
+                file.seek(end)
+                block = file.read(BLOCK.size)
+                if len(block) < BLOCK.size:
+                    return end
+                (count,) = BLOCK.unpack(block)
+                if end + BLOCK.size + count * EVENT_SIZE > size:
+                    return end
+                end += BLOCK.size + count * EVENT_SIZE
+
+    def chunks(self):
+        """Yields the events block by block, as {column: array}; only one block is in memory at a time."""
+        with open(self.path, "rb") as file:
+            file.seek(HEADER.size)
+            while True:
+                block = file.read(BLOCK.size)
+                if len(block) < BLOCK.size:
+                    return
+                (count,) = BLOCK.unpack(block)
+                data = file.read(count * EVENT_SIZE)
+                if len(data) < count * EVENT_SIZE:
+                    return # Cut short by a crash
+                columns = {}
+                offset = 0
+                for name, dtype in COLUMNS:
+                    columns[name] = np.frombuffer(data, dtype, count, offset)
+                    offset += count * dtype.itemsize
+                yield columns
+
+
+def summarize(path):
+    """Streams a telemetry file and returns summary statistics as a dict."""
+    counts = np.zeros(len(EVENT_NAMES), dtype=np.int64)
+    matches = set()
+    rallies = [] # Paddle hits from each serve to the point that ended it
+    rally_hits = 0
+    hit_speeds = []
+    hit_offsets = []
+    wins = np.zeros(2, dtype=np.int64) # Matches won by PLAYER, OPPONENT
+    for chunk in Telemetry(path).chunks():
+        kind = chunk["kind"]
+        counts += np.bincount(kind, minlength=len(EVENT_NAMES))
+        matches.update(np.unique(chunk["match"]).tolist())
+        hits = kind == PADDLE_HIT
+        hit_speeds.append(np.hypot(chunk["speed_x"][hits], chunk["speed_y"][hits]))
+        hit_offsets.append(chunk["offset"][hits])
+        ends = kind == MATCH_END
+        wins += np.bincount(chunk["side"][ends], minlength=2)[:2]
+
+        # Rally lengths: only serves and points need looking at one by one
+        hits_so_far = np.cumsum(hits)
+        for index in np.flatnonzero((kind == SERVE) | (kind == POINT)).tolist():
+            if kind[index] == SERVE:
+                rally_hits = -hits_so_far[index]
+            else:
+                rallies.append(rally_hits + hits_so_far[index])
+        rally_hits += hits_so_far[-1] if len(kind) else 0
+
+    hit_speeds = np.concatenate(hit_speeds) if hit_speeds else np.zeros(0)
+    hit_offsets = np.concatenate(hit_offsets) if hit_offsets else np.zeros(0)
+    rallies = np.asarray(rallies)
+    return {
+        "events": {name: int(count) for name, count in zip(EVENT_NAMES, counts)},
+        "matches": len(matches),
+        "matches won": {"player": int(wins[PLAYER]), "opponent": int(wins[OPPONENT])},
+        "rally hits": {"mean": rallies.mean() if rallies.size else 0.0,
+                       "p50": np.percentile(rallies, 50) if rallies.size else 0.0,
+                       "max": int(rallies.max()) if rallies.size else 0},
+        "wall bounces per point": counts[WALL_BOUNCE] / max(counts[POINT], 1),
+        "hit speed": {"mean": hit_speeds.mean() if hit_speeds.size else 0.0,
+                      "max": hit_speeds.max() if hit_speeds.size else 0.0},
+        "hit offset": {"mean": hit_offsets.mean() if hit_offsets.size else 0.0,
+                       "mean distance from center": np.abs(hit_offsets).mean() if hit_offsets.size else 0.0,
+                       "edge hits": float(np.mean(np.abs(hit_offsets) > 0.75)) if hit_offsets.size else 0.0},
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1]
+    stats = summarize(path)
+    print(f"{path}: {os.path.getsize(path):,} bytes, {stats['matches']} matches "
+          f"(player won {stats['matches won']['player']}, opponent won {stats['matches won']['opponent']})")
+    print("events: " + ", ".join(f"{count} {name}" for name, count in stats["events"].items()))
+    rally = stats["rally hits"]
+    print(f"paddle hits per rally: mean {rally['mean']:.1f}, median {rally['p50']:.0f}, longest {rally['max']}")
+    print(f"wall bounces per point: {stats['wall bounces per point']:.2f}")
+    print(f"ball speed at hits: mean {stats['hit speed']['mean']:.1f}, max {stats['hit speed']['max']:.1f} px/update")
+    offset = stats["hit offset"]
+    print(f"contact offset: mean {offset['mean']:+.2f}, mean distance from center {offset['mean distance from center']:.2f}, "
+          f"{offset['edge hits']:.0%} within the outer eighths")
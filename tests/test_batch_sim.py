@@ -0,0 +1,53 @@
+import itertools
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from batch_sim import BatchSimulation, PLAYER_WON, OPPONENT_WON
+from ping_pong import GameSession, difficulty_levels, ball_speed_levels
+from settings import PADDLE_HEIGHT, PADDLE_SPEED, AI_SPEEDS, BALL_SPEEDS, CHASER_AIM_ERROR, UPDATES_PER_SECOND
+
+MAX_UPDATES = 10 * 60 * UPDATES_PER_SECOND
+
+
+def chase(paddle_center, ball_y, aim):
+    """Right paddle input: full speed toward the aimed point, half speed (half-pixel moves) when close."""
+    distance = ball_y + aim - paddle_center
+    if distance == 0:
+        return 0
+    speed = PADDLE_SPEED if abs(distance) > PADDLE_SPEED else PADDLE_SPEED / 2
+    return speed if distance > 0 else -speed
+
+
+@pytest.mark.parametrize("difficulty, ball_speed", list(itertools.product(difficulty_levels, ball_speed_levels)))
+def test_batch_matches_game_session(difficulty, ball_speed):
+    session = GameSession()
+    session.current_difficulty_index = difficulty_levels.index(difficulty)
+    session.current_ball_speed_index = ball_speed_levels.index(ball_speed)
+    session.reset_game(seed=0)
+    sim = BatchSimulation(1, ball_speed=BALL_SPEEDS[ball_speed], opponent_speed=AI_SPEEDS[difficulty])
+    rng = random.Random(f"{difficulty} {ball_speed}")
+    aim = 0
+
+    for _ in range(MAX_UPDATES):
+        if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            session.serve_ball()
+            sim.serve()
+        if session.ball_speed_x < 0:
+            aim = rng.uniform(-CHASER_AIM_ERROR, CHASER_AIM_ERROR) * PADDLE_HEIGHT
+        session.player_speed = chase(session.player.centery, session.ball.centery, aim)
+        session.update()
+        sim.step(session.player_speed)
+
+        assert (sim.ball_x[0], sim.ball_y[0]) == session.ball_position
+        assert (sim.ball_speed_x[0], sim.ball_speed_y[0]) == (session.ball_speed_x, session.ball_speed_y)
+        assert (sim.player_y[0], sim.opponent_y[0]) == (session.player.y, session.opponent.y)
+        assert (sim.player_score[0], sim.opponent_score[0]) == (session.player_score, session.opponent_score)
+        assert sim.done[0] == (session.game_state == "game_over")
+        if sim.done[0]:
+            break
+    assert sim.done[0]
+    assert sim.winner[0] == (PLAYER_WON if session.player_score > session.opponent_score else OPPONENT_WON)
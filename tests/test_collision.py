@@ -0,0 +1,149 @@
+import numpy as np
+import pygame
+import pytest
+
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT, BALL_RADIUS, PADDLE_WIDTH, PADDLE_HEIGHT, PLAYER_X, OPPONENT_X
+from collision import sweep_ball, sweep_ball_batch, WALL, LEFT_GOAL, RIGHT_GOAL
+
+
+def test_paddle_moved_onto_the_ball_bounces_it():
+    # The ball is level with the player's paddle front face, beside it; the paddle moved down onto it
+    paddle = pygame.Rect(PLAYER_X, 300, PADDLE_WIDTH, PADDLE_HEIGHT)
+    x, y = PLAYER_X - BALL_RADIUS + 2, 300 + 5
+    x, y, speed_x, speed_y, events = sweep_ball(x, y, 7, 3, {"player": paddle})
+    assert events == ["player"]
+    assert speed_x == -7 and speed_y == 3
+    assert x == PLAYER_X - BALL_RADIUS - 7
+
+    (x, _, speed_x, _, _, (player_hit,), _, _) = sweep_ball_batch(
+        np.array([PLAYER_X - BALL_RADIUS + 2.0]), np.array([305.0]), np.array([7.0]), np.array([3.0]),
+        [(PLAYER_X, 300, PLAYER_X + PADDLE_WIDTH, 300 + PADDLE_HEIGHT)])
+    assert player_hit[0] and speed_x[0] == -7 and x[0] == PLAYER_X - BALL_RADIUS - 7
+
+
+def test_ball_inside_a_paddle_heading_out_is_let_out():
+    paddle = pygame.Rect(OPPONENT_X, 300, PADDLE_WIDTH, PADDLE_HEIGHT)
+    x, y, speed_x, speed_y, events = sweep_ball(OPPONENT_X + PADDLE_WIDTH, 350, 7, 0, {"opponent": paddle})
+    assert events == [] and speed_x == 7 and x == OPPONENT_X + PADDLE_WIDTH + 7
+
+
+# --- Against a reference that moves the ball in 1/64 frame steps ---
+SUBSTEPS = 64
+
+
+def grown(rect):
+    return rect.left - BALL_RADIUS, rect.top - BALL_RADIUS, rect.right + BALL_RADIUS, rect.bottom + BALL_RADIUS
+
+
+def reference_frame(x, y, speed_x, speed_y, paddles):
+    """One frame of ball movement as SUBSTEPS short moves, each followed by an overlap test.
+
+    A collision found after a move is undone by mirroring the ball's
+    position in the face it crossed. Paddles follow the same rules as
+    sweep_ball: a ball that starts the frame inside a paddle is pushed out of
+    the face it came from if it is heading through, and let out otherwise.
+    """
+    events = []
+    let_out = set()
+    for name, paddle in paddles.items():
+        left, top, right, bottom = grown(paddle)
+        if left < x < right and top < y < bottom:
+            center = (left + right) / 2
+            if speed_x > 0 and x < center or speed_x < 0 and x > center:
+                x = left if x < center else right
+                speed_x = -speed_x
+                events.append(name)
+            else:
+                let_out.add(name)
+
+    for _ in range(SUBSTEPS):
+        previous_x, previous_y = x, y
+        x += speed_x / SUBSTEPS
+        y += speed_y / SUBSTEPS
+        if y < BALL_RADIUS:
+            y, speed_y = 2 * BALL_RADIUS - y, -speed_y
+            events.append(WALL)
+        elif y > SCREEN_HEIGHT - BALL_RADIUS:
+            y, speed_y = 2 * (SCREEN_HEIGHT - BALL_RADIUS) - y, -speed_y
+            events.append(WALL)
+        for goal_x, goal in ((BALL_RADIUS, LEFT_GOAL), (SCREEN_WIDTH - BALL_RADIUS, RIGHT_GOAL)):
+            if (x - goal_x) * (previous_x - goal_x) <= 0 and x != previous_x:
+                fraction = (goal_x - previous_x) / (x - previous_x)
+                return goal_x, previous_y + (y - previous_y) * fraction, speed_x, speed_y, events + [goal]
+
+        for name, paddle in paddles.items():
+            left, top, right, bottom = grown(paddle)
+            inside = left < x < right and top < y < bottom
+            if name in let_out:
+                if not inside:
+                    let_out.discard(name)
+                continue
+            if not inside:
+                continue
+            # Which face was crossed last: that is where the ball came in
+            face_x = left if previous_x <= left else right
+            face_y = top if previous_y <= top else bottom
+            entry_x = (face_x - previous_x) / (x - previous_x) if not left < previous_x < right else -1
+            entry_y = (face_y - previous_y) / (y - previous_y) if not top < previous_y < bottom else -1
+            if entry_x >= entry_y:
+                x, speed_x = 2 * face_x - x, -speed_x
+            else:
+                y, speed_y = 2 * face_y - y, -speed_y
+            events.append(name)
+    return x, y, speed_x, speed_y, events
+
+
+def play(frame, ball, paddles, paddle_speeds, frames):
+    """Runs frames of the ball with ``frame``, moving each paddle after every frame like the game's update."""
+    x, y, speed_x, speed_y = ball
+    paddles = {name: rect.copy() for name, rect in paddles.items()}
+    events = []
+    for _ in range(frames):
+        x, y, speed_x, speed_y, new_events = frame(x, y, speed_x, speed_y, paddles)
+        events += new_events
+        if LEFT_GOAL in new_events or RIGHT_GOAL in new_events:
+            break
+        for name, speed in paddle_speeds.items():
+            paddles[name].y += speed
+    return (x, y, speed_x, speed_y), events
+
+
+def batch_frame(x, y, speed_x, speed_y, paddles):
+    """sweep_ball_batch on a batch of one, with its masks turned back into sweep_ball's events."""
+    rects = list(paddles.values())
+    (x, y, speed_x, speed_y, wall_hit, paddle_hits, left_goal, right_goal) = sweep_ball_batch(
+        np.array([x]), np.array([y]), np.array([speed_x]), np.array([speed_y]),
+        [(rect.left, rect.top, rect.right, rect.bottom) for rect in rects])
+    events = [WALL] * bool(wall_hit[0]) + [name for name, hit in zip(paddles, paddle_hits) if hit[0]]
+    events += [LEFT_GOAL] * bool(left_goal[0]) + [RIGHT_GOAL] * bool(right_goal[0])
+    return x[0], y[0], speed_x[0], speed_y[0], events
+
+
+def paddles_at(player_top, opponent_top):
+    return {"player": pygame.Rect(PLAYER_X, player_top, PADDLE_WIDTH, PADDLE_HEIGHT),
+            "opponent": pygame.Rect(OPPONENT_X, opponent_top, PADDLE_WIDTH, PADDLE_HEIGHT)}
+
+
+# Ball (x, y, speed_x, speed_y), paddles, paddle speeds per frame, frames
+CORNER_Y = 200 - BALL_RADIUS # Top of the opponent's paddle, grown by the ball
+CASES = {
+    "fast ball": ((400, 300, -45, -31), paddles_at(230, 230), {}, 120),
+    "fast rally": ((400, 300, -40, 3.5), paddles_at(230, 230), {"player": 1, "opponent": 1}, 120),
+    "fast ball missing": ((400, 300, 38, 29), paddles_at(0, 460), {}, 30),
+    **{f"corner {offset:+g}": ((400, CORNER_Y + offset - 4 * 36.5, -10, 4), paddles_at(230, 200), {}, 60)
+       for offset in (-3, -1.5, 1.5, 3)}, # Reaches the opponent's front face 36.5 frames in, near its top corner
+    "moving paddle intercepts": ((600, 450, 9, 1), paddles_at(200, 230), {"player": 9}, 60),
+    "moving paddle from the side": ((PLAYER_X - BALL_RADIUS + 3, 380, 2, 0), paddles_at(230, 230), {"player": 8}, 30),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_sweep_matches_substepped_reference(case):
+    ball, paddles, paddle_speeds, frames = CASES[case]
+    expected, expected_events = play(reference_frame, ball, paddles, paddle_speeds, frames)
+    for frame in (sweep_ball, batch_frame):
+        state, events = play(frame, ball, paddles, paddle_speeds, frames)
+        paddle_events = [event for event in events if event != WALL]
+        assert paddle_events == [event for event in expected_events if event != WALL]
+        assert events.count(WALL) == expected_events.count(WALL)
+        assert state == pytest.approx(expected, abs=1e-6)
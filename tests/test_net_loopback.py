@@ -0,0 +1,36 @@
+import asyncio
+import os
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from benchmarks.net_loopback import run
+from settings import PADDLE_SPEED
+
+
+def test_loopback_with_latency_and_jitter():
+    results = asyncio.run(run(matches=2, latency=50, jitter=10, seconds=3, seed=1))
+    bots = results["bots"]
+    assert all(bot.client.side is not None for bot in bots) # Every bot got into a match
+
+    # Jitter stays within the server's input delay, so the own paddle is predicted exactly
+    prediction_errors = results["prediction_errors"]
+    assert prediction_errors
+    assert np.percentile(prediction_errors, 99) == 0
+    assert max(prediction_errors) <= PADDLE_SPEED
+
+    interpolation_errors = results["interpolation_errors"]
+    assert interpolation_errors
+    assert np.percentile(interpolation_errors, 99) < 10
+
+    assert results["score_checks"] > 0
+    assert results["score_mismatches"] == 0
+    matches = {}
+    for bot in bots:
+        matches.setdefault(bot.client.names, []).append(bot)
+    assert len(matches) == 2
+    for right, left in matches.values():
+        common = right.scores.keys() & left.scores.keys()
+        assert common
+        assert all(right.scores[update] == left.scores[update] for update in common)
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from pong_env import PongEnv, VectorPongEnv, STATE_FIELDS, UP, STAY, DOWN, NUM_ACTIONS, pixel_shape
+from settings import WINNING_SCORE
+
+
+def test_reset_and_step():
+    env = PongEnv("state", frame_skip=4)
+    obs, info = env.reset(seed=1)
+    assert obs.shape == env.observation_shape == (len(STATE_FIELDS),)
+    assert obs.dtype == np.float32
+    assert info == {}
+
+    total = 0
+    terminated = truncated = False
+    while not (terminated or truncated):
+        obs, reward, terminated, truncated, info = env.step(STAY) # A still paddle loses every point
+        assert obs.shape == (len(STATE_FIELDS),)
+        assert reward in (-1, 0, 1)
+        total += reward
+    assert terminated and not truncated
+    assert env.session.opponent_score == WINNING_SCORE
+    assert total == env.session.player_score - env.session.opponent_score
+
+
+def test_truncated_after_max_updates():
+    env = PongEnv("state", max_updates=10)
+    env.reset(seed=1)
+    results = [env.step(STAY)[2:4] for _ in range(10)]
+    assert results[-1] == (False, True)
+    assert all(result == (False, False) for result in results[:-1])
+
+
+def test_frame_skip_step_plays_like_single_steps():
+    skipping = PongEnv("state", frame_skip=4)
+    single = PongEnv("state")
+    skipping.reset(seed=3)
+    single.reset(seed=3)
+    actions = np.random.default_rng(0).integers(0, NUM_ACTIONS, 300)
+    for action in actions:
+        obs, reward, terminated, _, _ = skipping.step(action)
+        single_reward = 0
+        for _ in range(4):
+            single_obs, step_reward, single_terminated, _, _ = single.step(action)
+            single_reward += step_reward
+            if single_terminated:
+                break
+        assert np.array_equal(obs, single_obs)
+        assert (reward, terminated) == (single_reward, single_terminated)
+        if terminated:
+            break
+
+
+def test_vector_state_step_matches_single_envs():
+    num_envs = 4
+    vector = VectorPongEnv(num_envs, "state", frame_skip=4)
+    envs = [PongEnv("state", frame_skip=4) for _ in range(num_envs)]
+    vector_obs, _ = vector.reset(seed=0)
+    assert vector_obs.shape == vector.observation_shape == (num_envs, len(STATE_FIELDS))
+    assert np.array_equal(vector_obs, [env.reset(seed=0)[0] for env in envs])
+
+    rng = np.random.default_rng(0)
+    ended = 0
+    for _ in range(1000):
+        actions = rng.choice([UP, STAY, DOWN], num_envs, p=[0.2, 0.3, 0.5])
+        vector_obs, rewards, terminated, truncated, _ = vector.step(actions)
+        for i, env in enumerate(envs):
+            obs, reward, env_terminated, env_truncated, _ = env.step(actions[i])
+            assert (rewards[i], terminated[i], truncated[i]) == (reward, env_terminated, env_truncated)
+            if env_terminated or env_truncated:
+                obs, _ = env.reset() # VectorPongEnv starts the next match within the step
+                ended += 1
+            assert np.array_equal(vector_obs[i], obs)
+    assert ended > 0
+
+
+@pytest.mark.parametrize("num_envs", [None, 3])
+def test_pixel_observation_is_a_view(num_envs):
+    if num_envs is None:
+        env = PongEnv("pixels", downsample=4)
+        surface = lambda: env.surfaces[env.buffer]
+        shape = pixel_shape(4)
+    else:
+        env = VectorPongEnv(num_envs, "pixels", downsample=4)
+        surface = lambda: env.surfaces[env.envs[0].buffer]
+        shape = (num_envs,) + pixel_shape(4)
+    obs, _ = env.reset(seed=0)
+    assert obs.shape == env.observation_shape == shape
+    assert obs.dtype == np.uint8
+    assert not obs.flags.owndata
+    assert obs.any() # The ball and paddles are drawn
+
+    surface().fill((1, 2, 3)) # Shows through the observation without another step
+    assert (obs == (1, 2, 3)).all()
+    del obs # Unlocks the surface
+
+    obs = env.step(STAY if num_envs is None else [STAY] * num_envs)[0]
+    assert obs.shape == shape
+    assert not (obs == (1, 2, 3)).all(axis=-1).all()
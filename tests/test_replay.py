@@ -0,0 +1,72 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from ping_pong import GameSession, replay_session
+from replay import Replay, ReplayRecorder
+from settings import PADDLE_HEIGHT, PADDLE_SPEED, CHASER_AIM_ERROR, UPDATES_PER_SECOND
+
+MAX_UPDATES = 10 * 60 * UPDATES_PER_SECOND
+
+
+def play_recorded_match(path, ai, seed):
+    """Plays one headless match like run_headless(), recording it. Returns the finished session."""
+    rng = random.Random(seed)
+    session = GameSession(ai)
+    session.reset_game(seed=seed)
+    session.recorder = ReplayRecorder(path, session)
+    aim_offset = 0
+    for _ in range(MAX_UPDATES):
+        if session.ball_speed_x == 0 and session.ball_speed_y == 0:
+            session.serve_ball()
+        session.player_speed = 0
+        if session.ball_speed_x < 0:
+            aim_offset = rng.uniform(-CHASER_AIM_ERROR, CHASER_AIM_ERROR) * PADDLE_HEIGHT
+        elif session.ball_speed_x > 0:
+            target_y = session.ball.centery + aim_offset
+            if session.player.centery < target_y: session.player_speed = PADDLE_SPEED
+            if session.player.centery > target_y: session.player_speed = -PADDLE_SPEED
+        session.update()
+        if session.game_state == "game_over":
+            break
+    session.recorder.close()
+    return session
+
+
+def state(session):
+    return (session.player_score, session.opponent_score, session.winner_text, session.ball_position,
+            session.ball_speed_x, session.ball_speed_y, session.player.y, session.opponent.y, session.update_count)
+
+
+@pytest.mark.parametrize("ai", ["reactive", "predictive"])
+def test_replay_reproduces_match(tmp_path, ai):
+    path = tmp_path / "match.pongrec"
+    played = play_recorded_match(path, ai, seed=1234)
+    assert played.game_state == "game_over"
+
+    replay = Replay(path)
+    assert replay.complete
+    assert (replay.player_score, replay.opponent_score) == (played.player_score, played.opponent_score)
+    assert len(replay) == played.update_count
+
+    session = replay_session(replay)
+    for chunk in replay.chunks(size=1000):
+        for player_speed, opponent_player_speed, flags in chunk.tolist():
+            session.apply_input(player_speed, opponent_player_speed, flags)
+            session.update()
+    assert session.game_state == "game_over"
+    assert state(session) == state(played)
+
+
+def test_chunks_cover_every_record(tmp_path):
+    path = tmp_path / "match.pongrec"
+    play_recorded_match(path, "reactive", seed=99)
+    replay = Replay(path)
+    chunks = list(replay.chunks(size=1000))
+    assert len(chunks) == -(-len(replay) // 1000)
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+    assert np.array_equal(np.concatenate(chunks), replay.inputs)
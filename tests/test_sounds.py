@@ -0,0 +1,71 @@
+import copy
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy") # Real mixer channels without an audio device
+
+import pygame
+
+from sounds import SoundManager, SOUNDS
+from settings import UPDATES_PER_SECOND
+
+TIMESTEP = 1 / UPDATES_PER_SECOND
+
+
+@pytest.fixture
+def no_cooldown():
+    sounds = copy.deepcopy(SOUNDS)
+    for spec in sounds.values():
+        spec["cooldown"] = 0
+    return sounds
+
+
+@pytest.fixture
+def manager_for():
+    def make(sounds):
+        manager = SoundManager(sounds)
+        manager.load()
+        if not manager.sounds:
+            pytest.skip("no audio driver")
+        return manager
+
+    yield make
+    pygame.mixer.stop()
+
+
+def test_voices_stay_within_reserved_channels(manager_for, no_cooldown):
+    manager = manager_for(no_cooldown)
+    for _ in range(50):
+        manager.play("pong")
+        assert manager.voices("pong") <= no_cooldown["pong"]["channels"]
+    for _ in range(5):
+        manager.play("score")
+    # Counted over every mixer channel, so a voice on any other channel would show up here
+    assert manager.voices("pong") == no_cooldown["pong"]["channels"]
+    assert manager.voices("score") == no_cooldown["score"]["channels"]
+    assert manager.voices() == no_cooldown["pong"]["channels"] + no_cooldown["score"]["channels"]
+    assert manager.stolen == 50 - 3 + 5 - 1
+
+
+def test_other_sounds_leave_the_reserved_channels_alone(manager_for, no_cooldown):
+    manager = manager_for(no_cooldown)
+    other = manager.sounds["score"]
+    for _ in range(pygame.mixer.get_num_channels()):
+        other.play() # Sound.play() picks a free unreserved channel, or none
+    manager.play("pong")
+    assert manager.voices("pong") == 1
+    assert manager.stolen == 0
+
+
+def test_cooldown_runs_on_game_time(manager_for):
+    manager = manager_for(SOUNDS)
+    updates = round(SOUNDS["pong"]["cooldown"] * UPDATES_PER_SECOND) # Updates the cooldown lasts
+    manager.play("pong")
+    for _ in range(updates - 1):
+        manager.tick(TIMESTEP)
+        manager.play("pong") # However little or much real time passes in between
+    assert (manager.plays, manager.dropped) == (1, updates - 1)
+    manager.tick(TIMESTEP)
+    manager.play("pong")
+    assert manager.plays == 2
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from telemetry import TelemetryWriter, Telemetry, EVENT_SIZE, BLOCK, HEADER, PADDLE_HIT, PLAYER
+
+
+def write_session(path, match, events, flush_every):
+    """Writes ``events`` paddle hits of ``match``, one block per ``flush_every`` events."""
+    writer = TelemetryWriter(path)
+    for update in range(events):
+        writer.record(match, update, PADDLE_HIT, PLAYER, 400, 300, 7, -7, 0.5, 0, 0)
+        if (update + 1) % flush_every == 0:
+            writer.flush()
+    writer.close()
+
+
+def read_events(path):
+    chunks = list(Telemetry(path).chunks())
+    return [(int(match), int(time)) for chunk in chunks for match, time in zip(chunk["match"], chunk["time"])]
+
+
+def test_appending_after_a_crash_drops_the_partial_block(tmp_path):
+    path = tmp_path / "pong.telemetry"
+    write_session(path, match=1, events=30, flush_every=10) # Three blocks of 10 events
+    # A crash in the middle of writing the third block
+    size = HEADER.size + 3 * (BLOCK.size + 10 * EVENT_SIZE)
+    assert os.path.getsize(path) == size
+    with open(path, "r+b") as file:
+        file.truncate(size - 5 * EVENT_SIZE)
+
+    write_session(path, match=2, events=15, flush_every=10)
+
+    expected = [(1, update) for update in range(20)] + [(2, update) for update in range(15)]
+    assert read_events(path) == expected
+    assert os.path.getsize(path) == HEADER.size + 4 * BLOCK.size + 35 * EVENT_SIZE
+
+
+def test_block_count_cut_short(tmp_path):
+    path = tmp_path / "pong.telemetry"
+    write_session(path, match=1, events=10, flush_every=10)
+    with open(path, "ab") as file:
+        file.write(BLOCK.pack(10)[:2]) # Crashed while writing the next block's count
+
+    write_session(path, match=2, events=5, flush_every=10)
+
+    assert read_events(path) == [(1, update) for update in range(10)] + [(2, update) for update in range(5)]
+
+
+def test_appending_to_another_file_raises_and_leaves_it_alone(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not telemetry")
+    with pytest.raises(ValueError, match="not a telemetry file"):
+        TelemetryWriter(path)
+    assert path.read_bytes() == b"not telemetry"
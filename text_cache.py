@@ -0,0 +1,43 @@
+"""Cache of rendered text surfaces.
+
+Most text in the game (scores, menu labels, hints) changes rarely, so each
+string is rasterized once with ``font.render`` and the resulting Surface is
+reused until it falls out of the cache.
+"""
+from collections import OrderedDict
+
+
+class TextCache:
+    """LRU cache of surfaces keyed by (font, text, color, antialias)."""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=False):
+        """Returns the rendered Surface for text, rasterizing it only on a cache miss."""
+        key = (font, text, tuple(color), antialias) # pygame.Color is not hashable, a tuple is
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # Evict the least recently used text
+        return surface
+
+    def clear(self):
+        """Drops every cached surface and resets the counters."""
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and the current number of cached surfaces."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.surfaces)}
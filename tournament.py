@@ -0,0 +1,198 @@
+"""AI-vs-AI tournament over a grid of game parameters.
+
+Every combination of opponent speed, ball speed, paddle height and winning
+score is played ``--matches`` times. The right paddle is the same chasing
+player as ``run_headless()`` in ping_pong.py: it follows the ball with a
+random aiming error that is re-rolled every rally, and an error wider than
+its reach misses (CHASER_AIM_ERROR in settings.py). The left
+paddle is the game's AI. With ``--ai predictive`` the AI plays at each of
+``--difficulties``, with that level's reaction delay, prediction noise and
+max speed (``--opponent-speeds`` replaces the max speed).
+
+A match still running after MAX_MINUTES of game time is stopped and
+counted as unfinished; the win rates, rallies and points per minute only
+cover finished matches.
+
+Matches are split into chunks, one process pool task per chunk. A task
+plays its matches on one BatchSimulation, starting a new match in a slot as
+soon as the previous one there ends; once no new matches are left, the
+finished slots are dropped from the batch. Each chunk gets its own seed spawned from
+``--seed``, so with a fixed ``--chunk-size`` the results do not depend on
+the number of workers or the order chunks finish in. Workers only send back
+summed counters, which are merged per configuration as chunks arrive.
+
+    python tournament.py --matches 2000
+    python tournament.py --ai predictive --difficulties Easy Hard --ball-speeds 7 --workers 4
+"""
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from settings import PADDLE_HEIGHT, WINNING_SCORE, PADDLE_SPEED, AI_SPEEDS, BALL_SPEEDS, UPDATES_PER_SECOND
+from settings import PREDICTIVE_AI_LEVELS, CHASER_AIM_ERROR
+from batch_sim import BatchSimulation, rect_round, PLAYER_WON, OPPONENT_WON
+
+MAX_MINUTES = 10 # Matches still running after this much game time are stopped and counted as unfinished
+TASKS_PER_WORKER = 4 # Default chunking: enough tasks that no worker sits idle while others finish
+COUNTERS = ["matches", "player_wins", "opponent_wins", "unfinished", "unfinished_frames", "points", "hits",
+            "frames"]
+
+
+def add_totals(totals, sim, mask):
+    """Adds the results of the matches selected by mask to totals.
+
+    Points, hits and frames only count finished matches; stopped matches
+    are only counted, with the frames spent on them.
+    """
+    finished = mask & sim.done
+    unfinished = mask & ~sim.done
+    totals["matches"] += int(np.count_nonzero(mask))
+    totals["player_wins"] += int(np.count_nonzero(mask & (sim.winner == PLAYER_WON)))
+    totals["opponent_wins"] += int(np.count_nonzero(mask & (sim.winner == OPPONENT_WON)))
+    totals["unfinished"] += int(np.count_nonzero(unfinished))
+    totals["unfinished_frames"] += int(sim.match_frames[unfinished].sum())
+    totals["points"] += int(sim.player_score[finished].sum() + sim.opponent_score[finished].sum())
+    totals["hits"] += int(sim.player_hits[finished].sum() + sim.opponent_hits[finished].sum())
+    totals["frames"] += int(sim.match_frames[finished].sum())
+
+
+def play_chunk(task):
+    """Plays one chunk of matches of one configuration. Returns (config, {counter: total}).
+
+    At most ``batch_size`` matches run at once; whenever one ends, a new
+    match starts in its slot, so the batch stays full until the chunk's
+    last matches are being played. After that, slots whose match ended are
+    dropped from the batch so no time is spent stepping them.
+    """
+    config, num_matches, batch_size, seed = task
+    opponent_speed, ball_speed, paddle_height, winning_score, ai, difficulty = config
+    if ai == "predictive": # Like GameSession.set_difficulty()
+        level = PREDICTIVE_AI_LEVELS[difficulty]
+        ai_options = {"reaction_delay": level["reaction_delay"], "prediction_noise": level["prediction_noise"]}
+    else:
+        ai_options = {}
+    sim_seed, aim_seed = seed.spawn(2) # seed is a SeedSequence spawned by make_tasks()
+    sim = BatchSimulation(min(batch_size, num_matches), ball_speed=ball_speed, opponent_speed=opponent_speed,
+                          paddle_height=paddle_height, winning_score=winning_score, ai=ai, seed=sim_seed,
+                          **ai_options)
+    aim_rng = np.random.default_rng(aim_seed)
+    aim = np.zeros(sim.num_matches)
+    totals = dict.fromkeys(COUNTERS, 0)
+    started = sim.num_matches
+
+    max_frames = MAX_MINUTES * 60 * UPDATES_PER_SECOND
+    while sim.num_matches:
+        sim.serve()
+        # Chasing player: re-roll the aiming error while the ball is heading away, chase it when it comes back
+        away = sim.ball_speed_x < 0
+        aim[away] = aim_rng.uniform(-CHASER_AIM_ERROR, CHASER_AIM_ERROR, int(np.count_nonzero(away))) * paddle_height
+        target = rect_round(sim.ball_y) + aim
+        center = sim.player_y + sim.paddle_half
+        chase = np.where(center < target, PADDLE_SPEED, np.where(center > target, -PADDLE_SPEED, 0))
+        sim.step(np.where(sim.ball_speed_x > 0, chase, 0))
+
+        over = sim.done | (sim.match_frames >= max_frames)
+        if over.any():
+            add_totals(totals, sim, over)
+            slots = np.flatnonzero(over)
+            refill = slots[:num_matches - started]
+            started += refill.size
+            refilled = np.isin(np.arange(sim.num_matches), refill)
+            sim.reset(refilled)
+            aim[refilled] = 0
+            if refill.size < slots.size: # No matches left to start in the other slots
+                keep = ~over | refilled
+                sim.keep(keep)
+                aim = aim[keep]
+    return config, totals
+
+
+def make_tasks(configs, matches, chunk_size, batch_size, seed):
+    """Splits every configuration's matches into chunks, each with its own spawned seed."""
+    tasks = []
+    for config in configs:
+        for start in range(0, matches, chunk_size):
+            tasks.append((config, min(chunk_size, matches - start)))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    return [(config, num_matches, batch_size, chunk_seed)
+            for (config, num_matches), chunk_seed in zip(tasks, seeds)]
+
+
+def run_tournament(configs, matches, chunk_size=None, batch_size=500, workers=None, seed=None):
+    """Plays every configuration on a process pool. Returns {config: {counter: total}}.
+
+    By default matches are chunked so there are about four tasks per
+    worker, which keeps every core busy until close to the end.
+    """
+    workers = workers or os.cpu_count()
+    if chunk_size is None:
+        tasks_per_config = math.ceil(TASKS_PER_WORKER * workers / len(configs))
+        chunk_size = math.ceil(matches / tasks_per_config)
+    results = {config: dict.fromkeys(COUNTERS, 0) for config in configs}
+    tasks = make_tasks(configs, matches, chunk_size, batch_size, seed)
+    with multiprocessing.Pool(workers) as pool:
+        # Chunks come back in whatever order they finish; only their counters are merged
+        for config, totals in pool.imap_unordered(play_chunk, tasks):
+            for counter, value in totals.items():
+                results[config][counter] += value
+    return results
+
+
+def print_results(results):
+    """Prints one row per configuration; everything but the unfinished columns covers finished matches only."""
+    print(f"{'level':>6} {'opp speed':>9} {'ball':>5} {'paddle':>6} {'to':>3} {'AI wins':>8} {'finished':>8} "
+          f"{'unfinished':>10} {'stopped min':>11} {'rally':>6} {'points/min':>10}")
+    for (opponent_speed, ball_speed, paddle_height, winning_score, _, difficulty), totals in results.items():
+        finished = totals["player_wins"] + totals["opponent_wins"]
+        ai_win_rate = totals["opponent_wins"] / finished if finished else float("nan")
+        unfinished_rate = totals["unfinished"] / totals["matches"] if totals["matches"] else float("nan")
+        unfinished_minutes = totals["unfinished_frames"] / UPDATES_PER_SECOND / 60 # Game time spent on them
+        rally = totals["hits"] / totals["points"] if totals["points"] else float("nan") # Paddle hits per point
+        minutes = totals["frames"] / UPDATES_PER_SECOND / 60
+        points_per_minute = totals["points"] / minutes if minutes else float("nan")
+        print(f"{difficulty or '-':>6} {opponent_speed:>9g} {ball_speed:>5g} {paddle_height:>6g} {winning_score:>3g} "
+              f"{ai_win_rate:>8.1%} {finished:>8} {unfinished_rate:>10.1%} {unfinished_minutes:>11.0f} {rally:>6.2f} "
+              f"{points_per_minute:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI-vs-AI tournament over a grid of game parameters")
+    parser.add_argument("--opponent-speeds", type=float, nargs="+",
+                        help="AI paddle speeds (default: the game's; the predictive AI's max speed, default: its level's)")
+    parser.add_argument("--ball-speeds", type=float, nargs="+", default=sorted(BALL_SPEEDS.values()))
+    parser.add_argument("--paddle-heights", type=float, nargs="+", default=[PADDLE_HEIGHT])
+    parser.add_argument("--winning-scores", type=int, nargs="+", default=[WINNING_SCORE])
+    parser.add_argument("--ai", choices=["reactive", "predictive"], default="reactive")
+    parser.add_argument("--difficulties", nargs="+", choices=list(PREDICTIVE_AI_LEVELS), default=list(PREDICTIVE_AI_LEVELS),
+                        help="predictive AI levels to play (reaction delay, prediction noise and max speed)")
+    parser.add_argument("--matches", type=int, default=1000, help="matches per configuration")
+    parser.add_argument("--chunk-size", type=int, help="matches played by one task (default: about 4 tasks per worker)")
+    parser.add_argument("--batch-size", type=int, default=500, help="matches a task simulates at once")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, help="seed for reproducible results")
+    options = parser.parse_args()
+
+    if options.ai == "predictive":
+        configs = [(speed, *config, options.ai, difficulty) for difficulty in options.difficulties
+                   for speed in options.opponent_speeds or [PREDICTIVE_AI_LEVELS[difficulty]["max_speed"]]
+                   for config in itertools.product(options.ball_speeds, options.paddle_heights, options.winning_scores)]
+    else:
+        configs = [config + (options.ai, None) for config in itertools.product(
+            options.opponent_speeds or sorted(AI_SPEEDS.values()), options.ball_speeds, options.paddle_heights,
+            options.winning_scores)]
+    start = time.perf_counter()
+    results = run_tournament(configs, options.matches, options.chunk_size, options.batch_size, options.workers,
+                             options.seed)
+    elapsed = time.perf_counter() - start
+    print_results(results)
+    total = len(configs) * options.matches
+    print(f"{total} matches in {elapsed:.1f}s with {options.workers} workers ({total / elapsed:,.0f} matches per second)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Mapping from world coordinates to the internal rendering resolution.
+
+Game logic works in world units: a SCREEN_WIDTH x SCREEN_HEIGHT field,
+whatever the size of the window. The game draws into ``display_surface``
+at an internal resolution of its own, and ``Viewport`` maps world
+positions and sizes onto it; the renderer then scales that surface to the
+window. At the world size (the default) every mapping is the identity, so
+nothing is drawn differently.
+"""
+import math
+
+import pygame
+
+from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class Viewport:
+    """Maps world coordinates onto a surface of ``size`` pixels."""
+
+    def __init__(self, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.size = (int(size[0]), int(size[1]))
+        self.scale_x = self.size[0] / SCREEN_WIDTH
+        self.scale_y = self.size[1] / SCREEN_HEIGHT
+        self.scale = min(self.scale_x, self.scale_y) # For sizes that keep their shape: sprites, fonts, line widths
+
+    def point(self, x, y):
+        """Surface position of world point (x, y)."""
+        return (x * self.scale_x, y * self.scale_y)
+
+    def length(self, value):
+        """Surface pixels of a world length, at least 1."""
+        return max(1, round(value * self.scale))
+
+    def rect(self, rect):
+        """Surface Rect covering a world rect (Rect or (x, y, w, h)); edges are rounded, so neighbours still meet."""
+        x, y, width, height = rect
+        left, top = round(x * self.scale_x), round(y * self.scale_y)
+        return pygame.Rect(left, top, max(1, round((x + width) * self.scale_x) - left),
+                           max(1, round((y + height) * self.scale_y) - top))
+
+    def centered(self, surface, x, y):
+        """Top-left that centers surface horizontally on world x, with its top at world y."""
+        return (x * self.scale_x - surface.get_width() / 2, y * self.scale_y)
+
+
+def parse_size(text):
+    """Parses 'WIDTHxHEIGHT' (e.g. '400x300') into a (width, height) tuple."""
+    width, separator, height = text.lower().partition("x")
+    if not separator or not width.isdigit() or not height.isdigit() or int(width) < 1 or int(height) < 1:
+        raise ValueError(f"Expected WIDTHxHEIGHT, got '{text}'")
+    return (int(width), int(height))
+
+
+def fit_rect(size, target):
+    """The largest rect with the aspect ratio of ``size`` that fits in ``target``, centered (letterboxed)."""
+    scale = min(target[0] / size[0], target[1] / size[1])
+    rect = pygame.Rect(0, 0, max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+    rect.center = (target[0] // 2, target[1] // 2)
+    return rect
+
+
+def scale_rect(rect, scale_x, scale_y, offset=(0, 0)):
+    """Rect scaled by (scale_x, scale_y) and moved by offset, grown to whole pixels."""
+    left, top = math.floor(rect.x * scale_x), math.floor(rect.y * scale_y)
+    return pygame.Rect(left + offset[0], top + offset[1], math.ceil(rect.right * scale_x) - left,
+                       math.ceil(rect.bottom * scale_y) - top)